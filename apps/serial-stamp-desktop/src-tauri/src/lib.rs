@@ -3,10 +3,11 @@ use serde::{Deserialize, Serialize};
 use std::{
     collections::HashMap,
     fs,
-    io::{Read, Write},
+    io::{BufRead, BufReader, Read, Write},
     path::{Path, PathBuf},
-    process::Command,
+    process::{Command, Stdio},
     sync::{Mutex, OnceLock},
+    thread,
 };
 use tauri::{
     menu::{Menu, MenuItem, PredefinedMenuItem, Submenu},
@@ -104,6 +105,29 @@ fn default_text_size() -> i32 {
 struct OutputSpec {
     #[serde(rename = "background-color", default = "default_background_color")]
     background_color: Color,
+    // Page encoding; left unset, the CLI's defaults apply
+    #[serde(default, skip_serializing_if = "Option::is_none")]
+    dpi: Option<f64>,
+    #[serde(default, skip_serializing_if = "Option::is_none")]
+    codec: Option<String>,
+    #[serde(default, skip_serializing_if = "Option::is_none")]
+    quality: Option<i32>,
+    #[serde(default, skip_serializing_if = "Option::is_none")]
+    subsampling: Option<String>,
+    #[serde(
+        rename = "compress-level",
+        default,
+        skip_serializing_if = "Option::is_none"
+    )]
+    compress_level: Option<i32>,
+    #[serde(default, skip_serializing_if = "Option::is_none")]
+    color: Option<String>,
+    #[serde(
+        rename = "overlay-only",
+        default,
+        skip_serializing_if = "Option::is_none"
+    )]
+    overlay_only: Option<bool>,
 }
 
 fn default_background_color() -> Color {
@@ -114,6 +138,13 @@ impl Default for OutputSpec {
     fn default() -> Self {
         Self {
             background_color: default_background_color(),
+            dpi: None,
+            codec: None,
+            quality: None,
+            subsampling: None,
+            compress_level: None,
+            color: None,
+            overlay_only: None,
         }
     }
 }
@@ -483,21 +514,25 @@ fn project_unpack(app: tauri::AppHandle, file_path: String) -> Result<WorkspaceI
     unpack_stamp(&app, &stamp_path)
 }
 
-#[tauri::command]
-fn preview_generate(workspace_id: String) -> Result<String, String> {
-    let workspace_dir = get_workspace_dir(&workspace_id)?;
-    let preview_path = workspace_dir.join("preview.png");
-
-    // Attempt to find project root by looking for pyproject.toml
+/// Finds the Python project root (where `uv run serial-stamp` works) by looking
+/// for pyproject.toml in the current directory and its parents.
+fn find_python_project_root() -> Result<PathBuf, String> {
     let mut root_dir = std::env::current_dir().map_err(|e| e.to_string())?;
     loop {
         if root_dir.join("pyproject.toml").exists() {
-            break;
+            return Ok(root_dir);
         }
         if !root_dir.pop() {
             return Err("Could not find project root with pyproject.toml".to_string());
         }
     }
+}
+
+#[tauri::command]
+fn preview_generate(workspace_id: String) -> Result<String, String> {
+    let workspace_dir = get_workspace_dir(&workspace_id)?;
+    let preview_path = workspace_dir.join("preview.png");
+    let root_dir = find_python_project_root()?;
 
     let output = Command::new("uv")
         .current_dir(&root_dir)
@@ -531,6 +566,79 @@ fn preview_generate(workspace_id: String) -> Result<String, String> {
     Ok(b64)
 }
 
+/// Generates the workspace's PDF, forwarding the CLI's JSON progress events
+/// (see serial_stamp.progress) to the frontend as `export://progress` events.
+#[tauri::command]
+async fn project_export_pdf(
+    app: tauri::AppHandle,
+    workspace_id: String,
+    dest_path: String,
+) -> Result<(), String> {
+    let workspace_dir = get_workspace_dir(&workspace_id)?;
+    let root_dir = find_python_project_root()?;
+
+    // Runs on a blocking thread so the UI stays responsive while generating
+    tauri::async_runtime::spawn_blocking(move || {
+        let mut child = Command::new("uv")
+            .current_dir(&root_dir)
+            .args(&[
+                "run",
+                "serial-stamp",
+                "generate",
+                workspace_dir.to_str().ok_or("Invalid workspace path")?,
+                "-o",
+                dest_path.as_str(),
+                "--progress",
+                "jsonl",
+            ])
+            .stdout(Stdio::piped())
+            .stderr(Stdio::piped())
+            .spawn()
+            .map_err(|e| format!("Failed to execute python generate: {e}"))?;
+
+        // Drained on its own thread while stderr is read below: output left in
+        // a full pipe would block the process, and it would never close stderr
+        let stdout_reader = child.stdout.take().map(|mut stdout| {
+            thread::spawn(move || {
+                let mut text = String::new();
+                let _ = stdout.read_to_string(&mut text);
+                text
+            })
+        });
+
+        // stderr carries one JSON event per line; keep anything else for errors
+        let mut stderr_text = String::new();
+        if let Some(stderr) = child.stderr.take() {
+            for line in BufReader::new(stderr).lines() {
+                let line = line.map_err(|e| e.to_string())?;
+                match serde_json::from_str::<serde_json::Value>(&line) {
+                    Ok(event) if event.get("phase").is_some() => {
+                        let _ = app.emit("export://progress", event);
+                    }
+                    _ => {
+                        stderr_text.push_str(&line);
+                        stderr_text.push('\n');
+                    }
+                }
+            }
+        }
+
+        let stdout_text = stdout_reader
+            .and_then(|reader| reader.join().ok())
+            .unwrap_or_default();
+
+        let status = child.wait().map_err(|e| e.to_string())?;
+        if !status.success() {
+            return Err(format!(
+                "PDF export failed.\nStdout: {stdout_text}\nStderr: {stderr_text}"
+            ));
+        }
+        Ok(())
+    })
+    .await
+    .map_err(|e| e.to_string())?
+}
+
 #[cfg_attr(mobile, tauri::mobile_entry_point)]
 pub fn run() {
     // Native menu items (Desktop). These are the main actions you requested to live in the native window menu.
@@ -588,7 +696,8 @@ pub fn run() {
             workspace_remove_file,
             project_pack,
             project_unpack,
-            preview_generate
+            preview_generate,
+            project_export_pdf
         ])
         .run(tauri::generate_context!())
         .expect("error while running tauri application");
@@ -0,0 +1,59 @@
+// Mirrors serial_stamp.progress.ProgressEvent, as emitted by `generate --progress jsonl`
+export interface ProgressEvent {
+  phase: "render" | "write" | "done";
+  tickets_done: number;
+  ticket_count: number;
+  pages_done: number;
+  page_count: number;
+  bytes_written: number;
+  elapsed_seconds: number;
+  tickets_per_second: number | null;
+  pages_per_second: number | null;
+  eta_seconds: number | null;
+  rss_bytes: number | null;
+}
+
+export class ExportState {
+  running = $state(false);
+  event = $state<ProgressEvent | null>(null);
+
+  get fraction(): number {
+    const event = this.event;
+    if (!event || event.page_count === 0) return 0;
+    return event.phase === "done" ? 1 : event.pages_done / event.page_count;
+  }
+
+  get status(): string {
+    const event = this.event;
+    if (!event) return "Starting…";
+
+    let status = `Page ${event.pages_done}/${event.page_count}`;
+    if (event.phase === "write") {
+      status += `, writing (${(event.bytes_written / 1e6).toFixed(1)} MB)`;
+    } else if (event.phase === "done") {
+      status += `, done in ${event.elapsed_seconds.toFixed(1)}s`;
+    }
+    if (event.tickets_per_second && event.phase !== "done") {
+      status += `, ${Math.round(event.tickets_per_second)} tickets/s`;
+    }
+    if (event.eta_seconds && event.phase === "render") {
+      status += `, ETA ${Math.round(event.eta_seconds)}s`;
+    }
+    return status;
+  }
+
+  start() {
+    this.running = true;
+    this.event = null;
+  }
+
+  update(event: ProgressEvent) {
+    this.event = event;
+  }
+
+  finish() {
+    this.running = false;
+  }
+}
+
+export const exportState = new ExportState();
@@ -16,6 +16,13 @@ export interface TextSpec {
 
 export interface OutputSpec {
   "background-color": Color;
+  dpi?: number;
+  codec?: "jpeg" | "flate" | "auto";
+  quality?: number;
+  subsampling?: "4:4:4" | "4:2:2" | "4:2:0";
+  "compress-level"?: number;
+  color?: "rgb" | "gray" | "bw";
+  "overlay-only"?: boolean;
 }
 
 export interface StampSpec {
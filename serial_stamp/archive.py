@@ -0,0 +1,253 @@
+import os
+import struct
+import time
+import zlib
+from pathlib import Path, PurePosixPath
+from typing import Optional
+
+# Sizes and offsets from this value up are stored in Zip64 extra fields, and
+# entry counts from ZIP_MAX_ENTRIES up in the Zip64 end of central directory
+ZIP64_LIMIT = 0xFFFFFFFF
+ZIP_MAX_ENTRIES = 0xFFFF
+
+# "Language encoding" flag: entry names are UTF-8
+_UTF8_FLAG = 0x0800
+# Version needed to extract: 2.0 for stored entries, 4.5 for Zip64
+_VERSION = 20
+_VERSION_ZIP64 = 45
+# Made by Unix, so that the external attributes hold file permissions
+_MADE_BY = (3 << 8) | _VERSION_ZIP64
+_EXTERNAL_ATTR = (0o100644 & 0xFFFF) << 16
+
+_LOCAL_HEADER = struct.Struct("<IHHHHHIIIHH")
+_CENTRAL_HEADER = struct.Struct("<IHHHHHHIIIHHHHHII")
+_END_OF_CENTRAL_DIR = struct.Struct("<IHHHHIIH")
+_ZIP64_END_OF_CENTRAL_DIR = struct.Struct("<IQHHIIQQQQ")
+_ZIP64_LOCATOR = struct.Struct("<IIQI")
+
+
+def check_entry_name(name: str) -> str:
+    """
+    Validates an archive entry (or file) name: relative, "/"-separated and
+    without ".." components, so that it cannot land outside the destination.
+    """
+    path = PurePosixPath(name)
+    if not name or name.endswith("/") or "\\" in name:
+        raise ValueError(f"Invalid entry name '{name}'")
+    if path.is_absolute() or ".." in path.parts or ":" in path.parts[0]:
+        raise ValueError(f"Entry name '{name}' is outside the archive")
+    return name
+
+
+def _dos_datetime(timestamp: float) -> tuple[int, int]:
+    t = time.localtime(timestamp)
+    date = (max(t.tm_year, 1980) - 1980) << 9 | t.tm_mon << 5 | t.tm_mday
+    clock = t.tm_hour << 11 | t.tm_min << 5 | t.tm_sec // 2
+    return date, clock
+
+
+def _clamp(value: int, limit: int, sentinel: int) -> int:
+    return sentinel if value >= limit else value
+
+
+class ZipStreamWriter:
+    """
+    Writes a zip archive of stored (uncompressed) entries, one at a time,
+    in memory that does not grow with the number of entries.
+
+    `zipfile.ZipFile` keeps a `ZipInfo` for every entry until it writes the
+    central directory, hundreds of bytes each. Here entries are written with
+    their sizes and CRC in the local header, so the central directory is
+    rebuilt on `close` by reading those headers back from the file. Large
+    archives switch to Zip64 as needed.
+    """
+
+    def __init__(self, path: str | os.PathLike, timestamp: Optional[float] = None):
+        self.path = Path(path)
+        self._file = open(self.path, "wb")
+        self._date, self._time = _dos_datetime(
+            time.time() if timestamp is None else timestamp
+        )
+        self.entries = 0
+        self.bytes_written = 0
+
+    def write(self, name: str, data: bytes, crc: Optional[int] = None) -> None:
+        """Adds an entry; `crc` is the CRC-32 of `data`, if already computed."""
+        encoded_name = check_entry_name(name).encode("utf-8")
+        if crc is None:
+            crc = zlib.crc32(data)
+        size = len(data)
+
+        extra = b""
+        version = _VERSION
+        if size >= ZIP64_LIMIT:
+            extra = struct.pack("<HHQQ", 1, 16, size, size)
+            version = _VERSION_ZIP64
+        stored_size = _clamp(size, ZIP64_LIMIT, 0xFFFFFFFF)
+
+        header = _LOCAL_HEADER.pack(
+            0x04034B50,
+            version,
+            _UTF8_FLAG,
+            0,
+            self._time,
+            self._date,
+            crc,
+            stored_size,
+            stored_size,
+            len(encoded_name),
+            len(extra),
+        )
+        self._file.write(header)
+        self._file.write(encoded_name)
+        self._file.write(extra)
+        self._file.write(data)
+        self.entries += 1
+        self.bytes_written += len(header) + len(encoded_name) + len(extra) + size
+
+    def close(self) -> None:
+        if self._file.closed:
+            return
+        try:
+            self._write_central_directory()
+        finally:
+            self._file.close()
+
+    def _write_central_directory(self) -> None:
+        self._file.flush()
+        directory_offset = self.bytes_written
+        out = self._file
+
+        with open(self.path, "rb") as local:
+            for _ in range(self.entries):
+                offset = local.tell()
+                (
+                    _,
+                    _,
+                    flags,
+                    method,
+                    mtime,
+                    mdate,
+                    crc,
+                    compressed,
+                    size,
+                    name_len,
+                    extra_len,
+                ) = _LOCAL_HEADER.unpack(local.read(_LOCAL_HEADER.size))
+                name = local.read(name_len)
+                local_extra = local.read(extra_len)
+                if size == 0xFFFFFFFF:
+                    size, compressed = struct.unpack_from("<QQ", local_extra, 4)
+                local.seek(compressed, os.SEEK_CUR)
+
+                # Zip64 fields are only present for values that overflow
+                zip64 = [
+                    value
+                    for value in (size, compressed, offset)
+                    if value >= ZIP64_LIMIT
+                ]
+                extra = b""
+                if zip64:
+                    extra = struct.pack(f"<HH{len(zip64)}Q", 1, 8 * len(zip64), *zip64)
+                record = _CENTRAL_HEADER.pack(
+                    0x02014B50,
+                    _MADE_BY,
+                    _VERSION_ZIP64 if zip64 else _VERSION,
+                    flags,
+                    method,
+                    mtime,
+                    mdate,
+                    crc,
+                    _clamp(compressed, ZIP64_LIMIT, 0xFFFFFFFF),
+                    _clamp(size, ZIP64_LIMIT, 0xFFFFFFFF),
+                    len(name),
+                    len(extra),
+                    0,
+                    0,
+                    0,
+                    _EXTERNAL_ATTR,
+                    _clamp(offset, ZIP64_LIMIT, 0xFFFFFFFF),
+                )
+                out.write(record)
+                out.write(name)
+                out.write(extra)
+                self.bytes_written += len(record) + len(name) + len(extra)
+
+        directory_size = self.bytes_written - directory_offset
+        if (
+            self.entries >= ZIP_MAX_ENTRIES
+            or directory_size >= ZIP64_LIMIT
+            or directory_offset >= ZIP64_LIMIT
+        ):
+            zip64_offset = self.bytes_written
+            out.write(
+                _ZIP64_END_OF_CENTRAL_DIR.pack(
+                    0x06064B50,
+                    _ZIP64_END_OF_CENTRAL_DIR.size - 12,
+                    _MADE_BY,
+                    _VERSION_ZIP64,
+                    0,
+                    0,
+                    self.entries,
+                    self.entries,
+                    directory_size,
+                    directory_offset,
+                )
+            )
+            out.write(_ZIP64_LOCATOR.pack(0x07064B50, 0, zip64_offset, 1))
+            self.bytes_written += _ZIP64_END_OF_CENTRAL_DIR.size + _ZIP64_LOCATOR.size
+
+        entries = _clamp(self.entries, ZIP_MAX_ENTRIES, 0xFFFF)
+        out.write(
+            _END_OF_CENTRAL_DIR.pack(
+                0x06054B50,
+                0,
+                0,
+                entries,
+                entries,
+                _clamp(directory_size, ZIP64_LIMIT, 0xFFFFFFFF),
+                _clamp(directory_offset, ZIP64_LIMIT, 0xFFFFFFFF),
+                0,
+            )
+        )
+        self.bytes_written += _END_OF_CENTRAL_DIR.size
+
+    def __enter__(self) -> "ZipStreamWriter":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+class DirectoryWriter:
+    """Writes entries as files under a directory, with the zip writer's API."""
+
+    def __init__(self, path: str | os.PathLike):
+        self.path = Path(path)
+        self.path.mkdir(parents=True, exist_ok=True)
+        self.entries = 0
+        self.bytes_written = 0
+
+    def write(self, name: str, data: bytes, crc: Optional[int] = None) -> None:
+        target = self.path / check_entry_name(name)
+        if target.parent != self.path:
+            target.parent.mkdir(parents=True, exist_ok=True)
+        target.write_bytes(data)
+        self.entries += 1
+        self.bytes_written += len(data)
+
+    def close(self) -> None:
+        pass
+
+    def __enter__(self) -> "DirectoryWriter":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+def open_archive(path: str | os.PathLike) -> ZipStreamWriter | DirectoryWriter:
+    """A zip writer for a ``.zip`` path, otherwise a directory writer."""
+    if Path(path).suffix.lower() == ".zip":
+        return ZipStreamWriter(path)
+    return DirectoryWriter(path)
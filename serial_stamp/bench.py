@@ -0,0 +1,246 @@
+import itertools
+import os
+import platform
+import statistics
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from importlib import metadata
+from multiprocessing import get_context
+from pathlib import Path
+from typing import Any
+
+import tomli_w
+
+# Engine options that can be compared side by side, with their allowed values.
+# The first value of each is the default.
+OPTIONS: dict[str, tuple[str, ...]] = {
+    # Multi-page output container; the suffix selects Pillow's writer
+    "format": ("pdf", "tiff"),
+    # warm: spec cache and font registry are filled by an untimed run first
+    # cold: the spec is re-validated and fonts re-loaded on every run
+    "cache": ("warm", "cold"),
+    # PDF encoder threads, as generate --encoder-threads; auto is the default
+    # pool size, and any count (0 encodes on the rendering thread) is allowed
+    "encoder-threads": ("auto",),
+}
+
+# Options that also take any non-negative integer
+COUNT_OPTIONS = {"encoder-threads"}
+
+
+def parse_compare(values: list[str]) -> list[dict[str, str]]:
+    """
+    Expands ``KEY=V1,V2`` arguments into the list of option combinations to
+    run, e.g. ``["format=pdf,tiff", "cache=warm,cold"]`` gives four variants.
+    """
+    choices = {name: allowed[:1] for name, allowed in OPTIONS.items()}
+
+    for value in values:
+        name, sep, raw = value.partition("=")
+        name = name.strip()
+        if not sep or name not in OPTIONS:
+            raise ValueError(
+                f"Invalid comparison '{value}', expected KEY=V1,V2 with KEY one "
+                f"of: {', '.join(OPTIONS)}"
+            )
+        picked = tuple(v.strip() for v in raw.split(",") if v.strip())
+        unknown = [
+            v
+            for v in picked
+            if v not in OPTIONS[name] and not (name in COUNT_OPTIONS and v.isdigit())
+        ]
+        if not picked or unknown:
+            raise ValueError(
+                f"Invalid values for '{name}': {', '.join(unknown) or '(none)'}; "
+                f"allowed: {', '.join(OPTIONS[name])}"
+            )
+        choices[name] = picked
+
+    return [
+        dict(zip(choices, combination))
+        for combination in itertools.product(*choices.values())
+    ]
+
+
+def write_synthetic_project(
+    directory: Path,
+    tickets: int = 1000,
+    grid: tuple[int, int] = (3, 4),
+    texts: int = 3,
+    ticket_size: tuple[int, int] = (600, 250),
+) -> Path:
+    """
+    Writes a generated project (ticket image and spec) to `directory` and
+    returns the spec path. Tickets are numbered 1 to `tickets`, each with
+    `texts` lines of text.
+    """
+    from PIL import Image
+
+    directory.mkdir(parents=True, exist_ok=True)
+
+    # A gradient rather than a flat color, so encoders do realistic work
+    height = ticket_size[1]
+    image = Image.linear_gradient("L").resize(ticket_size).convert("RGB")
+    image.save(directory / "ticket.png")
+
+    spec = {
+        "source-image": "ticket.png",
+        "layout": {"grid-size": list(grid), "gap": 10, "margin": 20},
+        "texts": [
+            {
+                "template": f"No $no - line {i + 1}",
+                "position": [20, 20 + i * (height - 40) / max(texts, 1)],
+                "size": 24,
+            }
+            for i in range(texts)
+        ],
+        "params": [
+            {
+                "name": "no",
+                "type": "int",
+                "min": 1,
+                "max": tickets,
+                "leading-zeros": len(str(tickets)),
+            }
+        ],
+    }
+    spec_path = directory / "spec.toml"
+    spec_path.write_bytes(tomli_w.dumps(spec).encode("utf-8"))
+    return spec_path
+
+
+def _run_once(
+    spec_path: Path,
+    work_dir: Path,
+    output: Path,
+    use_cache: bool,
+    encoder_threads: int | None,
+):
+    from PIL import Image
+
+    from serial_stamp.engine import Engine
+    from serial_stamp.spec_cache import load_spec
+
+    page_count = 0
+
+    def on_page(page_no: int, total: int):
+        nonlocal page_count
+        page_count = total
+
+    start = time.perf_counter()
+    spec = load_spec(spec_path, use_cache=use_cache)
+    loaded = time.perf_counter()
+
+    with Image.open(work_dir / spec.source_image) as source_image:
+        source_image.load()
+        engine = Engine(
+            spec, output, source_image, work_dir, encoder_threads=encoder_threads
+        )
+        plan = engine.compile_plan()
+        prepared = time.perf_counter()
+
+        engine.generate(on_page, plan=plan)
+        done = time.perf_counter()
+
+        tickets = engine._calculate_total_tickets()
+        threads, _ = engine.pipeline_shape()
+
+    return {
+        "tickets": tickets,
+        "pages": page_count,
+        "encoder_threads": threads,
+        "output_bytes": output.stat().st_size if output.exists() else 0,
+        "seconds": {
+            "load_spec": loaded - start,
+            "prepare": prepared - loaded,
+            "generate": done - prepared,
+            "total": done - start,
+        },
+    }
+
+
+def run_variant(
+    spec_path: Path, work_dir: Path, options: dict[str, str], repeat: int = 1
+) -> dict[str, Any]:
+    """
+    Runs the full pipeline (spec load, template preparation, render, encode and
+    write) `repeat` times with the given options and returns median timings.
+    """
+    from serial_stamp.fonts import registry
+    from serial_stamp.memory import peak_rss_bytes
+
+    warm = options["cache"] == "warm"
+    jobs = options["encoder-threads"]
+    encoder_threads = None if jobs == "auto" else int(jobs)
+
+    with tempfile.TemporaryDirectory(prefix="serial_stamp_bench_") as tmp:
+        output = Path(tmp) / f"bench.{options['format']}"
+
+        if warm:
+            _run_once(spec_path, work_dir, output, True, encoder_threads)
+
+        runs = []
+        for _ in range(repeat):
+            if not warm:
+                registry.clear()
+            runs.append(_run_once(spec_path, work_dir, output, warm, encoder_threads))
+
+    seconds = {
+        stage: statistics.median(run["seconds"][stage] for run in runs)
+        for stage in runs[0]["seconds"]
+    }
+    tickets, pages = runs[0]["tickets"], runs[0]["pages"]
+    output_bytes = runs[0]["output_bytes"]
+    total = seconds["total"]
+
+    return {
+        "options": options,
+        "repeat": repeat,
+        "tickets": tickets,
+        "pages": pages,
+        "encoder_threads": runs[0]["encoder_threads"],
+        "seconds": seconds,
+        "tickets_per_second": tickets / total if total else None,
+        "pages_per_second": pages / total if total else None,
+        "output_bytes": output_bytes,
+        "bytes_per_page": output_bytes / pages if pages else None,
+        "peak_rss_bytes": peak_rss_bytes(),
+    }
+
+
+def run_benchmark(
+    spec_path: Path,
+    work_dir: Path,
+    variants: list[dict[str, str]],
+    repeat: int = 1,
+    isolate: bool = True,
+) -> dict[str, Any]:
+    """
+    Runs every variant and returns the report. With `isolate`, each variant
+    runs in a fresh process, so that peak RSS and cold caches are measured per
+    variant rather than accumulated across them.
+    """
+    results = []
+    for options in variants:
+        if isolate:
+            with ProcessPoolExecutor(1, mp_context=get_context("spawn")) as pool:
+                future = pool.submit(run_variant, spec_path, work_dir, options, repeat)
+                results.append(future.result())
+        else:
+            results.append(run_variant(spec_path, work_dir, options, repeat))
+
+    try:
+        version = metadata.version("serial-stamp")
+    except metadata.PackageNotFoundError:
+        version = "unknown"
+
+    return {
+        "spec": str(spec_path),
+        "serial_stamp": version,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "isolated": isolate,
+        "variants": results,
+    }
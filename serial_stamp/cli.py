@@ -1,26 +1,42 @@
 import argparse
+import contextlib
 import sys
-import tomllib
+import tempfile
 from pathlib import Path
 
-from PIL import Image
+# Heavy modules (Pillow, pydantic, the engine) are imported inside the handlers
+# that need them, so `init`, `pack` and `--help` start fast. This matters since
+# the desktop app runs the CLI once per action; tests/test_cli.py guards it.
 
-from serial_stamp.engine import Engine
-from serial_stamp.models import Spec
-from serial_stamp.project import Project, init_project, pack_project
+# Selected tickets listed by `reprint` before rendering
+REPRINT_LISTED_TICKETS = 20
+
+# `generate` options that override the spec's [output] settings of the same name
+OUTPUT_OPTIONS = (
+    "dpi",
+    "codec",
+    "quality",
+    "subsampling",
+    "compress_level",
+    "color",
+    "overlay_only",
+)
 
 
 def preview_handler(args):
+    from PIL import Image
+
+    from serial_stamp.engine import Engine
+    from serial_stamp.project import Project
+    from serial_stamp.spec_cache import load_spec
+
     try:
         with Project(args.input) as project:
             if not project.spec_path.exists():
                 print(f"Error: Spec file not found at {project.spec_path}")
                 sys.exit(1)
 
-            with open(project.spec_path, "rb") as f:
-                data = tomllib.load(f)
-
-            spec = Spec(**data)
+            spec = load_spec(project.spec_path, use_cache=not args.no_cache)
 
             # Resolve source image path relative to the project working directory
             img_path = project.work_dir / spec.source_image
@@ -32,7 +48,7 @@ def preview_handler(args):
             output_path = Path(args.output).resolve()
 
             with Image.open(img_path) as source_image:
-                app = Engine(spec, output_path, source_image)
+                app = Engine(spec, output_path, source_image, project.work_dir)
                 preview = app.generate_preview()
                 preview.save(output_path)
 
@@ -44,6 +60,29 @@ def preview_handler(args):
 
 
 def generate_handler(args):
+    from PIL import Image
+
+    from serial_stamp.engine import Engine
+    from serial_stamp.project import Project
+    from serial_stamp.spec_cache import load_spec
+
+    # Extra outputs rendered in the same pass as the pages, by label
+    extra_outputs = {
+        label: path
+        for label, path in (
+            ("per-ticket images", args.per_ticket),
+            ("page rasters", args.rasters),
+            ("manifest", args.manifest),
+        )
+        if path is not None
+    }
+    if args.output is None and (not extra_outputs or args.dry_run):
+        print(
+            "Error: Give an output file with -o "
+            "(or --per-ticket, --rasters or --manifest)"
+        )
+        sys.exit(1)
+
     try:
         with Project(args.input) as project:
             print(f"Loaded project from: {project.root_path}")
@@ -53,10 +92,7 @@ def generate_handler(args):
                 print(f"Error: Spec file not found at {project.spec_path}")
                 sys.exit(1)
 
-            with open(project.spec_path, "rb") as f:
-                data = tomllib.load(f)
-
-            spec = Spec(**data)
+            spec = load_spec(project.spec_path, use_cache=not args.no_cache)
 
             # Resolve source image path relative to the project working directory
             img_path = project.work_dir / spec.source_image
@@ -67,18 +103,280 @@ def generate_handler(args):
 
             print(f"Source image: {img_path}")
 
+            # Encoding options given on the command line override [output]
+            overrides = {
+                name: getattr(args, name)
+                for name in OUTPUT_OPTIONS
+                if getattr(args, name) is not None
+            }
+            if overrides:
+                output = type(spec.output).model_validate(
+                    {**spec.output.model_dump(), **overrides}
+                )
+                spec = spec.model_copy(update={"output": output})
+
+            output_path = None
+            if args.output is not None:
+                output_path = Path(args.output).resolve()
+
+            sinks: list = []
+            if args.per_ticket is not None:
+                from serial_stamp.export import TicketArchiveSink
+
+                sinks.append(TicketArchiveSink(args.per_ticket, args.name_template))
+            if args.rasters is not None:
+                from serial_stamp.sinks import RasterSink
+
+                sinks.append(RasterSink(args.rasters))
+            if args.manifest is not None:
+                from serial_stamp.sinks import ManifestSink
+
+                # Name the per-ticket images, if there are any
+                names = args.name_template if args.per_ticket is not None else None
+                sinks.append(ManifestSink(args.manifest, names))
+
+            max_memory = None
+            if args.max_memory:
+                from serial_stamp.memory import parse_size
+
+                max_memory = parse_size(args.max_memory)
+
+            metrics = None
+            if args.metrics_file:
+                from serial_stamp.metrics import Metrics
+
+                metrics = Metrics()
+
+            progress = None
+            if args.progress == "text":
+                from serial_stamp.progress import text_progress
+
+                progress = text_progress()
+            elif args.progress == "jsonl":
+                from serial_stamp.progress import jsonl_progress
+
+                progress = jsonl_progress()
+
+            profiler = None
+            if args.profile:
+                from serial_stamp.profiling import SamplingProfiler
+
+                profiler = SamplingProfiler()
+                profiler.start()
+
+            try:
+                with Image.open(img_path) as source_image:
+                    app = Engine(
+                        spec,
+                        # Runs with only extra outputs write no output file
+                        output_path or project.work_dir,
+                        source_image,
+                        project.work_dir,
+                        metrics=metrics,
+                        max_memory=max_memory,
+                        encoder_threads=args.encoder_threads,
+                    )
+                    if args.dry_run:
+                        from serial_stamp.estimate import estimate_run
+
+                        estimate = estimate_run(app, args.calibration_pages)
+                    elif output_path is not None:
+                        summary = app.generate(on_progress=progress, sinks=sinks)
+                    else:
+                        summary = app.generate_sinks(sinks, on_progress=progress)
+            finally:
+                if profiler is not None:
+                    profiler.stop()
+
+            if args.dry_run:
+                print(f"Dry run, {output_path} was not written")
+                print(estimate.describe())
+                peak = estimate.peak_rss_bytes
+                if max_memory is not None and peak is not None and peak > max_memory:
+                    print("[warn] Estimated peak memory exceeds --max-memory")
+            else:
+                if output_path is not None:
+                    print(f"Successfully generated: {output_path}")
+                for label, path in extra_outputs.items():
+                    print(f"Wrote {label} to: {Path(path).resolve()}")
+            if not args.dry_run and summary is not None:
+                print(f"Summary: {summary.describe()}")
+                budget = summary.memory_budget
+                peak = summary.peak_rss_bytes
+                if budget is not None and peak is not None and peak > budget.limit:
+                    print("[warn] Peak memory exceeded --max-memory")
+
+            if metrics is not None:
+                metrics.write(Path(args.metrics_file))
+                print(f"Wrote metrics to: {args.metrics_file}")
+
+            if profiler is not None:
+                profiler.write_folded(Path(args.profile))
+                print(profiler.summary(args.profile_top))
+                print(f"Wrote profile to: {args.profile}")
+
+    except Exception as e:
+        print(f"Error during generation: {e}")
+        sys.exit(1)
+
+
+def reprint_handler(args):
+    from PIL import Image
+
+    from serial_stamp.engine import Engine
+    from serial_stamp.project import Project
+    from serial_stamp.reprint import (
+        find_tickets,
+        parse_tickets,
+        reprint_pages,
+        reprint_tickets,
+    )
+    from serial_stamp.spec_cache import load_spec
+
+    try:
+        with Project(args.input) as project:
+            if not project.spec_path.exists():
+                print(f"Error: Spec file not found at {project.spec_path}")
+                sys.exit(1)
+
+            spec = load_spec(project.spec_path, use_cache=not args.no_cache)
+            img_path = project.work_dir / spec.source_image
+            if not img_path.exists():
+                print(f"Error: Source image not found at {img_path}")
+                sys.exit(1)
+
             output_path = Path(args.output).resolve()
+            progress = None
+            if args.progress == "text":
+                from serial_stamp.progress import text_progress
+
+                progress = text_progress()
 
             with Image.open(img_path) as source_image:
-                app = Engine(spec, output_path, source_image)
-                app.generate()
+                app = Engine(spec, output_path, source_image, project.work_dir)
+                indices = find_tickets(
+                    app, parse_tickets(args.tickets), args.by, args.manifest
+                )
+                if not indices:
+                    print("Error: No tickets match the selection")
+                    sys.exit(1)
+
+                layout = app.page_layout()
+                print(f"Selected {len(indices)} tickets:")
+                for index in indices[:REPRINT_LISTED_TICKETS]:
+                    page, slot = layout.position(index)
+                    stack = page // layout.stack_size
+                    print(
+                        f"  ticket {index + 1}: page {page + 1}, slot {slot + 1}, "
+                        f"stack {stack + 1}"
+                    )
+                if len(indices) > REPRINT_LISTED_TICKETS:
+                    print(f"  ... and {len(indices) - REPRINT_LISTED_TICKETS} more")
+
+                if args.singles:
+                    summary = reprint_tickets(app, indices, progress)
+                else:
+                    summary = reprint_pages(app, indices, progress)
 
             print(f"Successfully generated: {output_path}")
+            if summary is not None:
+                print(f"Summary: {summary.describe()}")
 
     except Exception as e:
-        print(f"Error during generation: {e}")
+        print(f"Error during reprint: {e}")
+        sys.exit(1)
+
+
+def serve_handler(args):
+    from serial_stamp.serve import RenderServer, RenderService
+
+    with contextlib.ExitStack() as stack:
+        if args.data_dir is not None:
+            data_dir = Path(args.data_dir)
+        else:
+            data_dir = Path(
+                stack.enter_context(tempfile.TemporaryDirectory(prefix="serial_stamp_"))
+            )
+        service = RenderService(data_dir, args.workers, use_cache=not args.no_cache)
+        stack.callback(service.close)
+        try:
+            server = RenderServer((args.host, args.port), service)
+        except OSError as e:
+            print(f"Error starting server: {e}")
+            sys.exit(1)
+        stack.callback(server.server_close)
+
+        print(
+            f"Serving on http://{args.host}:{server.server_port} (data in {data_dir})"
+        )
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            print("Stopping; waiting for running jobs")
+
+
+def bench_handler(args):
+    import json
+
+    from serial_stamp.bench import (
+        parse_compare,
+        run_benchmark,
+        write_synthetic_project,
+    )
+    from serial_stamp.project import Project
+
+    if (args.input is None) == (not args.synthetic):
+        print("Error: Give either a project to benchmark or --synthetic")
         sys.exit(1)
 
+    try:
+        variants = parse_compare(args.compare)
+
+        with contextlib.ExitStack() as stack:
+            if args.synthetic:
+                columns, _, rows = args.grid.partition("x")
+                tmp = stack.enter_context(
+                    tempfile.TemporaryDirectory(prefix="serial_stamp_bench_")
+                )
+                spec_path = write_synthetic_project(
+                    Path(tmp),
+                    tickets=args.tickets,
+                    grid=(int(columns), int(rows)),
+                    texts=args.texts,
+                )
+                work_dir = Path(tmp)
+            else:
+                project = stack.enter_context(Project(args.input))
+                if not project.spec_path.exists():
+                    print(f"Error: Spec file not found at {project.spec_path}")
+                    sys.exit(1)
+                spec_path, work_dir = project.spec_path, project.work_dir.resolve()
+
+            report = run_benchmark(
+                spec_path,
+                work_dir,
+                variants,
+                repeat=args.repeat,
+                isolate=not args.no_isolate,
+            )
+
+    except Exception as e:
+        print(f"Error during benchmark: {e}")
+        sys.exit(1)
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        Path(args.output).write_text(output + "\n")
+        for variant in report["variants"]:
+            options = ", ".join(f"{k}={v}" for k, v in variant["options"].items())
+            print(
+                f"{options}: {variant['tickets_per_second']:.1f} tickets/s, "
+                f"{variant['pages_per_second']:.2f} pages/s"
+            )
+        print(f"Wrote benchmark results to: {args.output}")
+    else:
+        print(output)
+
 
 def main():
     parser = argparse.ArgumentParser(
@@ -105,9 +403,196 @@ def main():
     parser_gen.add_argument(
         "input", help="Input .stamp file, .toml file, or project directory"
     )
+    parser_gen.add_argument("-o", "--output", help="Output PDF file path")
+    parser_gen.add_argument(
+        "--per-ticket",
+        metavar="PATH",
+        help="Also (or only) export one image per ticket, into a .zip archive or "
+        "a directory; all outputs share one rendering pass",
+    )
+    parser_gen.add_argument(
+        "--name-template",
+        default="ticket-$index.png",
+        metavar="TEMPLATE",
+        help="Names of --per-ticket images, from ticket variables and $index; "
+        "the suffix sets the format (default: ticket-$index.png)",
+    )
+    parser_gen.add_argument(
+        "--rasters",
+        metavar="DIR",
+        help="Also (or only) write every page as an uncompressed TIFF into DIR",
+    )
     parser_gen.add_argument(
+        "--manifest",
+        metavar="PATH",
+        help="Also (or only) list every ticket with its page, slot and values, "
+        "as .csv, .json, .jsonl or an indexed .sqlite database",
+    )
+    parser_gen.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Always re-parse and re-validate the spec file",
+    )
+    parser_gen.add_argument(
+        "--dpi", type=float, help="Page resolution (default: 100, or [output] dpi)"
+    )
+    parser_gen.add_argument(
+        "--codec",
+        choices=["jpeg", "flate", "auto"],
+        help="Page compression: lossy JPEG, lossless flate, or auto to pick per "
+        "page by content",
+    )
+    parser_gen.add_argument(
+        "--quality", type=int, help="JPEG quality, 1-100 (default: 75)"
+    )
+    parser_gen.add_argument(
+        "--subsampling",
+        choices=["4:4:4", "4:2:2", "4:2:0"],
+        help="JPEG chroma subsampling (default: 4:2:0)",
+    )
+    parser_gen.add_argument(
+        "--compress-level",
+        type=int,
+        help="Flate compression level, 0-9 (default: 6)",
+    )
+    parser_gen.add_argument(
+        "--color",
+        choices=["rgb", "gray", "bw"],
+        help="Page color: full color, grayscale, or 1-bit black and white",
+    )
+    parser_gen.add_argument(
+        "--overlay-only",
+        action="store_true",
+        default=None,
+        help="Render only the variable text at each slot, without the ticket "
+        "artwork, for printing onto pre-printed stock",
+    )
+    parser_gen.add_argument(
+        "--dry-run",
+        action="store_true",
+        help="Estimate time, output size and peak memory from a few calibration "
+        "pages instead of generating",
+    )
+    parser_gen.add_argument(
+        "--calibration-pages",
+        type=int,
+        default=3,
+        metavar="N",
+        help="Pages rendered and encoded by --dry-run (default: 3)",
+    )
+    parser_gen.add_argument(
+        "--metrics-file",
+        metavar="PATH",
+        help="Write stage timings and counters to PATH (JSON for a .json path, "
+        "OpenMetrics text otherwise)",
+    )
+    parser_gen.add_argument(
+        "--max-memory",
+        metavar="SIZE",
+        help="Memory limit, e.g. 512M or 2G; generation fails early if pages "
+        "cannot fit in it",
+    )
+    parser_gen.add_argument(
+        "--encoder-threads",
+        type=int,
+        metavar="N",
+        help="Threads compressing PDF pages while the next ones are rendered "
+        "(default: up to 4, by CPU count; 0 to render and encode in turn)",
+    )
+    parser_gen.add_argument(
+        "--progress",
+        choices=["text", "jsonl", "none"],
+        default="text",
+        help="Progress reporting: human-readable lines on stdout (default), "
+        "one JSON event per line on stderr, or none",
+    )
+    parser_gen.add_argument(
+        "--profile",
+        metavar="PATH",
+        help="Profile generation and write collapsed stacks (for flamegraph "
+        "tools) to PATH",
+    )
+    parser_gen.add_argument(
+        "--profile-top",
+        type=int,
+        default=20,
+        metavar="N",
+        help="Number of functions in the printed profile summary (default: 20)",
+    )
+
+    # --- REPRINT ---
+    parser_reprint = subparsers.add_parser(
+        "reprint", help="Render only the pages (or tickets) holding some tickets"
+    )
+    parser_reprint.add_argument(
+        "input", help="Input .stamp file, .toml file, or project directory"
+    )
+    parser_reprint.add_argument(
+        "--tickets",
+        required=True,
+        help="Tickets to reprint, e.g. 1234,1300-1310: ticket numbers, or "
+        "values of the --by variable",
+    )
+    parser_reprint.add_argument(
+        "--by",
+        metavar="NAME",
+        help="Select tickets by the value of this variable instead of by number",
+    )
+    parser_reprint.add_argument(
+        "--manifest",
+        metavar="PATH",
+        help="SQLite manifest written by generate --manifest, to look --by "
+        "values up in instead of reading every ticket",
+    )
+    parser_reprint.add_argument(
+        "--singles",
+        action="store_true",
+        help="Render just the selected tickets on fresh pages, instead of the "
+        "whole pages they were printed on",
+    )
+    parser_reprint.add_argument(
         "-o", "--output", required=True, help="Output PDF file path"
     )
+    parser_reprint.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Always re-parse and re-validate the spec file",
+    )
+    parser_reprint.add_argument(
+        "--progress",
+        choices=["text", "none"],
+        default="text",
+        help="Progress reporting on stdout (default: text)",
+    )
+
+    # --- SERVE ---
+    parser_serve = subparsers.add_parser(
+        "serve", help="Run a local HTTP service queueing generate jobs"
+    )
+    parser_serve.add_argument(
+        "--host", default="127.0.0.1", help="Address to listen on (default: 127.0.0.1)"
+    )
+    parser_serve.add_argument(
+        "--port", type=int, default=8080, help="Port to listen on (default: 8080)"
+    )
+    parser_serve.add_argument(
+        "--workers",
+        type=int,
+        default=2,
+        metavar="N",
+        help="Jobs generated at the same time (default: 2)",
+    )
+    parser_serve.add_argument(
+        "--data-dir",
+        metavar="PATH",
+        help="Directory for outputs, uploads and extracted projects (default: a "
+        "temporary directory, removed on exit)",
+    )
+    parser_serve.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Always re-parse and re-validate spec files",
+    )
 
     # --- PREVIEW ---
     parser_prev = subparsers.add_parser("preview", help="Generate a preview image")
@@ -117,6 +602,65 @@ def main():
     parser_prev.add_argument(
         "-o", "--output", required=True, help="Output PNG file path"
     )
+    parser_prev.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Always re-parse and re-validate the spec file",
+    )
+
+    # --- BENCH ---
+    parser_bench = subparsers.add_parser(
+        "bench", help="Measure end-to-end generation throughput"
+    )
+    parser_bench.add_argument(
+        "input",
+        nargs="?",
+        help="Input .stamp file, .toml file, or project directory",
+    )
+    parser_bench.add_argument(
+        "--synthetic",
+        action="store_true",
+        help="Benchmark a generated project instead of an input",
+    )
+    parser_bench.add_argument(
+        "--tickets",
+        type=int,
+        default=1000,
+        help="Number of tickets of the synthetic project (default: 1000)",
+    )
+    parser_bench.add_argument(
+        "--grid",
+        default="3x4",
+        help="Grid size of the synthetic project, as COLUMNSxROWS (default: 3x4)",
+    )
+    parser_bench.add_argument(
+        "--texts",
+        type=int,
+        default=3,
+        help="Texts per ticket of the synthetic project (default: 3)",
+    )
+    parser_bench.add_argument(
+        "--compare",
+        action="append",
+        default=[],
+        metavar="KEY=V1,V2",
+        help="Run once per value of an option: format=pdf,tiff, cache=warm,cold "
+        "or encoder-threads=auto,0,4 (repeatable; all combinations are run)",
+    )
+    parser_bench.add_argument(
+        "--repeat",
+        type=int,
+        default=1,
+        help="Timed runs per variant; median timings are reported (default: 1)",
+    )
+    parser_bench.add_argument(
+        "-o", "--output", help="Write the JSON report to a file instead of stdout"
+    )
+    parser_bench.add_argument(
+        "--no-isolate",
+        action="store_true",
+        help="Run all variants in this process (peak RSS then accumulates)",
+    )
 
     # Default to 'generate' if the first argument doesn't match a subcommand
     if len(sys.argv) > 1 and sys.argv[1] not in [
@@ -124,6 +668,9 @@ def main():
         "pack",
         "generate",
         "preview",
+        "bench",
+        "reprint",
+        "serve",
         "-h",
         "--help",
     ]:
@@ -137,6 +684,8 @@ def main():
     args = parser.parse_args()
 
     if args.command == "init":
+        from serial_stamp.project import init_project
+
         try:
             init_project(args.path)
             print(f"Initialized new project at: {args.path}")
@@ -145,6 +694,8 @@ def main():
             sys.exit(1)
 
     elif args.command == "pack":
+        from serial_stamp.project import pack_project
+
         try:
             pack_project(args.source, args.output)
             print(f"Packed '{args.source}' to '{args.output}'")
@@ -158,6 +709,15 @@ def main():
     elif args.command == "preview":
         preview_handler(args)
 
+    elif args.command == "bench":
+        bench_handler(args)
+
+    elif args.command == "reprint":
+        reprint_handler(args)
+
+    elif args.command == "serve":
+        serve_handler(args)
+
     else:
         parser.print_help()
 
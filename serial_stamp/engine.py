@@ -1,13 +1,175 @@
+import asyncio
+import io
+import threading
+import time
+from concurrent.futures import Executor
+from contextlib import contextmanager, suppress
 from dataclasses import dataclass
-from functools import reduce
+from functools import partial, reduce
 from itertools import islice
 from pathlib import Path
-from typing import Any, Callable, Optional
+from typing import (
+    IO,
+    Any,
+    AsyncGenerator,
+    Callable,
+    Generator,
+    Iterable,
+    Iterator,
+    Optional,
+    Sequence,
+)
 
-from PIL import Image, ImageDraw
+from PIL import Image
 
-from serial_stamp.models import Spec
-from serial_stamp.utils import cartesian_product, replace_vars
+from serial_stamp.fonts import registry as font_registry
+from serial_stamp.memory import (
+    MAX_PAGES_IN_FLIGHT,
+    MemoryBudget,
+    format_size,
+    peak_rss_bytes,
+)
+from serial_stamp.metrics import Metrics, TimedFile
+from serial_stamp.models import Spec, TableSource
+from serial_stamp.pdf import EncodedPage, encode_page, write_pdf
+from serial_stamp.pipeline import default_encoder_threads, encode_ordered
+from serial_stamp.plan import OnTicket, RenderPlan, resolve_color
+from serial_stamp.progress import (
+    ProgressCallback,
+    ProgressEvent,
+    ProgressReporter,
+    current_rss_bytes,
+)
+from serial_stamp.sinks import RenderedTicket, Sink
+from serial_stamp.utils import FormattedInts, cartesian_product
+
+
+class PageSequence(Image.Image):
+    """
+    Multi-frame image whose frames (pages) are rendered on demand.
+
+    Pillow's multi-page writers (PDF, TIFF) seek through the frames of a
+    ``save_all`` image one at a time and encode each before moving on, so
+    saving this instead of a list of pages keeps a single page in memory.
+    Frames must be requested in order; the first one is kept since writers
+    seek back to it when done.
+    """
+
+    def __init__(self, render: Callable[[int], Image.Image], page_count: int):
+        super().__init__()
+        self._render = render
+        self.n_frames = page_count
+        self.is_animated = page_count > 1
+        self._frame = -1
+        self._first: Optional[Image.Image] = None
+        self.seek(0)
+
+    def _show(self, page: Image.Image, frame: int):
+        self.im = page.im
+        self._mode = page.mode
+        self._size = page.size
+        self._frame = frame
+
+    def seek(self, frame: int):
+        if not 0 <= frame < self.n_frames:
+            raise EOFError("No more pages")
+        if frame == self._frame:
+            return
+        if frame == 0 and self._first is not None:
+            self._show(self._first, 0)
+            return
+
+        page = self._render(frame)
+        if frame == 0:
+            self._first = page
+        self._show(page, frame)
+
+    def tell(self) -> int:
+        return self._frame
+
+
+# Lookup table turning grayscale pages into 1-bit black and white
+_BW_THRESHOLD = [0] * 128 + [255] * 128
+
+
+@dataclass(frozen=True, slots=True)
+class PageLayout:
+    """How a run's tickets are spread over pages and stacks."""
+
+    tickets: int
+    tickets_per_page: int
+    stack_size: int
+    stacks: int
+    pages: int
+
+    def page_tickets(self, page: int) -> range:
+        """
+        The 0-based indices of the tickets on `page`, in slot order: a stack
+        is cut into piles, so a page holds every stack_size-th ticket of it.
+        """
+        stack, page_offset = divmod(page, self.stack_size)
+        stack_len = self.stack_size * self.tickets_per_page
+        first = stack * stack_len
+        end = min(first + stack_len, self.tickets)
+        return range(first + page_offset, max(end, first), self.stack_size)
+
+    def tickets_on_page(self, page: int) -> int:
+        return len(self.page_tickets(page))
+
+    def check_pages(self, pages: Iterable[int]) -> None:
+        if any(not 0 <= page < self.pages for page in pages):
+            raise ValueError(f"Pages must be within the {self.pages} pages")
+
+    def ticket_at(self, page: int, slot: int) -> Optional[int]:
+        """The index of the ticket at `slot` of `page`, None if it is empty."""
+        tickets = self.page_tickets(page)
+        return tickets[slot] if 0 <= slot < len(tickets) else None
+
+    def position(self, index: int) -> tuple[int, int]:
+        """The 0-based page and grid slot of ticket `index` (0-based)."""
+        stack_len = self.stack_size * self.tickets_per_page
+        stack, offset = divmod(index, stack_len)
+        return stack * self.stack_size + offset % self.stack_size, (
+            offset // self.stack_size
+        )
+
+
+class GenerationCancelled(Exception):
+    """Raised by a run whose `cancel` event was set, before its next page."""
+
+
+@dataclass(frozen=True, slots=True)
+class RenderedPage:
+    """A page yielded by `Engine.iter_pages_async`, in the output color."""
+
+    # 0-based position in the run
+    index: int
+    image: Image.Image
+    tickets: int
+
+
+@dataclass(frozen=True, slots=True)
+class GenerationSummary:
+    tickets: int
+    pages: int
+    bytes_written: int
+    elapsed_seconds: float
+    # Peak resident memory of the process, if the platform reports it
+    peak_rss_bytes: Optional[int]
+    memory_budget: Optional[MemoryBudget] = None
+
+    def describe(self) -> str:
+        # Per-ticket exports have no pages
+        pages = f" on {self.pages} pages" if self.pages else ""
+        text = (
+            f"{self.tickets} tickets{pages} "
+            f"({format_size(self.bytes_written)}) in {self.elapsed_seconds:.1f}s"
+        )
+        if self.peak_rss_bytes is not None:
+            text += f", peak memory {format_size(self.peak_rss_bytes)}"
+            if self.memory_budget is not None:
+                text += f" of {format_size(self.memory_budget.limit)}"
+        return text
 
 
 @dataclass
@@ -15,6 +177,15 @@ class Engine:
     spec: Spec
     output: Path
     source_image: Image.Image
+    # Directory that relative paths in the spec (tables, fonts) resolve from
+    work_dir: Path = Path(".")
+    # Stage timings and counters are only collected when set
+    metrics: Optional[Metrics] = None
+    # Memory limit in bytes; the engine fails early if pages cannot fit in it
+    max_memory: Optional[int] = None
+    # Threads compressing PDF pages while the next ones are rendered (None for
+    # a default based on the CPU count); 0 renders and encodes in turn
+    encoder_threads: Optional[int] = None
 
     def _create_template(self) -> Image.Image:
         template = Image.new(
@@ -28,11 +199,16 @@ class Engine:
         )
         return template
 
+    def compile_plan(self) -> RenderPlan:
+        return RenderPlan.compile(self.spec, self._create_template(), self.work_dir)
+
     def _get_items_iterator(self):
         if self.spec.params is not None:
             return cartesian_product(
                 *(param.get_values() for param in self.spec.params)
             )
+        elif isinstance(self.spec.table, TableSource):
+            return self.spec.table.iter_rows(self.work_dir)
         elif self.spec.table is not None:
             return iter(self.spec.table)
         return iter([])
@@ -42,112 +218,650 @@ class Engine:
             return reduce(
                 lambda x, y: x * y, map(lambda p: p.value_count, self.spec.params)
             )
+        elif isinstance(self.spec.table, TableSource):
+            return self.spec.table.count_rows(self.work_dir)
         elif self.spec.table is not None:
             return len(self.spec.table)
         return 0
 
+    def page_layout(self) -> PageLayout:
+        tickets = self._calculate_total_tickets()
+        tickets_per_page = self.spec.layout.grid_area
+        stack_size = self.spec.stack_size
+
+        if tickets_per_page == 0:
+            return PageLayout(tickets, 0, stack_size, 0, 0)
+
+        min_page_count = (tickets - 1) // tickets_per_page + 1
+        stacks = (min_page_count - 1) // stack_size + 1
+        return PageLayout(
+            tickets, tickets_per_page, stack_size, stacks, stacks * stack_size
+        )
+
+    def _iter_items(self, start: int = 0) -> Iterator[Any]:
+        """Ticket values from ticket `start` (0-based) on."""
+        if self.spec.params is not None:
+            return self._get_items_iterator().seek(start)
+        elif isinstance(self.spec.table, TableSource):
+            return self.spec.table.iter_rows(self.work_dir, start)
+        return islice(self._get_items_iterator(), start, None)
+
+    @contextmanager
+    def _ticket_source(
+        self, layout: Optional[PageLayout] = None
+    ) -> Iterator[Callable[[int], Any]]:
+        """
+        Access to ticket values by 0-based index, so that pages can be
+        rendered in any order without reading whole stacks: parameters are
+        computed, inline tables indexed and table files indexed once.
+
+        With a `layout`, pages must be rendered in order, and table files are
+        instead streamed a stack at a time, without an index.
+        """
+        if self.spec.params is not None:
+            yield self._get_items_iterator().at
+        elif isinstance(self.spec.table, TableSource):
+            if layout is not None:
+                stream = self._iter_items()
+                try:
+                    yield self._stack_reader(stream, layout)
+                finally:
+                    # SQLite rows hold a connection until closed
+                    close = getattr(stream, "close", None)
+                    if close is not None:
+                        close()
+                return
+            with self.spec.table.index_rows(self.work_dir) as rows:
+                yield rows.__getitem__
+        else:
+            yield (self.spec.table or []).__getitem__
+
+    def _stack_reader(
+        self, rows: Iterator[Any], layout: PageLayout
+    ) -> Callable[[int], Any]:
+        """
+        Ticket values by index for pages rendered in order. A page only takes
+        tickets from its own stack, a contiguous range of the table, so one
+        stack of `rows` is kept at a time and the table is read sequentially.
+        """
+        stack_length = layout.stack_size * layout.tickets_per_page
+        start = 0
+        stack: list[Any] = []
+
+        def item_at(index: int) -> Any:
+            nonlocal start, stack
+            if index < start:
+                raise IndexError(f"Ticket {index} was in an earlier stack")
+            while index >= start + len(stack):
+                start += len(stack)
+                stack = list(islice(rows, stack_length))
+                if not stack:
+                    raise IndexError(f"Ticket {index} is past the end of the table")
+            return stack[index - start]
+
+        return item_at
+
+    def _iter_pages(
+        self,
+        plan: RenderPlan,
+        layout: PageLayout,
+        sinks: Sequence[Sink] = (),
+        pages: Optional[Iterable[int]] = None,
+        cancel: Optional[threading.Event] = None,
+    ) -> Generator[tuple[Image.Image, int], None, None]:
+        """
+        Renders pages in order, yielding each with its number of tickets, and
+        hands the tickets and pages to `sinks` as they are rendered. `pages`
+        (0-based, in any order) renders only those pages. Setting `cancel`
+        stops the run with `GenerationCancelled` before the next page.
+        """
+        metrics = self.metrics
+        page_sinks = [sink for sink in sinks if sink.wants_pages]
+        if pages is None:
+            pages = range(layout.pages)
+        # Whole runs stream their tickets; only reprints need random access
+        in_order = pages == range(layout.pages)
+
+        with self._ticket_source(layout if in_order else None) as item_at:
+            for page_index in pages:
+                if cancel is not None and cancel.is_set():
+                    raise GenerationCancelled("Generation was cancelled")
+                indices = layout.page_tickets(page_index)
+                if metrics is None:
+                    page_items = [item_at(index) for index in indices]
+                else:
+                    with metrics.time("items"):
+                        page_items = [item_at(index) for index in indices]
+
+                on_ticket = None
+                if sinks:
+                    on_ticket = self._ticket_feeder(
+                        plan, sinks, page_items, indices, page_index
+                    )
+                page = self._convert_page(
+                    plan.compose_page(page_items, metrics, on_ticket)
+                )
+                for sink in page_sinks:
+                    sink.page(page_index, page)
+                yield page, len(page_items)
+
+    def _ticket_feeder(
+        self,
+        plan: RenderPlan,
+        sinks: Sequence[Sink],
+        page_items: list[Any],
+        indices: range,
+        page_index: int,
+    ) -> OnTicket:
+        """The `compose_page` callback handing one page's tickets to `sinks`."""
+        with_images = any(sink.wants_ticket_images for sink in sinks)
+
+        def on_ticket(slot: int, image: Optional[Image.Image]):
+            item = page_items[slot]
+            if not with_images:
+                image = None
+            elif image is None:
+                # Overlay pages draw no tickets of their own
+                image = self._convert_page(self.generate_ticket(plan, item))
+            else:
+                image = self._convert_page(image)
+            ticket = RenderedTicket(
+                indices[slot],
+                page_index,
+                slot,
+                *plan._names_and_values(item),
+                image,
+            )
+            for sink in sinks:
+                sink.ticket(ticket)
+
+        return on_ticket
+
+    def _iter_tickets(
+        self, plan: RenderPlan, layout: PageLayout, sinks: Sequence[Sink]
+    ) -> Iterator[None]:
+        """
+        Hands every ticket to `sinks` without composing pages, yielding after
+        each one. Tickets are only drawn if a sink wants their images.
+        """
+        with_images = any(sink.wants_ticket_images for sink in sinks)
+        for index, item in enumerate(self._get_items_iterator()):
+            image = None
+            if with_images:
+                image = self._convert_page(self.generate_ticket(plan, item))
+            ticket = RenderedTicket(
+                index, *layout.position(index), *plan._names_and_values(item), image
+            )
+            for sink in sinks:
+                sink.ticket(ticket)
+            yield
+
     def generate_preview(self) -> Image.Image:
-        template = self._create_template()
-        items = self._get_items_iterator()
+        plan = self.compile_plan()
 
-        # We need enough items to fill the first page taking into account the stack stride
+        # The first page holds every stack_size-th ticket of the first stack;
+        # they are streamed rather than read and kept with the whole stack
         tickets_per_page = self.spec.layout.grid_area
-        count_needed = self.spec.stack_size * tickets_per_page
-        stack_items = list(islice(items, count_needed))
+        stack_size = self.spec.stack_size
+        page_items = list(
+            islice(self._iter_items(), 0, stack_size * tickets_per_page, stack_size)
+        )
 
-        if not stack_items:
-            stack_items = [{}] * count_needed
+        if not page_items:
+            page_items = [{}] * tickets_per_page
 
-        return self.print_page(template, 0, stack_items)
+        return plan.compose_page(page_items, self.metrics)
 
-    def generate(self, progress_callback: Optional[Callable[[int, int], None]] = None):
-        template = self._create_template()
-        items = self._get_items_iterator()
-        ticket_count = self._calculate_total_tickets()
+    def generate(
+        self,
+        progress_callback: Optional[Callable[[int, int], None]] = None,
+        plan: Optional[RenderPlan] = None,
+        on_progress: Optional[ProgressCallback] = None,
+        sinks: Sequence[Sink] = (),
+        pages: Optional[Sequence[int]] = None,
+        cancel: Optional[threading.Event] = None,
+    ) -> Optional[GenerationSummary]:
+        """
+        Renders every page and writes the output file, plus any extra `sinks`
+        fed from the same rendering pass. With `pages` (0-based, ascending),
+        only those pages are rendered, as for reprints. Setting `cancel` (from
+        another thread) stops the run with `GenerationCancelled`.
 
-        tickets_per_page = self.spec.layout.grid_area
+        Pages are rendered as the encoder asks for them, so memory use does not
+        grow with the page count. `on_progress` receives rate-limited
+        `ProgressEvent`s (tickets, pages, bytes written, throughput, ETA and
+        memory). `progress_callback` is the older per-page
+        ``(page_no, page_count)`` hook.
+        """
+        start = time.perf_counter()
+        plan, budget = self._prepare(plan)
+        layout = self.page_layout()
+        if pages is None:
+            pages = range(layout.pages)
+            ticket_count = layout.tickets
+        else:
+            layout.check_pages(pages)
+            ticket_count = sum(layout.tickets_on_page(page) for page in pages)
+        page_count = len(pages)
 
-        if tickets_per_page == 0:
-            return
+        if page_count == 0:
+            return None
 
-        min_page_count = (ticket_count - 1) // tickets_per_page + 1
-        stack_count = (min_page_count - 1) // self.spec.stack_size + 1
-        page_count = stack_count * self.spec.stack_size
+        reporter = None
+        if on_progress is not None:
+            reporter = ProgressReporter(on_progress, ticket_count, page_count)
 
-        images = []
+        with self._font_budget(budget), self._open_sinks(sinks, layout):
+            bytes_written = self._write_pages(
+                plan, layout, pages, budget, sinks, reporter, progress_callback, cancel
+            )
+        bytes_written += sum(sink.bytes_written for sink in sinks)
 
-        for stack_index in range(stack_count):
-            # stack_items = list(islice(items, self.spec.stack_size * tickets_per_page))
-            stack_items = list(islice(items, self.spec.stack_size * tickets_per_page))
-            for page_offset in range(self.spec.stack_size):
-                page_no = 1 + stack_index * self.spec.stack_size + page_offset
-                print(f"page {page_no}/{page_count}")
+        if reporter is not None:
+            reporter.finish()
 
-                if progress_callback:
-                    progress_callback(page_no, page_count)
+        return GenerationSummary(
+            tickets=ticket_count,
+            pages=page_count,
+            bytes_written=bytes_written,
+            elapsed_seconds=time.perf_counter() - start,
+            peak_rss_bytes=peak_rss_bytes(),
+            memory_budget=budget,
+        )
 
-                res = self.print_page(template, page_offset, stack_items)
-                images.append(res)
+    async def agenerate(
+        self,
+        on_progress: Optional[ProgressCallback] = None,
+        sinks: Sequence[Sink] = (),
+        pages: Optional[Sequence[int]] = None,
+        executor: Optional[Executor] = None,
+    ) -> Optional[GenerationSummary]:
+        """
+        `generate` for asyncio code. The run happens on `executor` (the loop's
+        default thread pool if None), so the event loop stays free, and
+        `on_progress` is called on the event loop. Cancelling the awaiting task
+        stops rendering before the next page. The partial output file is then
+        removed, once the run has stopped, and `CancelledError` is re-raised.
+        """
+        loop = asyncio.get_running_loop()
+        cancel = threading.Event()
+        forward = None
+        if on_progress is not None:
+            callback = on_progress
 
-        if not images:
-            return
+            def forward(event: ProgressEvent) -> None:
+                loop.call_soon_threadsafe(callback, event)
 
-        images[0].save(
-            self.output, resolution=100.0, save_all=True, append_images=images[1:]
+        run = partial(
+            self.generate, on_progress=forward, sinks=sinks, pages=pages, cancel=cancel
         )
+        future = loop.run_in_executor(executor, run)
+        try:
+            return await asyncio.shield(future)
+        except asyncio.CancelledError:
+            cancel.set()
+            # The worker thread cannot be interrupted: wait for it to stop
+            with suppress(Exception):
+                await future
+            self.output.unlink(missing_ok=True)
+            raise
 
-    def print_page(
+    async def iter_pages_async(
         self,
-        template: Image.Image,
-        page_offset: int,
-        stack_items: list[tuple[str, ...]] | list[dict[str, Any]],
-    ):
-        layout = self.spec.layout
-        width = int(
-            (template.width + layout.gap_x) * layout.grid_size[0]
-            - layout.gap_x
-            + layout.margin_right
-            + layout.margin_left
+        pages: Optional[Sequence[int]] = None,
+        ahead: int = 2,
+        executor: Optional[Executor] = None,
+    ) -> AsyncGenerator[RenderedPage, None]:
+        """
+        Renders pages on `executor` (the loop's default thread pool if None)
+        and yields them as they are ready, without writing any output.
+
+        At most `ahead` pages are rendered before the consumer takes them, so
+        a slow consumer holds rendering back instead of letting pages pile up.
+        Rendering stops when the iteration ends early or its task is cancelled
+        (use ``contextlib.aclosing`` to stop it as soon as a loop breaks).
+        """
+        loop = asyncio.get_running_loop()
+        queue: asyncio.Queue[Any] = asyncio.Queue()
+        window = threading.Semaphore(ahead)
+        cancel = threading.Event()
+        finished = object()
+
+        def post(item: Any) -> None:
+            # The loop may be gone if the consumer was abandoned
+            with suppress(RuntimeError):
+                loop.call_soon_threadsafe(queue.put_nowait, item)
+
+        def produce() -> None:
+            try:
+                plan, budget = self._prepare(None)
+                layout = self.page_layout()
+                selected = range(layout.pages) if pages is None else pages
+                layout.check_pages(selected)
+                rendered = self._iter_pages(plan, layout, pages=selected)
+                try:
+                    with self._font_budget(budget):
+                        for index in selected:
+                            window.acquire()
+                            if cancel.is_set():
+                                return
+                            image, tickets = next(rendered)
+                            post(RenderedPage(index, image, tickets))
+                finally:
+                    # Closes the table the tickets are read from
+                    rendered.close()
+            except Exception as e:
+                post(e)
+            else:
+                post(finished)
+
+        producer = loop.run_in_executor(executor, produce)
+        try:
+            while True:
+                item = await queue.get()
+                window.release()
+                if item is finished:
+                    return
+                if isinstance(item, Exception):
+                    raise item
+                yield item
+        finally:
+            cancel.set()
+            window.release()
+            await producer
+
+    def generate_sinks(
+        self,
+        sinks: Sequence[Sink],
+        on_progress: Optional[ProgressCallback] = None,
+        plan: Optional[RenderPlan] = None,
+    ) -> Optional[GenerationSummary]:
+        """
+        Renders every ticket once into `sinks` only, without writing the output
+        file. Pages are only composed if a sink wants them; otherwise progress
+        and the summary count tickets alone.
+        """
+        start = time.perf_counter()
+        plan, budget = self._prepare(plan)
+        layout = self.page_layout()
+        if layout.pages == 0:
+            return None
+
+        with_pages = any(sink.wants_pages for sink in sinks)
+        page_count = layout.pages if with_pages else 0
+        reporter = None
+        if on_progress is not None:
+            reporter = ProgressReporter(on_progress, layout.tickets, page_count)
+
+        with self._font_budget(budget), self._open_sinks(sinks, layout):
+            if with_pages:
+                for _, tickets in self._iter_pages(plan, layout, sinks):
+                    if reporter is not None:
+                        reporter.page_rendered(tickets)
+            else:
+                for _ in self._iter_tickets(plan, layout, sinks):
+                    if reporter is not None:
+                        reporter.tickets_rendered(1)
+        bytes_written = sum(sink.bytes_written for sink in sinks)
+
+        if self.metrics is not None:
+            self.metrics.inc("bytes_written", bytes_written)
+        if reporter is not None:
+            reporter.update_bytes(bytes_written)
+            reporter.finish()
+
+        return GenerationSummary(
+            tickets=layout.tickets,
+            pages=page_count,
+            bytes_written=bytes_written,
+            elapsed_seconds=time.perf_counter() - start,
+            peak_rss_bytes=peak_rss_bytes(),
+            memory_budget=budget,
         )
-        height = int(
-            (template.height + layout.gap_y) * layout.grid_size[1]
-            - layout.gap_y
-            + layout.margin_top
-            + layout.margin_bottom
+
+    def _prepare(
+        self, plan: Optional[RenderPlan]
+    ) -> tuple[RenderPlan, Optional[MemoryBudget]]:
+        """Compiles the plan (unless given) and applies the memory limit."""
+        metrics = self.metrics
+        if plan is None:
+            if metrics is None:
+                plan = self.compile_plan()
+            else:
+                font_hits, font_misses = font_registry.hits, font_registry.misses
+                with metrics.time("prepare"):
+                    plan = self.compile_plan()
+                metrics.inc("font_cache_hits", font_registry.hits - font_hits)
+                metrics.inc("font_cache_misses", font_registry.misses - font_misses)
+
+        return plan, self.memory_budget(plan)
+
+    def memory_budget(self, plan: RenderPlan) -> Optional[MemoryBudget]:
+        """
+        How `max_memory` is shared for generating `plan`, counting the memory
+        already in use and the ticket values cached during the run.
+        """
+        if self.max_memory is None:
+            return None
+        return MemoryBudget.plan(
+            self.max_memory, plan, current_rss_bytes(), self._value_cache_bytes()
         )
 
-        image = Image.new("RGB", (width, height), self.spec.background)
+    def _value_cache_bytes(self) -> int:
+        """Most memory the formatted integer parameters cache during a run."""
+        if self.spec.params is None:
+            return 0
+        values = (param.get_values() for param in self.spec.params)
+        return sum(v.cache_bytes() for v in values if isinstance(v, FormattedInts))
+
+    @contextmanager
+    def _font_budget(self, budget: Optional[MemoryBudget]):
+        """Caps the shared font cache for a run, restoring it afterwards."""
+        if budget is None:
+            yield
+            return
+        with font_registry.capped(budget.max_fonts):
+            yield
+
+    @contextmanager
+    def _open_sinks(self, sinks: Sequence[Sink], layout: PageLayout):
+        """Opens `sinks` for a run and closes them when it ends, even on error."""
+        opened: list[Sink] = []
+        try:
+            for sink in sinks:
+                sink.open(self, layout)
+                opened.append(sink)
+            yield
+        finally:
+            for sink in opened:
+                sink.close()
+
+    def _write_pages(
+        self,
+        plan: RenderPlan,
+        layout: PageLayout,
+        pages: Sequence[int],
+        budget: Optional[MemoryBudget],
+        sinks: Sequence[Sink],
+        reporter: Optional[ProgressReporter],
+        progress_callback: Optional[Callable[[int, int], None]],
+        cancel: Optional[threading.Event] = None,
+    ) -> int:
+        """Renders, encodes and writes `pages` to the output file."""
+        page_count = len(pages)
+        page_iter = self._iter_pages(plan, layout, sinks, pages, cancel)
+        pages_done = 0
+        render_seconds = 0.0
+
+        def render(page_index: int) -> Image.Image:
+            nonlocal pages_done, render_seconds
+            render_start = time.perf_counter()
+
+            if page_index != pages_done:
+                raise RuntimeError("Pages must be rendered in order")
+            if progress_callback:
+                progress_callback(page_index + 1, page_count)
+
+            page, tickets = next(page_iter)
+            pages_done += 1
+            if reporter is not None:
+                reporter.page_rendered(tickets)
+
+            render_seconds += time.perf_counter() - render_start
+            return page
+
+        threads, depth = self.pipeline_shape(budget)
+        if self.is_pdf:
+            rendered = (render(index) for index in range(page_count))
+            if threads > 0:
+                encoded = encode_ordered(rendered, self._encode_page, threads, depth)
+            else:
+                encoded = map(self._encode_page, rendered)
+            bytes_written = self._save(
+                lambda f: self._write_pdf(f, encoded, page_count), reporter
+            )
+        else:
+            # Pillow's writer encodes each page as it renders it
+            sequence = PageSequence(render, page_count)
+            bytes_written = self._save(
+                lambda f: sequence.save(f, **self.save_options()),
+                reporter,
+                lambda: render_seconds,
+            )
+        return bytes_written
+
+    def pipeline_shape(self, budget: Optional[MemoryBudget] = None) -> tuple[int, int]:
+        """
+        Encoder threads and pages in flight for this output, limited by
+        `budget`. Only PDF pages are encoded on separate threads; other formats
+        are encoded by Pillow's writer, one page in flight.
+        """
+        threads = self.encoder_threads
+        if threads is None:
+            threads = default_encoder_threads()
+        if threads == 0 or not self.is_pdf:
+            return 0, 1
+        if budget is not None:
+            # More threads than pages in flight would only sit idle
+            depth = budget.pages_in_flight
+            return min(threads, depth), depth
+        return threads, min(MAX_PAGES_IN_FLIGHT, 2 * threads)
+
+    @property
+    def is_pdf(self) -> bool:
+        return self.output.suffix.lower() == ".pdf"
+
+    @property
+    def is_transparent(self) -> bool:
+        """Whether pages have an alpha channel: overlays on a background with one."""
+        background = resolve_color(self.spec.background)
+        return self.spec.output.overlay_only and len(background) == 4
 
-        for i, item_index in enumerate(
-            range(page_offset, len(stack_items), self.spec.stack_size)
-        ):
-            ticket_image = self.generate_ticket(template, stack_items[item_index])
-            grid_pos = (i % layout.grid_size[0], i // layout.grid_size[0])
-            # print(f"    {i}: {grid_pos}")
-            left = layout.margin_left + grid_pos[0] * (template.width + layout.gap_x)
-            top = layout.margin_top + grid_pos[1] * (template.height + layout.gap_y)
-            image.paste(ticket_image, (int(left), int(top)))
+    def save_options(self) -> dict[str, Any]:
+        """
+        Keyword arguments for Pillow's multi-page ``save`` of the output, for
+        formats other than PDF (which is written by `write_pdf`).
+        """
+        output = self.spec.output
+        options: dict[str, Any] = {"resolution": output.dpi, "save_all": True}
+        if self.output.suffix.lower() not in (".tif", ".tiff"):
+            return options
 
-        return image
+        # TIFF compression applies to every page, so auto cannot pick per page
+        if output.color == "bw":
+            # Group 4 only takes 1-bit pages, which cannot carry alpha
+            bilevel = not self.is_transparent
+            options["compression"] = "group4" if bilevel else "tiff_adobe_deflate"
+        elif output.codec == "jpeg":
+            options["compression"] = "jpeg"
+            options["quality"] = output.quality
+        elif output.codec in ("flate", "auto"):
+            options["compression"] = "tiff_adobe_deflate"
+        return options
+
+    def _convert_page(self, page: Image.Image) -> Image.Image:
+        color = self.spec.output.color
+        if color == "rgb":
+            return page
+        if page.mode == "RGBA":
+            # Transparent (overlay) pages keep their alpha. There is no 1-bit
+            # mode with alpha, so black and white ones stay 8-bit, thresholded
+            gray, alpha = page.convert("LA").split()
+            if color == "bw":
+                gray = gray.point(_BW_THRESHOLD)
+            return Image.merge("LA", (gray, alpha))
+        if color == "gray":
+            return page.convert("L")
+        # Threshold rather than dither, which would blur text edges
+        return page.convert("L").point(_BW_THRESHOLD, "1")
+
+    def _encode_page(self, page: Image.Image) -> EncodedPage:
+        if self.metrics is None:
+            return encode_page(page, self.spec.output)
+        with self.metrics.time("encode"):
+            return encode_page(page, self.spec.output)
+
+    def _write_pdf(
+        self, f: IO[bytes], pages: Iterable[EncodedPage], page_count: int
+    ) -> None:
+        write_pdf(f, self.output, pages, page_count, self.spec.output.dpi)
+
+    def _save(
+        self,
+        write: Callable[[IO[bytes]], None],
+        reporter: Optional[ProgressReporter],
+        render_seconds: Optional[Callable[[], float]] = None,
+    ) -> int:
+        """
+        Opens the output and has `write` render, encode and write the pages.
+        With `render_seconds`, whatever time is not spent rendering or writing
+        is recorded as encoding.
+        """
+        metrics = self.metrics
+        if metrics is None and reporter is None:
+            with open(self.output, "w+b") as f:
+                write(f)
+            return self.output.stat().st_size
+
+        # Time and count the raw writes (buffered as usual) separately
+        start = time.perf_counter()
+        on_write = reporter.update_bytes if reporter is not None else None
+        raw = TimedFile(self.output, on_write=on_write)
+        with io.BufferedRandom(raw) as f:
+            write(f)
+        elapsed = time.perf_counter() - start
+
+        if metrics is not None:
+            if render_seconds is not None:
+                encode = elapsed - raw.write_seconds - render_seconds()
+                metrics.observe("encode", encode)
+            metrics.observe("write", raw.write_seconds)
+            metrics.inc("bytes_written", raw.bytes_written)
+        return raw.bytes_written
+
+    def print_page(
+        self,
+        plan: RenderPlan | Image.Image,
+        page_offset: int,
+        stack_items: list[tuple[str, ...]] | list[dict[str, Any]],
+    ) -> Image.Image:
+        """
+        Renders page `page_offset` of a stack. `plan` is the `compile_plan()`
+        result; the template image these methods used to take still works,
+        but compiles a plan on every call.
+        """
+        return self._as_plan(plan).render_page(page_offset, stack_items, self.metrics)
 
     def generate_ticket(
         self,
-        template_image: Image.Image,
+        plan: RenderPlan | Image.Image,
         param_values: tuple[str, ...] | dict[str, Any],
-    ):
-        image = template_image.copy()
-        values: dict[str, str] = {}
-        if isinstance(param_values, dict):
-            values = {name: str(value) for name, value in param_values.items()}
-        elif self.spec.params is not None:
-            values = {
-                param.name: value
-                for param, value in zip(self.spec.params, param_values)
-            }
-
-        for text in self.spec.texts:
-            text_value = replace_vars(text.template, values)
-            d = ImageDraw.Draw(image)
-            d.text(text.position, text_value, font=text.font, fill=text.color)
-
-        return image
+    ) -> Image.Image:
+        """Renders one ticket; `plan` is as for `print_page`."""
+        return self._as_plan(plan).render_ticket(param_values, self.metrics)
+
+    def _as_plan(self, plan: RenderPlan | Image.Image) -> RenderPlan:
+        # Callers written before RenderPlan pass the template image
+        if isinstance(plan, Image.Image):
+            return RenderPlan.compile(self.spec, plan, self.work_dir)
+        return plan
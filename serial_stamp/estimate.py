@@ -0,0 +1,159 @@
+import io
+import os
+import time
+from dataclasses import asdict, dataclass
+from typing import Any, Optional
+
+from PIL import Image
+
+from serial_stamp.engine import Engine, PageLayout
+from serial_stamp.memory import (
+    estimate_page_bytes,
+    format_size,
+    peak_rss_bytes,
+)
+
+# Pages rendered and encoded to measure a run, unless asked otherwise
+DEFAULT_SAMPLE_PAGES = 3
+
+
+@dataclass(frozen=True, slots=True)
+class RunEstimate:
+    """Projected cost of a run, from its page layout and a calibration sample."""
+
+    layout: PageLayout
+    # Pillow format the output is written in (from the output suffix)
+    format: str
+    sample_pages: int
+    prepare_seconds: float
+    render_seconds_per_page: float
+    encode_seconds_per_page: float
+    bytes_per_page: float
+    # Container overhead (header, trailer) written once per file
+    overhead_bytes: float
+    peak_rss_bytes: Optional[int]
+    # Threads encoding pages while others are rendered; 0 when they take turns
+    encoder_threads: int = 0
+    cpu_count: int = 1
+
+    @property
+    def seconds(self) -> float:
+        render, encode = self.render_seconds_per_page, self.encode_seconds_per_page
+        # Encoders only overlap rendering on the CPUs it leaves free
+        parallel = min(self.encoder_threads, self.cpu_count - 1)
+        if parallel > 0:
+            # Whichever of rendering and the encoders is slower sets the pace
+            per_page = max(render, encode / parallel)
+        else:
+            per_page = render + encode
+        return self.prepare_seconds + self.layout.pages * per_page
+
+    @property
+    def output_bytes(self) -> int:
+        if self.layout.pages == 0:
+            return 0
+        return round(self.overhead_bytes + self.layout.pages * self.bytes_per_page)
+
+    def as_dict(self) -> dict[str, Any]:
+        data = asdict(self)
+        data["seconds"] = self.seconds
+        data["output_bytes"] = self.output_bytes
+        return data
+
+    def describe(self) -> str:
+        layout = self.layout
+        threads = ""
+        if self.encoder_threads:
+            threads = f" ({self.encoder_threads} encoder threads)"
+        lines = [
+            f"Tickets: {layout.tickets} ({layout.tickets_per_page} per page)",
+            f"Pages: {layout.pages} in {layout.stacks} stacks of {layout.stack_size}",
+            f"Calibrated on {self.sample_pages} pages: "
+            f"{self.render_seconds_per_page * 1000:.1f} ms render + "
+            f"{self.encode_seconds_per_page * 1000:.1f} ms encode, "
+            f"{format_size(self.bytes_per_page)} per page",
+            f"Estimated time: {self.seconds:.1f}s{threads}",
+            f"Estimated {self.format} size: {format_size(self.output_bytes)}",
+        ]
+        if self.peak_rss_bytes is not None:
+            lines.append(f"Estimated peak memory: {format_size(self.peak_rss_bytes)}")
+        return "\n".join(lines)
+
+
+def _encode(engine: Engine, pages: list[Image.Image], format: str) -> int:
+    buffer = io.BytesIO()
+    if engine.is_pdf:
+        engine._write_pdf(buffer, map(engine._encode_page, pages), len(pages))
+        return buffer.tell()
+
+    options = engine.save_options()
+    options["append_images"] = pages[1:]
+    pages[0].save(buffer, format=format, **options)
+    return buffer.tell()
+
+
+def estimate_run(
+    engine: Engine, sample_pages: int = DEFAULT_SAMPLE_PAGES
+) -> RunEstimate:
+    """
+    Estimates the wall time, output size and peak memory of
+    ``engine.generate()`` without running it.
+
+    The page layout is computed exactly. The first `sample_pages` pages are
+    rendered and encoded in memory, in the output's format, to measure the time
+    and bytes per page. Generation streams pages, so its memory barely grows
+    with the page count: peak memory is taken as the peak measured here plus
+    room for the pages in flight in the render/encode pipeline.
+    """
+    output_format = Image.registered_extensions().get(engine.output.suffix.lower())
+    if output_format is None:
+        raise ValueError(f"Unsupported output format '{engine.output.suffix}'")
+
+    start = time.perf_counter()
+    plan = engine.compile_plan()
+    prepare_seconds = time.perf_counter() - start
+
+    layout = engine.page_layout()
+    sample = min(max(sample_pages, 1), layout.pages)
+    if sample == 0:
+        return RunEstimate(
+            layout, output_format, 0, prepare_seconds, 0.0, 0.0, 0.0, 0.0, None
+        )
+
+    start = time.perf_counter()
+    page_iter = engine._iter_pages(plan, layout)
+    pages = [next(page_iter)[0] for _ in range(sample)]
+    render_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    sample_bytes = _encode(engine, pages, output_format)
+    encode_seconds = time.perf_counter() - start
+
+    # Split the sample's size into a per-file overhead and a per-page size
+    if sample > 1:
+        first_bytes = _encode(engine, pages[:1], output_format)
+        bytes_per_page = (sample_bytes - first_bytes) / (sample - 1)
+        overhead_bytes = max(0.0, first_bytes - bytes_per_page)
+    else:
+        bytes_per_page, overhead_bytes = float(sample_bytes), 0.0
+
+    threads, depth = engine.pipeline_shape(engine.memory_budget(plan))
+
+    peak = peak_rss_bytes()
+    if peak is not None:
+        # The sample was all in memory at once; add what is in flight beyond it
+        peak += estimate_page_bytes(plan) * max(1, depth + 1 - sample)
+
+    return RunEstimate(
+        layout=layout,
+        format=output_format,
+        sample_pages=sample,
+        prepare_seconds=prepare_seconds,
+        render_seconds_per_page=render_seconds / sample,
+        encode_seconds_per_page=encode_seconds / sample,
+        bytes_per_page=bytes_per_page,
+        overhead_bytes=overhead_bytes,
+        peak_rss_bytes=peak,
+        encoder_threads=threads,
+        cpu_count=os.cpu_count() or 1,
+    )
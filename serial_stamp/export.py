@@ -0,0 +1,161 @@
+import io
+import os
+import time
+import zlib
+from dataclasses import dataclass
+from typing import Any, Iterable, Optional, Sequence
+
+from PIL import Image
+
+from serial_stamp.archive import DirectoryWriter, ZipStreamWriter, open_archive
+from serial_stamp.engine import Engine, GenerationSummary, PageLayout
+from serial_stamp.models import Output
+from serial_stamp.pipeline import OrderedPool, default_encoder_threads
+from serial_stamp.progress import ProgressCallback
+from serial_stamp.sinks import RenderedTicket, Sink
+from serial_stamp.utils import compiled_template
+
+DEFAULT_NAME_TEMPLATE = "ticket-$index.png"
+
+# Tickets rendered but not yet written, per encoder thread; tickets are small,
+# so this only needs to keep the encoders busy
+TICKETS_IN_FLIGHT_PER_THREAD = 4
+
+
+@dataclass(frozen=True, slots=True)
+class NameTemplate:
+    """
+    Names per-ticket files from a template such as ``ticket-$no.png``.
+
+    Besides the ticket's own variables, ``$index`` is its 1-based position in
+    the run, zero-padded to the width of the ticket count so names sort in
+    order. The suffix picks the image format.
+    """
+
+    template: str
+    ticket_count: int
+    format: str
+
+    @classmethod
+    def parse(cls, template: str, ticket_count: int) -> "NameTemplate":
+        if ticket_count > 1 and "$" not in template:
+            raise ValueError(
+                f"Name template '{template}' has no variable to tell tickets apart"
+            )
+        return cls(template, ticket_count, image_format(template))
+
+    def name(self, index: int, names: tuple[str, ...], values: Sequence[Any]) -> str:
+        # A ticket variable called "index" takes precedence
+        fmt = compiled_template(self.template, ("index", *names))
+        width = len(str(self.ticket_count))
+        return fmt.format(f"{index + 1:0{width}d}", *values)
+
+
+def image_format(name: str) -> str:
+    """The Pillow format that writes files named like `name`."""
+    Image.init()
+    suffix = os.path.splitext(name)[1].lower()
+    format = Image.registered_extensions().get(suffix)
+    if format is None or format not in Image.SAVE:
+        raise ValueError(f"Unsupported ticket image format '{suffix}'")
+    return format
+
+
+def image_save_options(format: str, output: Output) -> dict[str, Any]:
+    """Keyword arguments for Pillow's ``save`` of a ticket under `output`."""
+    options: dict[str, Any] = {"dpi": (output.dpi, output.dpi)}
+    if format == "PNG":
+        options["compress_level"] = output.compress_level
+    elif format in ("JPEG", "WEBP"):
+        options["quality"] = output.quality
+        if format == "JPEG" and output.subsampling is not None:
+            options["subsampling"] = output.subsampling
+    return options
+
+
+@dataclass(frozen=True, slots=True)
+class EncodedTicket:
+    name: str
+    data: bytes
+    crc: int
+
+
+class TicketArchiveSink(Sink):
+    """
+    Writes one image per ticket into a ``.zip`` archive or a directory, named
+    from `name_template`.
+
+    Tickets are encoded on the engine's encoder threads, a bounded number in
+    flight, and streamed to the archive in order as they come back, so memory
+    does not grow with the ticket count.
+    """
+
+    wants_ticket_images = True
+
+    def __init__(
+        self,
+        destination: str | os.PathLike,
+        name_template: str = DEFAULT_NAME_TEMPLATE,
+    ):
+        self.destination = destination
+        self.name_template = name_template
+        self._archive: Optional[ZipStreamWriter | DirectoryWriter] = None
+        self._pool: Optional[OrderedPool] = None
+
+    def open(self, engine: Engine, layout: PageLayout) -> None:
+        names = NameTemplate.parse(self.name_template, layout.tickets)
+        options = image_save_options(names.format, engine.spec.output)
+        metrics = engine.metrics
+
+        def encode(ticket: RenderedTicket) -> EncodedTicket:
+            assert ticket.image is not None
+            start = time.perf_counter()
+            buffer = io.BytesIO()
+            ticket.image.save(buffer, format=names.format, **options)
+            data = buffer.getvalue()
+            name = names.name(ticket.index, ticket.names, ticket.values)
+            encoded = EncodedTicket(name, data, zlib.crc32(data))
+            if metrics is not None:
+                metrics.observe("encode", time.perf_counter() - start)
+            return encoded
+
+        threads = engine.encoder_threads
+        if threads is None:
+            threads = default_encoder_threads()
+        depth = TICKETS_IN_FLIGHT_PER_THREAD * threads
+        self._pool = OrderedPool(encode, threads, depth)
+        self._archive = open_archive(self.destination)
+
+    def _write(self, tickets: Iterable[EncodedTicket]) -> None:
+        assert self._archive is not None
+        for ticket in tickets:
+            self._archive.write(ticket.name, ticket.data, ticket.crc)
+        self.bytes_written = self._archive.bytes_written
+
+    def ticket(self, ticket: RenderedTicket) -> None:
+        assert self._pool is not None
+        self._write(self._pool.submit(ticket))
+
+    def close(self) -> None:
+        if self._pool is None or self._archive is None:
+            return
+        try:
+            self._write(self._pool.drain())
+        finally:
+            self._pool.close()
+            self._archive.close()
+            self.bytes_written = self._archive.bytes_written
+
+
+def export_tickets(
+    engine: Engine,
+    destination: str | os.PathLike,
+    name_template: str = DEFAULT_NAME_TEMPLATE,
+    on_progress: Optional[ProgressCallback] = None,
+) -> Optional[GenerationSummary]:
+    """
+    Writes one image per ticket to `destination`, a ``.zip`` archive or a
+    directory, naming each from `name_template`. Pages are not composed.
+    """
+    sink = TicketArchiveSink(destination, name_template)
+    return engine.generate_sinks([sink], on_progress=on_progress)
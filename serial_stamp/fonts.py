@@ -0,0 +1,128 @@
+import hashlib
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from io import BytesIO
+from pathlib import Path
+from typing import Iterator
+
+from PIL import ImageFont
+
+Font = ImageFont.FreeTypeFont | ImageFont.ImageFont
+
+# Used when a text does not set `ttf`; Pillow looks it up in the system fonts
+DEFAULT_TTF = "Arial.ttf"
+
+
+class FontRegistry:
+    """
+    Process-wide LRU cache of loaded fonts, shared by every spec and run.
+
+    Fonts are keyed by resolved file path, file hash and size. The file bytes
+    are read once (and re-read only when the file changes) and the same buffer
+    backs every size, so resolving a font usually costs one ``stat`` call. They
+    are dropped when the file's last font is evicted.
+    """
+
+    def __init__(self, max_fonts: int = 128):
+        self.max_fonts = max_fonts
+        self._lock = threading.Lock()
+        # Caps of the runs currently limiting the cache, see `capped`
+        self._caps: list[int] = []
+        # path -> (mtime_ns, file size, sha256 digest, bytes)
+        self._files: dict[str, tuple[int, int, str, bytes]] = {}
+        self._fonts: OrderedDict[tuple[str, str, int], Font] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def _read_file(self, path: str) -> tuple[str, bytes]:
+        stat = Path(path).stat()
+        cached = self._files.get(path)
+        if cached is not None and cached[:2] == (stat.st_mtime_ns, stat.st_size):
+            return cached[2], cached[3]
+
+        data = Path(path).read_bytes()
+        digest = hashlib.sha256(data).hexdigest()
+        self._files[path] = (stat.st_mtime_ns, stat.st_size, digest, data)
+        return digest, data
+
+    def get(self, ttf: str | None, size: int, work_dir: Path = Path(".")) -> Font:
+        """
+        Returns the font for `ttf` at `size`. Relative paths resolve from
+        `work_dir` first, then from the current directory and system fonts.
+        """
+        candidate = work_dir / ttf if ttf is not None else None
+
+        with self._lock:
+            if candidate is not None and candidate.is_file():
+                path = str(candidate.resolve())
+                digest, data = self._read_file(path)
+                key = (path, digest, size)
+            else:
+                # System font name, or the default font: identified by name only
+                data = None
+                key = (ttf or "", "", size)
+
+            font = self._fonts.get(key)
+            if font is not None:
+                self._fonts.move_to_end(key)
+                self.hits += 1
+                return font
+
+            self.misses += 1
+            if data is not None:
+                font = ImageFont.truetype(BytesIO(data), size)
+            elif ttf is not None:
+                font = ImageFont.truetype(ttf, size)
+            else:
+                try:
+                    font = ImageFont.truetype(DEFAULT_TTF, size)
+                except OSError:
+                    font = ImageFont.load_default(size)
+
+            self._fonts[key] = font
+            self._evict()
+            return font
+
+    def _evict(self):
+        capacity = min([self.max_fonts, *self._caps])
+        while len(self._fonts) > capacity:
+            (path, _, _), _ = self._fonts.popitem(last=False)
+            # Keep a file's bytes only while one of its fonts is cached
+            if all(key[0] != path for key in self._fonts):
+                self._files.pop(path, None)
+
+    def resize(self, max_fonts: int):
+        """Changes the cache size, evicting the least recently used fonts."""
+        with self._lock:
+            self.max_fonts = max_fonts
+            self._evict()
+
+    @contextmanager
+    def capped(self, max_fonts: int) -> Iterator[None]:
+        """
+        Holds at most `max_fonts` fonts until the block ends, as for a run with
+        a memory limit, then lets the cache grow back to `max_fonts`. While
+        several runs are capped, the smallest cap applies.
+        """
+        with self._lock:
+            self._caps.append(max_fonts)
+            self._evict()
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._caps.remove(max_fonts)
+
+    def clear(self):
+        with self._lock:
+            self._files.clear()
+            self._fonts.clear()
+
+
+registry = FontRegistry()
+
+
+def load_font(ttf: str | None, size: int, work_dir: Path = Path(".")) -> Font:
+    """Loads a font through the process-wide `registry`."""
+    return registry.get(ttf, size, work_dir)
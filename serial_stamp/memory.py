@@ -0,0 +1,102 @@
+import re
+import sys
+from dataclasses import dataclass
+
+from serial_stamp.plan import RenderPlan
+
+_SIZE_UNITS = {"": 1, "K": 1 << 10, "M": 1 << 20, "G": 1 << 30, "T": 1 << 40}
+_SIZE_PATTERN = re.compile(r"^\s*(\d+(?:\.\d+)?)\s*([KMGT]?)(?:I?B)?\s*$", re.I)
+
+# Memory the interpreter, Pillow and pydantic need before any page exists,
+# used when the current RSS cannot be read
+DEFAULT_BASELINE = 64 << 20
+
+# Most pages ever rendered ahead of the encoder, whatever the budget
+MAX_PAGES_IN_FLIGHT = 8
+
+# Rough memory held per cached font (FreeType face and glyph caches)
+FONT_BYTES = 2 << 20
+
+
+def parse_size(value: str) -> int:
+    """Parses sizes like ``512M``, ``2G`` or ``1.5GiB`` (binary units) to bytes."""
+    match = _SIZE_PATTERN.match(value)
+    if match is None:
+        raise ValueError(f"Invalid size '{value}', expected e.g. 512M or 2G")
+    number, unit = match.groups()
+    return int(float(number) * _SIZE_UNITS[unit.upper()])
+
+
+def format_size(value: float) -> str:
+    for unit in ("B", "KB", "MB", "GB"):
+        if value < 1024 or unit == "GB":
+            return f"{value:.0f} {unit}" if unit == "B" else f"{value:.1f} {unit}"
+        value /= 1024
+    return f"{value:.1f} GB"
+
+
+def peak_rss_bytes() -> int | None:
+    """Peak resident memory of this process so far, or None if unavailable."""
+    try:
+        import resource
+    except ImportError:
+        # Not available on Windows
+        return None
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Reported in bytes on macOS, in kilobytes elsewhere
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def estimate_page_bytes(plan: RenderPlan) -> int:
+    """
+    Memory needed per page being generated: the RGB page itself, about as
+    much again for the encoder's buffers, and the ticket being drawn.
+    """
+    width, height = plan.page_size
+    ticket = plan.template.width * plan.template.height * 3
+    return 2 * width * height * 3 + ticket
+
+
+@dataclass(frozen=True, slots=True)
+class MemoryBudget:
+    """How a memory limit is shared between pages in flight and caches."""
+
+    limit: int
+    baseline: int
+    page_bytes: int
+    pages_in_flight: int
+    max_fonts: int
+
+    @classmethod
+    def plan(
+        cls,
+        limit: int,
+        plan: RenderPlan,
+        baseline: int | None = None,
+        value_bytes: int = 0,
+    ) -> "MemoryBudget":
+        """
+        Splits `limit` for generating `plan`, given the memory already in use
+        (`baseline`) and the ticket values cached during the run
+        (`value_bytes`). Raises ValueError if not even one page fits.
+        """
+        if baseline is None:
+            baseline = DEFAULT_BASELINE
+        page_bytes = estimate_page_bytes(plan)
+        available = limit - baseline - value_bytes
+
+        if available < page_bytes:
+            raise ValueError(
+                f"Memory limit {format_size(limit)} is too small: about "
+                f"{format_size(baseline + value_bytes)} is already in use or "
+                f"needed for ticket values, and each page needs about "
+                f"{format_size(page_bytes)}"
+            )
+
+        # Fonts get up to a tenth of what is left, pages the rest
+        max_fonts = max(len(plan.texts), min(128, available // 10 // FONT_BYTES))
+        pages = (available - max_fonts * FONT_BYTES) // page_bytes
+        pages_in_flight = max(1, min(MAX_PAGES_IN_FLIGHT, pages))
+
+        return cls(limit, baseline, page_bytes, pages_in_flight, max_fonts)
@@ -0,0 +1,189 @@
+import io
+import json
+import threading
+import time
+from bisect import bisect_left
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any
+
+# Upper bounds (in seconds) of the latency histogram buckets, from 10µs to 10s
+DEFAULT_BUCKETS: tuple[float, ...] = (
+    0.00001,
+    0.000025,
+    0.00005,
+    0.0001,
+    0.00025,
+    0.0005,
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+)
+
+# Stages timed during generation, in pipeline order
+STAGES = ("items", "substitute", "rasterize", "composite", "encode", "write")
+
+
+class Histogram:
+    """Latency histogram with fixed bucket bounds, plus exact count/sum/min/max."""
+
+    def __init__(self, bounds: tuple[float, ...] = DEFAULT_BUCKETS):
+        self.bounds = bounds
+        # One count per bound, plus the +Inf bucket (not cumulative)
+        self.counts = [0] * (len(bounds) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.min = float("inf")
+        self.max = 0.0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.sum += value
+        if value < self.min:
+            self.min = value
+        if value > self.max:
+            self.max = value
+
+    def cumulative(self) -> list[tuple[str, int]]:
+        """Bucket counts as (upper bound, observations <= bound) pairs."""
+        buckets = []
+        total = 0
+        for bound, count in zip((*self.bounds, float("inf")), self.counts):
+            total += count
+            buckets.append(("+Inf" if bound == float("inf") else repr(bound), total))
+        return buckets
+
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            "count": self.count,
+            "sum": self.sum,
+            "min": self.min if self.count else None,
+            "max": self.max if self.count else None,
+            "mean": self.sum / self.count if self.count else None,
+            "buckets": dict(self.cumulative()),
+        }
+
+
+class Metrics:
+    """
+    Stage latencies and counters collected during generation.
+
+    Instrumentation is opt-in: the engine only times stages when it is given a
+    `Metrics` instance, so generation without one pays a single `None` check
+    per ticket. Safe to update from several threads.
+    """
+
+    def __init__(self, prefix: str = "serial_stamp"):
+        self.prefix = prefix
+        self.counters: dict[str, int] = {}
+        self.histograms: dict[str, Histogram] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, name: str, value: int = 1):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def observe(self, stage: str, seconds: float):
+        with self._lock:
+            histogram = self.histograms.get(stage)
+            if histogram is None:
+                histogram = self.histograms[stage] = Histogram()
+            histogram.observe(seconds)
+
+    @contextmanager
+    def time(self, stage: str) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(stage, time.perf_counter() - start)
+
+    def _ordered_stages(self) -> list[str]:
+        known = [stage for stage in STAGES if stage in self.histograms]
+        return known + sorted(set(self.histograms) - set(STAGES))
+
+    def as_dict(self) -> dict[str, Any]:
+        with self._lock:
+            return {
+                "counters": dict(sorted(self.counters.items())),
+                "stages": {
+                    stage: self.histograms[stage].as_dict()
+                    for stage in self._ordered_stages()
+                },
+            }
+
+    def to_json(self) -> str:
+        return json.dumps(self.as_dict(), indent=2)
+
+    def to_openmetrics(self) -> str:
+        """Renders the metrics in the OpenMetrics text exposition format."""
+        family = f"{self.prefix}_stage_seconds"
+        lines = []
+
+        with self._lock:
+            if self.histograms:
+                lines.append(f"# TYPE {family} histogram")
+                lines.append(f"# UNIT {family} seconds")
+                lines.append(f"# HELP {family} Time spent per generation stage.")
+                for stage in self._ordered_stages():
+                    histogram = self.histograms[stage]
+                    for bound, count in histogram.cumulative():
+                        lines.append(
+                            f'{family}_bucket{{stage="{stage}",le="{bound}"}} {count}'
+                        )
+                    lines.append(f'{family}_count{{stage="{stage}"}} {histogram.count}')
+                    lines.append(f'{family}_sum{{stage="{stage}"}} {histogram.sum!r}')
+
+            for name, value in sorted(self.counters.items()):
+                lines.append(f"# TYPE {self.prefix}_{name} counter")
+                lines.append(f"{self.prefix}_{name}_total {value}")
+
+        lines.append("# EOF")
+        return "\n".join(lines) + "\n"
+
+    def write(self, path: Path):
+        """Writes the metrics as JSON for a `.json` path, OpenMetrics text otherwise."""
+        path = Path(path)
+        if path.suffix.lower() == ".json":
+            path.write_text(self.to_json() + "\n")
+        else:
+            path.write_text(self.to_openmetrics())
+
+
+class TimedFile(io.FileIO):
+    """
+    Binary file that accumulates the time spent in `write` calls, and reports
+    the running byte count to `on_write` if given.
+    """
+
+    def __init__(
+        self,
+        path: Path | str,
+        mode: str = "w+",
+        on_write: Callable[[int], None] | None = None,
+    ):
+        super().__init__(path, mode)
+        self.write_seconds = 0.0
+        self.bytes_written = 0
+        self.on_write = on_write
+
+    def write(self, data, /) -> int:
+        start = time.perf_counter()
+        written = super().write(data) or 0
+        self.write_seconds += time.perf_counter() - start
+        self.bytes_written += written
+        if self.on_write is not None:
+            self.on_write(self.bytes_written)
+        return written
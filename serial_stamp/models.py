@@ -1,12 +1,67 @@
-from typing import Any, Literal
-
-from PIL import ImageFont
-from pydantic import BaseModel, Field
-from pydantic.fields import cached_property
+import sys
+from array import array
+from itertools import islice
+from pathlib import Path
+from typing import Annotated, Any, Literal
+
+from pydantic import AfterValidator, BaseModel, BeforeValidator, Field, PlainSerializer
+
+from serial_stamp.fonts import Font, load_font
+from serial_stamp.tables import (
+    RowIndex,
+    SqliteRowIndex,
+    count_csv_rows,
+    count_jsonl_rows,
+    count_sqlite_rows,
+    iter_csv_rows,
+    iter_jsonl_rows,
+    iter_sqlite_rows,
+)
+from serial_stamp.utils import FormattedInts
 
 Color = tuple[int, int, int] | tuple[int, int, int, int] | str
 
 
+def _to_int_array(values: Any) -> array:
+    if isinstance(values, array) and values.typecode == "q":
+        return values
+    try:
+        return array("q", values)
+    except (TypeError, OverflowError) as e:
+        raise ValueError(f"Expected a list of 64-bit integers: {e}") from e
+
+
+def _intern_strings(values: tuple[str, ...]) -> tuple[str, ...]:
+    return tuple(map(sys.intern, values))
+
+
+def _intern_string_rows(
+    values: tuple[tuple[str, ...], ...],
+) -> tuple[tuple[str, ...], ...]:
+    return tuple(_intern_strings(row) for row in values)
+
+
+# Compact storage for param values: ints live in a typed array (8 bytes each)
+# and repeated strings share a single interned object. Both dump as lists.
+IntArray = Annotated[
+    array,
+    BeforeValidator(_to_int_array),
+    PlainSerializer(list, return_type=list[int]),
+]
+InternedStrings = Annotated[
+    tuple[str, ...],
+    AfterValidator(_intern_strings),
+    PlainSerializer(list, return_type=list[str]),
+]
+InternedStringRows = Annotated[
+    tuple[tuple[str, ...], ...],
+    AfterValidator(_intern_string_rows),
+    PlainSerializer(
+        lambda rows: [list(row) for row in rows], return_type=list[list[str]]
+    ),
+]
+
+
 class Layout(BaseModel):
     grid_size: tuple[int, int] = Field(alias="grid-size")
     gap: tuple[float, float] | float
@@ -58,23 +113,21 @@ class Text(BaseModel):
     size: int = 16
     color: Color = (0, 0, 0)
 
-    @cached_property
-    def font(self):
-        if self.ttf is not None:
-            return ImageFont.truetype(self.ttf, self.size)
-
-        try:
-            return ImageFont.truetype("Arial.ttf", self.size)
-        except OSError:
-            return ImageFont.load_default(self.size)
+    def get_font(self, work_dir: Path) -> Font:
+        """
+        The font for `ttf` and `size`, with relative paths resolved from
+        `work_dir` (the project directory). Served from the process-wide font
+        registry, so this stays cheap and reflects the current `ttf` and `size`.
+        """
+        return load_font(self.ttf, self.size, work_dir)
 
 
 class IntParam(BaseModel):
-    model_config = {"populate_by_name": True}
+    model_config = {"populate_by_name": True, "arbitrary_types_allowed": True}
 
     name: str
     type: Literal["int", "integer"] = "integer"
-    values: list[int]
+    values: IntArray
     leading_zeros: int | None = Field(default=None, alias="leading-zeros")
 
     @property
@@ -82,18 +135,13 @@ class IntParam(BaseModel):
         return len(self.values)
 
     def get_values(self):
-        def render(value: int) -> str:
-            return (
-                f"{value:0{self.leading_zeros}d}" if self.leading_zeros else str(value)
-            )
-
-        return map(render, self.values)
+        return FormattedInts(self.values, self.leading_zeros)
 
 
 class StringParam(BaseModel):
     name: str
     type: Literal["string", "text"] = "string"
-    values: list[str]
+    values: InternedStrings
 
     @property
     def value_count(self):
@@ -107,7 +155,7 @@ class StringArrayParam(BaseModel):
     name: str
     type: Literal["string[]", "text[]"] = "string[]"
     length: int
-    values: list[list[str]]
+    values: InternedStringRows
 
     @property
     def value_count(self):
@@ -131,17 +179,110 @@ class IntRangeParam(BaseModel):
         return self.max - self.min + 1
 
     def get_values(self):
-        def render(value: int) -> str:
-            return (
-                f"{value:0{self.leading_zeros}d}" if self.leading_zeros else str(value)
-            )
+        return FormattedInts(range(self.min, self.max + 1), self.leading_zeros)
+
 
-        return map(render, range(self.min, self.max + 1))
-        return range(self.min, self.max + 1)
+class TableSource(BaseModel):
+    """
+    Table rows streamed from an external CSV, JSON Lines or SQLite file instead
+    of being inlined in the spec. `source` is relative to the project directory.
+    SQLite sources also need a `query`, and may set an indexed `key` column for
+    keyset pagination.
+    """
+
+    model_config = {"populate_by_name": True}
+
+    source: str
+    format: Literal["csv", "jsonl", "sqlite"] | None = None
+    delimiter: str | None = None
+    query: str | None = None
+    key: str | None = None
+    batch_size: int = Field(default=1000, alias="batch-size", gt=0)
+
+    @property
+    def resolved_format(self) -> Literal["csv", "jsonl", "sqlite"]:
+        if self.format is not None:
+            return self.format
+        suffix = Path(self.source).suffix.lower()
+        if suffix in (".csv", ".tsv"):
+            return "csv"
+        if suffix in (".jsonl", ".ndjson"):
+            return "jsonl"
+        if suffix in (".db", ".sqlite", ".sqlite3"):
+            return "sqlite"
+        raise ValueError(f"Cannot infer table format from '{self.source}'")
+
+    @property
+    def resolved_delimiter(self) -> str:
+        if self.delimiter is not None:
+            return self.delimiter
+        return "\t" if Path(self.source).suffix.lower() == ".tsv" else ","
+
+    def _sqlite_query(self) -> str:
+        if self.query is None:
+            raise ValueError(f"SQLite table source '{self.source}' needs a query")
+        return self.query
+
+    def iter_rows(self, work_dir: Path, start: int = 0, stop: int | None = None):
+        """Lazily yields rows `start` to `stop` (exclusive) of the table."""
+        path = work_dir / self.source
+        fmt = self.resolved_format
+        if fmt == "sqlite":
+            return iter_sqlite_rows(
+                path, self._sqlite_query(), self.key, self.batch_size, start, stop
+            )
+        if fmt == "csv":
+            rows = iter_csv_rows(path, self.resolved_delimiter)
+        else:
+            rows = iter_jsonl_rows(path)
+        return islice(rows, start, stop)
+
+    def index_rows(self, work_dir: Path) -> RowIndex | SqliteRowIndex:
+        """
+        Indexes the table for random access to its rows by position; the
+        index must be closed.
+        """
+        path = work_dir / self.source
+        fmt = self.resolved_format
+        if fmt == "sqlite":
+            return SqliteRowIndex(path, self._sqlite_query(), self.key)
+        if fmt == "csv":
+            return RowIndex.csv(path, self.resolved_delimiter)
+        return RowIndex.jsonl(path)
+
+    def count_rows(self, work_dir: Path) -> int:
+        path = work_dir / self.source
+        fmt = self.resolved_format
+        if fmt == "sqlite":
+            return count_sqlite_rows(path, self._sqlite_query())
+        if fmt == "csv":
+            return count_csv_rows(path, self.resolved_delimiter)
+        return count_jsonl_rows(path)
 
 
 class Output(BaseModel):
+    """
+    How pages are encoded. `codec` is ``jpeg`` (lossy, `quality` and
+    `subsampling`), ``flate`` (lossless, `compress-level`) or ``auto``, which
+    picks per page: flate for flat artwork with few colors, JPEG otherwise.
+    Left unset, PDF pages are JPEG and TIFF pages uncompressed. `color` turns
+    pages to grayscale or 1-bit black and white; 1-bit pages are always
+    stored losslessly. With `overlay-only`, pages get just the variable text
+    at each slot, on the spec's `background` (transparent if it has an alpha
+    of 0), for printing onto pre-printed ticket stock. Transparent pages keep
+    their alpha in gray and black and white too, as 8-bit gray.
+    """
+
+    model_config = {"populate_by_name": True}
+
     background_color: Color = Field(alias="background-color", default="white")
+    dpi: float = Field(default=100.0, gt=0)
+    codec: Literal["jpeg", "flate", "auto"] | None = None
+    quality: int = Field(default=75, ge=1, le=100)
+    subsampling: Literal["4:4:4", "4:2:2", "4:2:0"] | None = None
+    compress_level: int = Field(alias="compress-level", default=6, ge=0, le=9)
+    color: Literal["rgb", "gray", "bw"] = "rgb"
+    overlay_only: bool = Field(alias="overlay-only", default=False)
 
 
 class Spec(BaseModel):
@@ -149,9 +290,9 @@ class Spec(BaseModel):
     source_image: str = Field(alias="source-image")
     layout: Layout
     texts: list[Text]
-    params: list[
-        IntParam | StringParam | IntRangeParam | StringArrayParam
-    ] | None = Field(default=None)
-    table: list[dict[str, Any]] | None = Field(default=None)
+    params: list[IntParam | StringParam | IntRangeParam | StringArrayParam] | None = (
+        Field(default=None)
+    )
+    table: list[dict[str, Any]] | TableSource | None = Field(default=None)
     output: Output = Field(default_factory=Output)
     background: Color = (255, 255, 255)
@@ -0,0 +1,157 @@
+import io
+import os
+import time
+import zlib
+from dataclasses import dataclass
+from typing import IO, Iterable, Optional
+
+from PIL import Image, PdfParser, __version__
+
+from serial_stamp.models import Output
+
+# PDF color space, bits per component and procedure set of each page mode
+_COLOR_SPACES = {
+    "RGB": ("DeviceRGB", 8, "ImageC"),
+    "L": ("DeviceGray", 8, "ImageB"),
+    "1": ("DeviceGray", 1, "ImageB"),
+}
+
+# The PDF stream filter that decodes each codec
+_FILTERS = {"jpeg": "DCTDecode", "flate": "FlateDecode"}
+
+# With the auto codec, pages with at most this many colors (flat artwork and
+# text) are compressed losslessly, where flate beats JPEG; others get JPEG
+AUTO_MAX_COLORS = 256
+
+
+@dataclass(frozen=True, slots=True)
+class EncodedPage:
+    """A page compressed for the PDF writer, ready to be written as is."""
+
+    data: bytes
+    size: tuple[int, int]
+    mode: str
+    codec: str = "jpeg"
+    # Deflated 8-bit alpha channel, written as a soft mask, if the page has one
+    alpha: Optional[bytes] = None
+
+
+def choose_codec(page: Image.Image, output: Output) -> str:
+    """The codec `page` is compressed with under the `output` settings."""
+    if page.mode == "1":
+        # JPEG has no 1-bit mode; packed bits deflate very well
+        return "flate"
+    if output.codec == "auto":
+        return "flate" if page.getcolors(AUTO_MAX_COLORS) is not None else "jpeg"
+    return output.codec or "jpeg"
+
+
+def encode_page(page: Image.Image, output: Optional[Output] = None) -> EncodedPage:
+    """
+    Compresses `page` for `write_pdf`. This is the expensive part of writing a
+    PDF, and both Pillow and zlib release the GIL while doing it, so pages can
+    be encoded in parallel threads.
+    """
+    if output is None:
+        output = Output()
+
+    alpha = None
+    if page.mode in ("RGBA", "LA"):
+        # Transparent (overlay) pages: the color goes through the chosen codec,
+        # the alpha channel losslessly into a soft mask
+        mask = page.getchannel("A").tobytes()
+        alpha = zlib.compress(mask, output.compress_level)
+        page = page.convert(page.mode[:-1])
+    if page.mode not in _COLOR_SPACES:
+        raise ValueError(f"Cannot write {page.mode} pages to PDF")
+
+    codec = choose_codec(page, output)
+    if codec == "flate":
+        # Raw samples, rows padded to whole bytes (as 1-bit pages are packed)
+        data = zlib.compress(page.tobytes(), output.compress_level)
+    else:
+        buffer = io.BytesIO()
+        options: dict = {"quality": output.quality}
+        if output.subsampling is not None:
+            options["subsampling"] = output.subsampling
+        page.save(buffer, format="JPEG", **options)
+        data = buffer.getvalue()
+    return EncodedPage(data, page.size, page.mode, codec, alpha)
+
+
+def write_pdf(
+    fp: IO[bytes],
+    filename: str | os.PathLike,
+    pages: Iterable[EncodedPage],
+    page_count: int,
+    resolution: float = 72.0,
+) -> None:
+    """
+    Writes already encoded pages to `fp` as a PDF, one image per page.
+
+    The file is laid out exactly as Pillow's ``save_all`` PDF writer does, so
+    with default JPEG pages the output is the same as Pillow's; this writer
+    adds Flate-compressed and 1-bit pages.
+    `page_count` must be known up front: the page tree is written first.
+    """
+    pdf = PdfParser.PdfParser(f=fp, filename=os.fspath(filename), mode="w+b")
+    pdf.info["Title"] = os.path.splitext(os.path.basename(filename))[0]
+    pdf.info["CreationDate"] = pdf.info["ModDate"] = time.gmtime()
+
+    pdf.start_writing()
+    pdf.write_header()
+    pdf.write_comment(f"created by Pillow {__version__} PDF driver")
+
+    refs = []
+    for _ in range(page_count):
+        image_ref = pdf.next_object_id(0)
+        page_ref = pdf.next_object_id(0)
+        contents_ref = pdf.next_object_id(0)
+        pdf.pages.append(page_ref)
+        refs.append((image_ref, page_ref, contents_ref))
+    pdf.write_catalog()
+
+    # Raises ValueError if the number of pages does not match `page_count`
+    for page, (image_ref, page_ref, contents_ref) in zip(pages, refs, strict=True):
+        color_space, bits, procset = _COLOR_SPACES[page.mode]
+        width, height = page.size
+        image: dict = {
+            "Type": PdfParser.PdfName("XObject"),
+            "Subtype": PdfParser.PdfName("Image"),
+            "Width": width,
+            "Height": height,
+            "Filter": PdfParser.PdfName(_FILTERS[page.codec]),
+            "Decode": None,
+            "DecodeParms": None,
+            "BitsPerComponent": bits,
+            "ColorSpace": PdfParser.PdfName(color_space),
+        }
+        if page.alpha is not None:
+            image["SMask"] = pdf.write_obj(
+                None,
+                stream=page.alpha,
+                Type=PdfParser.PdfName("XObject"),
+                Subtype=PdfParser.PdfName("Image"),
+                Width=width,
+                Height=height,
+                Filter=PdfParser.PdfName("FlateDecode"),
+                BitsPerComponent=8,
+                ColorSpace=PdfParser.PdfName("DeviceGray"),
+            )
+        pdf.write_obj(image_ref, stream=page.data, **image)
+
+        scaled = (width * 72.0 / resolution, height * 72.0 / resolution)
+        pdf.write_page(
+            page_ref,
+            Resources=PdfParser.PdfDict(
+                ProcSet=[PdfParser.PdfName("PDF"), PdfParser.PdfName(procset)],
+                XObject=PdfParser.PdfDict(image=image_ref),
+            ),
+            MediaBox=[0, 0, *scaled],
+            Contents=contents_ref,
+        )
+        pdf.write_obj(contents_ref, stream=b"q %f 0 0 %f 0 0 cm /image Do Q\n" % scaled)
+
+    pdf.write_xref_and_trailer()
+    fp.flush()
+    pdf.close()
@@ -0,0 +1,77 @@
+import os
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Generic, Iterable, Iterator, Optional, TypeVar
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+# Encoder threads used unless configured; more rarely helps since rendering,
+# on the calling thread, soon becomes the bottleneck
+MAX_DEFAULT_ENCODER_THREADS = 4
+
+
+def default_encoder_threads() -> int:
+    return min(MAX_DEFAULT_ENCODER_THREADS, os.cpu_count() or 1)
+
+
+class OrderedPool(Generic[T, R]):
+    """
+    Push-based counterpart of `encode_ordered`, for producers that hand items
+    over one at a time (output sinks) rather than being iterated.
+
+    `submit` returns the results that became due, in order: once `depth`
+    items are in flight it waits for the oldest. With no `workers`, items are
+    encoded on the calling thread as they are submitted.
+    """
+
+    def __init__(self, encode: Callable[[T], R], workers: int, depth: int):
+        self.encode = encode
+        self.depth = depth
+        self._pool: Optional[ThreadPoolExecutor] = None
+        if workers > 0:
+            self._pool = ThreadPoolExecutor(
+                workers, thread_name_prefix="serial-stamp-encode"
+            )
+        self._pending: deque[Future[R]] = deque()
+
+    def submit(self, item: T) -> list[R]:
+        if self._pool is None:
+            return [self.encode(item)]
+        self._pending.append(self._pool.submit(self.encode, item))
+        done = []
+        while len(self._pending) >= self.depth:
+            done.append(self._pending.popleft().result())
+        return done
+
+    def drain(self) -> Iterator[R]:
+        """Waits for and yields the remaining results, in order."""
+        while self._pending:
+            yield self._pending.popleft().result()
+
+    def close(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown(wait=True, cancel_futures=True)
+
+
+def encode_ordered(
+    pages: Iterable[T], encode: Callable[[T], R], workers: int, depth: int
+) -> Iterator[R]:
+    """
+    Encodes `pages` on a pool of `workers` threads and yields the results in
+    order.
+
+    Pages are pulled from `pages` (rendered) on the calling thread while earlier
+    ones are being encoded. At most `depth` pages are in flight, rendered but
+    not yet handed back: once that many are queued, the next result is waited
+    for before another page is rendered, which keeps memory bounded however
+    slow encoding is. A `depth` of 1 renders and encodes one page at a time.
+    """
+    pool = OrderedPool(encode, workers, depth)
+    try:
+        for page in pages:
+            yield from pool.submit(page)
+        yield from pool.drain()
+    finally:
+        # Reached early if the consumer stopped or encoding failed
+        pool.close()
@@ -0,0 +1,240 @@
+import time
+from collections.abc import Callable, Sequence
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+from PIL import Image, ImageColor, ImageDraw
+
+from serial_stamp.fonts import Font
+from serial_stamp.metrics import Metrics
+from serial_stamp.models import Color, Spec
+from serial_stamp.utils import compiled_template
+
+RGBColor = tuple[int, ...]
+
+# Called with the grid slot and image of each ticket placed
+OnTicket = Callable[[int, Image.Image | None], None]
+
+
+def resolve_color(color: Color) -> RGBColor:
+    """Resolves a spec color (name, hex string or tuple) to an RGB(A) tuple."""
+    if isinstance(color, str):
+        return ImageColor.getrgb(color)
+    return tuple(color)
+
+
+@dataclass(frozen=True, slots=True)
+class TextPlan:
+    template: str
+    position: tuple[float, float]
+    font: Font
+    fill: RGBColor
+
+    def format(self, names: tuple[str, ...], values: Sequence[Any]) -> str:
+        return compiled_template(self.template, names).format(*values)
+
+
+@dataclass(frozen=True, slots=True)
+class RenderPlan:
+    """
+    Everything needed to render tickets and pages, resolved once from a `Spec`.
+
+    Layout geometry, colors, fonts and templates are precomputed so that the
+    per-ticket loop does not touch pydantic models or re-parse anything.
+    """
+
+    template: Image.Image
+    page_size: tuple[int, int]
+    # Paste box of every grid slot, in row-major order
+    slots: tuple[tuple[int, int, int, int], ...]
+    background: RGBColor
+    stack_size: int
+    param_names: tuple[str, ...]
+    texts: tuple[TextPlan, ...]
+    # Render only the text layer of each ticket, not the template under it
+    overlay_only: bool = False
+
+    @property
+    def tickets_per_page(self) -> int:
+        return len(self.slots)
+
+    @classmethod
+    def compile(
+        cls, spec: Spec, template: Image.Image, work_dir: Path = Path(".")
+    ) -> "RenderPlan":
+        layout = spec.layout
+        columns, rows = layout.grid_size
+        gap_x, gap_y = layout.gap_x, layout.gap_y
+        margin_left, margin_top = layout.margin_left, layout.margin_top
+
+        width = int(
+            (template.width + gap_x) * columns
+            - gap_x
+            + layout.margin_right
+            + margin_left
+        )
+        height = int(
+            (template.height + gap_y) * rows - gap_y + margin_top + layout.margin_bottom
+        )
+
+        slots = []
+        for i in range(columns * rows):
+            left = int(margin_left + (i % columns) * (template.width + gap_x))
+            top = int(margin_top + (i // columns) * (template.height + gap_y))
+            slots.append((left, top, left + template.width, top + template.height))
+
+        return cls(
+            template=template,
+            page_size=(width, height),
+            slots=tuple(slots),
+            background=resolve_color(spec.background),
+            stack_size=spec.stack_size,
+            param_names=tuple(param.name for param in spec.params or ()),
+            texts=tuple(
+                TextPlan(
+                    template=text.template,
+                    position=text.position,
+                    font=text.get_font(work_dir),
+                    fill=resolve_color(text.color),
+                )
+                for text in spec.texts
+            ),
+            overlay_only=spec.output.overlay_only,
+        )
+
+    def _names_and_values(
+        self, item: Sequence[str] | dict[str, Any]
+    ) -> tuple[tuple[str, ...], Sequence[Any]]:
+        if isinstance(item, dict):
+            return tuple(item), [str(value) for value in item.values()]
+        return self.param_names, item
+
+    def render_ticket(
+        self, item: Sequence[str] | dict[str, Any], metrics: Metrics | None = None
+    ) -> Image.Image:
+        if metrics is not None:
+            return self._render_ticket_timed(item, metrics)
+
+        image = self.template.copy()
+        draw = ImageDraw.Draw(image)
+        names, values = self._names_and_values(item)
+
+        for text in self.texts:
+            draw.text(
+                text.position,
+                text.format(names, values),
+                font=text.font,
+                fill=text.fill,
+            )
+
+        return image
+
+    def _render_ticket_timed(
+        self, item: Sequence[str] | dict[str, Any], metrics: Metrics
+    ) -> Image.Image:
+        # Same as render_ticket, with each stage timed separately
+        clock = time.perf_counter
+
+        start = clock()
+        image = self.template.copy()
+        draw = ImageDraw.Draw(image)
+        metrics.observe("composite", clock() - start)
+
+        names, values = self._names_and_values(item)
+
+        for text in self.texts:
+            start = clock()
+            content = text.format(names, values)
+            formatted = clock()
+            draw.text(text.position, content, font=text.font, fill=text.fill)
+            metrics.observe("substitute", formatted - start)
+            metrics.observe("rasterize", clock() - formatted)
+
+        metrics.inc("tickets_rendered")
+        return image
+
+    def render_page(
+        self,
+        page_offset: int,
+        stack_items: Sequence[Sequence[str]] | Sequence[dict[str, Any]],
+        metrics: Metrics | None = None,
+        on_ticket: OnTicket | None = None,
+    ) -> Image.Image:
+        """Renders page `page_offset` of a stack, taking every stack_size-th item."""
+        page_items = stack_items[page_offset :: self.stack_size]
+        return self.compose_page(page_items, metrics, on_ticket)
+
+    def compose_page(
+        self,
+        page_items: Sequence[Sequence[str] | dict[str, Any]],
+        metrics: Metrics | None = None,
+        on_ticket: OnTicket | None = None,
+    ) -> Image.Image:
+        """
+        Renders a page of `page_items`, one per grid slot in order. `on_ticket`
+        is called with the slot and image of each ticket as it is placed (no
+        image for overlay pages, which draw no ticket on its own).
+        """
+        if self.overlay_only:
+            return self._compose_overlay_page(page_items, metrics, on_ticket)
+
+        image = Image.new("RGB", self.page_size, self.background)
+
+        if metrics is None:
+            for slot, (box, item) in enumerate(zip(self.slots, page_items)):
+                ticket = self.render_ticket(item)
+                image.paste(ticket, box)
+                if on_ticket is not None:
+                    on_ticket(slot, ticket)
+            return image
+
+        for slot, (box, item) in enumerate(zip(self.slots, page_items)):
+            ticket = self._render_ticket_timed(item, metrics)
+            with metrics.time("composite"):
+                image.paste(ticket, box)
+            if on_ticket is not None:
+                on_ticket(slot, ticket)
+
+        metrics.inc("pages_rendered")
+        return image
+
+    def _compose_overlay_page(
+        self,
+        page_items: Sequence[Sequence[str] | dict[str, Any]],
+        metrics: Metrics | None,
+        on_ticket: OnTicket | None,
+    ) -> Image.Image:
+        # Text is drawn straight onto the page at each slot's offset: there is
+        # no template to copy and no ticket to paste
+        mode = "RGBA" if len(self.background) == 4 else "RGB"
+        image = Image.new(mode, self.page_size, self.background)
+        draw = ImageDraw.Draw(image)
+        clock = time.perf_counter
+
+        for slot, (box, item) in enumerate(zip(self.slots, page_items)):
+            left, top = box[0], box[1]
+            names, values = self._names_and_values(item)
+
+            for text in self.texts:
+                x, y = text.position
+                if metrics is None:
+                    content = text.format(names, values)
+                else:
+                    start = clock()
+                    content = text.format(names, values)
+                    formatted = clock()
+                    metrics.observe("substitute", formatted - start)
+
+                draw.text((left + x, top + y), content, font=text.font, fill=text.fill)
+                if metrics is not None:
+                    metrics.observe("rasterize", clock() - formatted)
+
+            if metrics is not None:
+                metrics.inc("tickets_rendered")
+            if on_ticket is not None:
+                on_ticket(slot, None)
+
+        if metrics is not None:
+            metrics.inc("pages_rendered")
+        return image
@@ -0,0 +1,128 @@
+import sys
+import threading
+from collections import Counter
+from pathlib import Path
+from types import FrameType
+
+# Innermost frames of threads blocked waiting for work, locks or other threads:
+# an idle encoder pool thread sits in _worker, inside SimpleQueue.get (C code)
+IDLE_FRAMES = frozenset(
+    {
+        "concurrent.futures.thread:_worker",
+        "queue:get",
+        "selectors:select",
+        "threading:_wait_for_tstate_lock",
+        "threading:wait",
+    }
+)
+
+
+def _frame_name(frame: FrameType) -> str:
+    module = frame.f_globals.get("__name__", "?")
+    return f"{module}:{frame.f_code.co_name}"
+
+
+class SamplingProfiler:
+    """
+    Statistical profiler that samples the Python stacks of every thread.
+
+    A background thread records the current stack of all other threads each
+    `interval` seconds, so worker threads are profiled along with the main one.
+    Stacks are kept in collapsed form (``thread;outer;...;inner``), the input
+    format of flamegraph tools. Time spent inside C code (Pillow's drawing and
+    encoding) is attributed to the Python function that called into it.
+    Threads that are waiting (see `IDLE_FRAMES`) are not recorded, so idle
+    pool threads do not dilute the share of the ones doing work.
+    """
+
+    def __init__(self, interval: float = 0.002):
+        self.interval = interval
+        self.stacks: Counter[str] = Counter()
+        self.samples = 0
+        # Thread stacks skipped because the thread was waiting
+        self.idle = 0
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def _sample(self):
+        own_id = threading.get_ident()
+        names = {thread.ident: thread.name for thread in threading.enumerate()}
+
+        for thread_id, frame in sys._current_frames().items():
+            if thread_id == own_id:
+                continue
+            if _frame_name(frame) in IDLE_FRAMES:
+                self.idle += 1
+                continue
+            stack = []
+            current: FrameType | None = frame
+            while current is not None:
+                stack.append(_frame_name(current))
+                current = current.f_back
+            stack.append(names.get(thread_id, f"thread-{thread_id}"))
+            self.stacks[";".join(reversed(stack))] += 1
+
+        self.samples += 1
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self._sample()
+
+    def start(self):
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._run, name="serial-stamp-profiler", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.stop()
+
+    def write_folded(self, path: Path):
+        """Writes the collapsed stacks, one ``stack count`` line each."""
+        with open(path, "w", encoding="utf-8") as f:
+            for stack, count in sorted(self.stacks.items()):
+                f.write(f"{stack} {count}\n")
+
+    def top_functions(self, n: int = 20) -> list[tuple[str, int, int]]:
+        """
+        The `n` functions with the most samples, as (function, self samples,
+        total samples). Self samples are those where the function was running
+        (or in C code it called); total ones include its callees.
+        """
+        own: Counter[str] = Counter()
+        total: Counter[str] = Counter()
+        for stack, count in self.stacks.items():
+            # First frame is the thread name
+            frames = stack.split(";")[1:]
+            if not frames:
+                continue
+            own[frames[-1]] += count
+            for name in set(frames):
+                total[name] += count
+
+        ranked = sorted(total, key=lambda name: (own[name], total[name]), reverse=True)
+        return [(name, own[name], total[name]) for name in ranked[:n]]
+
+    def summary(self, n: int = 20) -> str:
+        sampled = sum(self.stacks.values())
+        lines = [
+            f"Top {n} functions by samples ({sampled} samples every "
+            f"{self.interval * 1e3:g}ms; {self.idle} of waiting threads "
+            f"skipped):",
+            f"{'self%':>7} {'total%':>7}  function",
+        ]
+        for name, own, total in self.top_functions(n):
+            # Shares of the samples of running threads, not of all threads
+            lines.append(f"{own / sampled:>7.1%} {total / sampled:>7.1%}  {name}")
+        return "\n".join(lines)
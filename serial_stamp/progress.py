@@ -0,0 +1,204 @@
+import json
+import sys
+import time
+from collections import deque
+from collections.abc import Callable
+from dataclasses import asdict, dataclass
+from typing import Literal, TextIO
+
+Phase = Literal["render", "write", "done"]
+
+
+@dataclass(frozen=True, slots=True)
+class ProgressEvent:
+    """Snapshot of a running generation, as passed to progress callbacks."""
+
+    phase: Phase
+    tickets_done: int
+    ticket_count: int
+    pages_done: int
+    page_count: int
+    bytes_written: int
+    elapsed_seconds: float
+    # Rolling rates over the last few seconds
+    tickets_per_second: float | None
+    pages_per_second: float | None
+    # Estimated time until all pages are rendered; None until a rate is known
+    eta_seconds: float | None
+    rss_bytes: int | None
+
+    @property
+    def fraction(self) -> float:
+        """Rendered share of the pages (of the tickets if there are no pages)."""
+        if self.phase == "done":
+            return 1.0
+        if not self.page_count:
+            if not self.ticket_count:
+                return 1.0
+            return self.tickets_done / self.ticket_count
+        return self.pages_done / self.page_count
+
+    def as_dict(self) -> dict:
+        return asdict(self)
+
+
+ProgressCallback = Callable[[ProgressEvent], None]
+
+
+def current_rss_bytes() -> int | None:
+    """Resident memory of this process, or None where it cannot be read."""
+    try:
+        import resource
+    except ImportError:
+        # Not available on Windows
+        return None
+
+    try:
+        with open("/proc/self/statm", "rb") as f:
+            return int(f.read().split()[1]) * resource.getpagesize()
+    except (OSError, IndexError, ValueError):
+        # No /proc (macOS): fall back to the peak, reported there in bytes
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == "darwin" else peak * 1024
+
+
+class ProgressReporter:
+    """
+    Turns the engine's per-page updates into rate-limited `ProgressEvent`s.
+
+    At most one event is emitted every `min_interval` seconds, plus a final
+    ``done`` event, so callbacks stay cheap however fast pages are rendered.
+    Throughput is averaged over the last `window` seconds. Runs without pages
+    (per-ticket exports) have a `page_count` of 0 and report tickets only.
+    """
+
+    def __init__(
+        self,
+        callback: ProgressCallback,
+        ticket_count: int,
+        page_count: int,
+        min_interval: float = 0.25,
+        window: float = 5.0,
+    ):
+        self.callback = callback
+        self.ticket_count = ticket_count
+        self.page_count = page_count
+        self.min_interval = min_interval
+        self.window = window
+
+        self.tickets_done = 0
+        self.pages_done = 0
+        self.bytes_written = 0
+        self._start = time.perf_counter()
+        self._last_emit = float("-inf")
+        # (time, tickets done, pages done) samples within the rate window
+        self._samples: deque[tuple[float, int, int]] = deque([(self._start, 0, 0)])
+
+    def page_rendered(self, tickets: int):
+        self.pages_done += 1
+        self.tickets_rendered(tickets)
+
+    def tickets_rendered(self, tickets: int):
+        self.tickets_done += tickets
+        now = time.perf_counter()
+        self._samples.append((now, self.tickets_done, self.pages_done))
+        if now - self._last_emit >= self.min_interval:
+            self._emit("render", now)
+
+    def _rendering(self) -> bool:
+        if self.page_count:
+            return self.pages_done < self.page_count
+        return self.tickets_done < self.ticket_count
+
+    def update_bytes(self, total: int):
+        self.bytes_written = total
+        # Pages are written as they are rendered; only the tail of the file is
+        # written after the last page, and reported as its own phase
+        if self._rendering():
+            return
+        now = time.perf_counter()
+        if now - self._last_emit >= self.min_interval:
+            self._emit("write", now)
+
+    def finish(self):
+        self._emit("done", time.perf_counter())
+
+    def _rates(self, now: float) -> tuple[float | None, float | None]:
+        while len(self._samples) > 2 and now - self._samples[1][0] >= self.window:
+            self._samples.popleft()
+
+        then, tickets, pages = self._samples[0]
+        span = self._samples[-1][0] - then
+        if span <= 0:
+            return None, None
+        return (
+            (self.tickets_done - tickets) / span,
+            (self.pages_done - pages) / span,
+        )
+
+    def _emit(self, phase: Phase, now: float):
+        self._last_emit = now
+        tickets_per_second, pages_per_second = self._rates(now)
+
+        eta = None
+        if phase == "done":
+            eta = 0.0
+        elif self.page_count and pages_per_second:
+            eta = (self.page_count - self.pages_done) / pages_per_second
+        elif not self.page_count and tickets_per_second:
+            eta = (self.ticket_count - self.tickets_done) / tickets_per_second
+
+        self.callback(
+            ProgressEvent(
+                phase=phase,
+                tickets_done=self.tickets_done,
+                ticket_count=self.ticket_count,
+                pages_done=self.pages_done,
+                page_count=self.page_count,
+                bytes_written=self.bytes_written,
+                elapsed_seconds=now - self._start,
+                tickets_per_second=tickets_per_second,
+                pages_per_second=pages_per_second,
+                eta_seconds=eta,
+                rss_bytes=current_rss_bytes(),
+            )
+        )
+
+
+def jsonl_progress(stream: TextIO | None = None) -> ProgressCallback:
+    """Callback writing each event as one JSON line (to stderr by default)."""
+
+    def write(event: ProgressEvent):
+        out = stream if stream is not None else sys.stderr
+        out.write(json.dumps(event.as_dict()) + "\n")
+        out.flush()
+
+    return write
+
+
+def format_progress(event: ProgressEvent) -> str:
+    """Short human-readable description of an event, for logs and status bars."""
+    if event.page_count:
+        line = f"page {event.pages_done}/{event.page_count}"
+    else:
+        line = f"ticket {event.tickets_done}/{event.ticket_count}"
+    if event.phase == "write":
+        line += f", writing ({event.bytes_written / 1e6:.1f} MB)"
+    elif event.phase == "done":
+        line += f", done in {event.elapsed_seconds:.1f}s"
+    if event.tickets_per_second and event.phase != "done":
+        line += f", {event.tickets_per_second:.0f} tickets/s"
+    if event.eta_seconds and event.phase == "render":
+        line += f", ETA {event.eta_seconds:.0f}s"
+    return line
+
+
+def text_progress(stream: TextIO | None = None) -> ProgressCallback:
+    """Callback writing `format_progress` lines (to stdout by default)."""
+
+    def write(event: ProgressEvent):
+        out = stream if stream is not None else sys.stdout
+        out.write(format_progress(event) + "\n")
+        out.flush()
+
+    return write
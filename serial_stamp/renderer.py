@@ -0,0 +1,149 @@
+import io
+import os
+import threading
+from pathlib import Path
+from typing import Any, Mapping, Optional, Sequence
+
+from PIL import Image
+
+from serial_stamp.engine import Engine
+from serial_stamp.export import image_format, image_save_options
+from serial_stamp.models import Spec, TableSource
+from serial_stamp.project import Project
+from serial_stamp.spec_cache import load_spec
+from serial_stamp.tables import RowIndex, SqliteRowIndex
+
+
+class TicketRenderer:
+    """
+    Renders single tickets on request, as encoded image bytes, for services
+    that hand out tickets one at a time (e.g. when a customer downloads theirs).
+
+    The template, fonts and compiled text templates are prepared once and kept
+    warm, so a ticket costs one render and one encode. Renderers are
+    thread-safe: drawing (which holds the GIL anyway) is serialized, while
+    encoding, the larger share, runs in parallel.
+    """
+
+    def __init__(
+        self,
+        spec: Spec,
+        source_image: Image.Image,
+        work_dir: Path = Path("."),
+        format: str = "png",
+    ):
+        self.spec = spec
+        self.format = image_format(f"ticket.{format}")
+        self._engine = Engine(spec, Path(f"ticket.{format}"), source_image, work_dir)
+        self._plan = self._engine.compile_plan()
+        self._save_options = image_save_options(self.format, spec.output)
+        self._lock = threading.Lock()
+        self._rows: Optional[RowIndex | SqliteRowIndex] = None
+        self._product = None
+        self._project: Optional[Project] = None
+        self._tickets: Optional[int] = None
+
+        if spec.params is not None:
+            self._product = self._engine._get_items_iterator()
+            # Compile the text templates ahead of the first ticket
+            names = self._plan.param_names
+            for text in self._plan.texts:
+                text.format(names, [""] * len(names))
+
+    @classmethod
+    def open(
+        cls,
+        path: str | os.PathLike,
+        format: str = "png",
+        use_cache: bool = True,
+    ) -> "TicketRenderer":
+        """
+        A renderer for the project at `path` (directory, spec file or packed
+        ``.stamp``), which stays open until the renderer is closed.
+        """
+        project = Project(Path(path)).__enter__()
+        try:
+            spec = load_spec(project.spec_path, use_cache=use_cache)
+            with Image.open(project.work_dir / spec.source_image) as source_image:
+                renderer = cls(spec, source_image, project.work_dir, format)
+        except BaseException:
+            project.__exit__(None, None, None)
+            raise
+        renderer._project = project
+        return renderer
+
+    @property
+    def media_type(self) -> str:
+        """The MIME type of rendered tickets, e.g. ``image/png``."""
+        return Image.MIME.get(self.format, "application/octet-stream")
+
+    @property
+    def ticket_count(self) -> int:
+        """The number of tickets of the run, which `render_index` selects from."""
+        if self._tickets is None:
+            self._tickets = self._engine._calculate_total_tickets()
+        return self._tickets
+
+    def render(self, values: Mapping[str, Any] | Sequence[str]) -> bytes:
+        """
+        Renders the ticket for `values`: a mapping of variable names to values,
+        or a sequence of values in the order of the spec's parameters.
+        """
+        if isinstance(values, Mapping):
+            item: Any = dict(values)
+        else:
+            item = tuple(values)
+            if len(item) != len(self._plan.param_names):
+                raise ValueError(
+                    f"Expected {len(self._plan.param_names)} values "
+                    f"({', '.join(self._plan.param_names)}), got {len(item)}"
+                )
+        with self._lock:
+            image = self._draw(item)
+        return self._encode(image)
+
+    def render_index(self, index: int) -> bytes:
+        """Renders the ticket at 0-based position `index` of the run."""
+        if not 0 <= index < self.ticket_count:
+            raise IndexError(
+                f"Ticket {index} out of range for {self.ticket_count} tickets"
+            )
+        with self._lock:
+            image = self._draw(self._item_at(index))
+        return self._encode(image)
+
+    def _item_at(self, index: int) -> Any:
+        spec = self.spec
+        if self._product is not None:
+            return self._product.at(index)
+        if isinstance(spec.table, TableSource):
+            if self._rows is None:
+                # Indexed on first use; kept open for the following lookups
+                self._rows = spec.table.index_rows(self._engine.work_dir)
+            return self._rows[index]
+        assert spec.table is not None
+        return spec.table[index]
+
+    def _draw(self, item: Any) -> Image.Image:
+        return self._engine._convert_page(self._plan.render_ticket(item))
+
+    def _encode(self, image: Image.Image) -> bytes:
+        buffer = io.BytesIO()
+        image.save(buffer, format=self.format, **self._save_options)
+        return buffer.getvalue()
+
+    def close(self) -> None:
+        """Closes the table index and project, if any."""
+        with self._lock:
+            if self._rows is not None:
+                self._rows.close()
+                self._rows = None
+            if self._project is not None:
+                self._project.__exit__(None, None, None)
+                self._project = None
+
+    def __enter__(self) -> "TicketRenderer":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
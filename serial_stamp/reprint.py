@@ -0,0 +1,183 @@
+import os
+import sqlite3
+from dataclasses import dataclass, replace
+from pathlib import Path
+from typing import Any, Optional, Sequence
+
+from serial_stamp.engine import Engine, GenerationSummary
+from serial_stamp.progress import ProgressCallback
+from serial_stamp.tables import _quote_identifier, _sqlite_connect
+
+
+@dataclass(frozen=True, slots=True)
+class TicketSelector:
+    """
+    One comma-separated part of a ``--tickets`` selection: a number, an
+    inclusive range of numbers (``1300-1310``) or any other literal value.
+    """
+
+    low: Optional[int] = None
+    high: Optional[int] = None
+    value: Optional[str] = None
+
+    def matches(self, value: Any) -> bool:
+        if value is None:
+            return False
+        if self.value is not None:
+            return str(value) == self.value
+        assert self.low is not None and self.high is not None
+        try:
+            # Zero-padded serials ("0042") match their number
+            number = int(str(value))
+        except ValueError:
+            return False
+        return self.low <= number <= self.high
+
+
+def parse_tickets(text: str) -> list[TicketSelector]:
+    """Parses a selection such as ``1234,1300-1310``."""
+    selectors = []
+    for part in text.split(","):
+        part = part.strip()
+        if not part:
+            continue
+        low, dash, high = part.partition("-")
+        try:
+            if dash:
+                selectors.append(TicketSelector(int(low), int(high)))
+            else:
+                selectors.append(TicketSelector(int(part), int(part)))
+        except ValueError:
+            selectors.append(TicketSelector(value=part))
+    if not selectors:
+        raise ValueError("No tickets selected")
+    return selectors
+
+
+def find_tickets(
+    engine: Engine,
+    selectors: Sequence[TicketSelector],
+    by: Optional[str] = None,
+    manifest: Optional[str | os.PathLike] = None,
+) -> list[int]:
+    """
+    The 0-based indices, ascending, of the selected tickets.
+
+    Without `by`, selectors are ticket numbers (1-based positions in the run,
+    the manifest's ``ticket`` column). With `by`, they match the values of
+    that variable, looked up in a SQLite `manifest` if given, or else by
+    reading (not rendering) every ticket's values.
+    """
+    count = engine._calculate_total_tickets()
+    if by is None:
+        indices: set[int] = set()
+        for selector in selectors:
+            if selector.low is None or selector.high is None:
+                raise ValueError(
+                    f"'{selector.value}' is not a ticket number (use --by to "
+                    "select tickets by a variable)"
+                )
+            if not 1 <= selector.low <= selector.high <= count:
+                raise ValueError(
+                    f"Tickets {selector.low}-{selector.high} are not all "
+                    f"within the {count} tickets"
+                )
+            indices.update(range(selector.low - 1, selector.high))
+        return sorted(indices)
+
+    if manifest is not None:
+        return _find_in_manifest(engine, Path(manifest), selectors, by)
+
+    names = tuple(param.name for param in engine.spec.params or ())
+    if engine.spec.params is not None and by not in names:
+        raise ValueError(f"Unknown variable '{by}'")
+    position = names.index(by) if by in names else -1
+
+    found = []
+    for index, item in enumerate(engine._get_items_iterator()):
+        value = item.get(by) if isinstance(item, dict) else item[position]
+        if any(selector.matches(value) for selector in selectors):
+            found.append(index)
+    return found
+
+
+def _find_in_manifest(
+    engine: Engine, path: Path, selectors: Sequence[TicketSelector], by: str
+) -> list[int]:
+    layout = engine.page_layout()
+    connection = _sqlite_connect(path)
+    try:
+        meta = dict(connection.execute("SELECT key, value FROM meta").fetchall())
+        expected = {
+            "tickets": layout.tickets,
+            "pages": layout.pages,
+            "stack_size": layout.stack_size,
+            "tickets_per_page": layout.tickets_per_page,
+        }
+        if meta != expected:
+            raise ValueError(f"Manifest {path} was written for a different run")
+
+        columns = [
+            row["name"] for row in connection.execute("PRAGMA table_info(tickets)")
+        ]
+        if by not in columns:
+            raise ValueError(f"Manifest {path} has no column '{by}'")
+
+        column = _quote_identifier(by)
+        found: set[int] = set()
+        for selector in selectors:
+            if selector.value is not None:
+                rows = connection.execute(
+                    f"SELECT ticket, {column} FROM tickets WHERE {column} = ?",
+                    (selector.value,),
+                )
+            else:
+                # Uses the numeric index; non-numbers cast to 0 are checked below
+                rows = connection.execute(
+                    f"SELECT ticket, {column} FROM tickets "
+                    f"WHERE CAST({column} AS INTEGER) BETWEEN ? AND ?",
+                    (selector.low, selector.high),
+                )
+            found.update(
+                ticket - 1 for ticket, value in rows if selector.matches(value)
+            )
+    except sqlite3.DatabaseError as e:
+        raise ValueError(f"Cannot read manifest {path}: {e}") from e
+    finally:
+        connection.close()
+    return sorted(found)
+
+
+def reprint_pages(
+    engine: Engine,
+    indices: Sequence[int],
+    on_progress: Optional[ProgressCallback] = None,
+) -> Optional[GenerationSummary]:
+    """
+    Renders only the pages holding the tickets at `indices`, exactly as
+    they were printed, so they can replace the damaged sheets in their stacks.
+    """
+    layout = engine.page_layout()
+    pages = sorted({layout.position(index)[0] for index in indices})
+    return engine.generate(on_progress=on_progress, pages=pages)
+
+
+def reprint_tickets(
+    engine: Engine,
+    indices: Sequence[int],
+    on_progress: Optional[ProgressCallback] = None,
+) -> Optional[GenerationSummary]:
+    """
+    Renders just the tickets at `indices`, laid out afresh one after the
+    other on as few pages as possible (without stacking).
+    """
+    names = tuple(param.name for param in engine.spec.params or ())
+    with engine._ticket_source() as item_at:
+        items = [item_at(index) for index in indices]
+    rows = [
+        item if isinstance(item, dict) else dict(zip(names, item)) for item in items
+    ]
+    spec = engine.spec.model_copy(
+        update={"params": None, "table": rows, "stack_size": 1}
+    )
+    return replace(engine, spec=spec).generate(on_progress=on_progress)
@@ -0,0 +1,488 @@
+import hashlib
+import json
+import shutil
+import tempfile
+import threading
+import time
+import uuid
+import zipfile
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field, replace
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from io import BufferedIOBase
+from pathlib import Path
+from typing import Any, Literal, Optional
+from urllib.parse import parse_qsl, urlsplit
+
+from PIL import Image
+from pydantic import ValidationError
+
+from serial_stamp.engine import Engine, GenerationSummary
+from serial_stamp.models import Output, Spec
+from serial_stamp.plan import RenderPlan
+from serial_stamp.progress import ProgressEvent
+from serial_stamp.project import Project
+from serial_stamp.spec_cache import load_spec
+
+# Output formats of jobs, with their file suffix and media type
+JOB_FORMATS = {"pdf": (".pdf", "application/pdf"), "tiff": (".tiff", "image/tiff")}
+
+# Bytes of an upload or download copied at a time
+CHUNK_SIZE = 1 << 20
+
+# Seconds between keep-alive comments on event streams of idle jobs
+KEEPALIVE_SECONDS = 15.0
+
+JobState = Literal["queued", "running", "done", "failed", "cancelled"]
+
+
+@dataclass(frozen=True, slots=True)
+class LoadedProject:
+    """A project ready to render: spec, source image and compiled plan."""
+
+    spec: Spec
+    work_dir: Path
+    source_image: Image.Image
+    plan: RenderPlan
+
+
+def _file_stamp(path: Path) -> tuple[int, int]:
+    stat = path.stat()
+    return stat.st_mtime_ns, stat.st_size
+
+
+class ProjectCache:
+    """
+    Recently used projects, kept warm between jobs.
+
+    Packed projects are extracted once, and the spec, source image and render
+    plan (template and fonts) are reused until the spec file or image changes.
+    Fonts are shared by the process-wide font registry in any case.
+    """
+
+    def __init__(self, directory: Path, max_projects: int = 16, use_cache: bool = True):
+        self.directory = directory
+        self.max_projects = max_projects
+        self.use_cache = use_cache
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        # spec path -> (spec and image file stamps, project)
+        self._projects: OrderedDict[str, tuple[tuple, LoadedProject]] = OrderedDict()
+
+    def store_upload(self, f: BufferedIOBase, length: int) -> Path:
+        """
+        Saves an uploaded packed project under its content hash, so that the
+        same upload always maps to the same (warm) project.
+        """
+        uploads = self.directory / "uploads"
+        uploads.mkdir(parents=True, exist_ok=True)
+        digest = hashlib.sha256()
+        with tempfile.NamedTemporaryFile(dir=uploads, delete=False) as out:
+            try:
+                remaining = length
+                while remaining > 0:
+                    chunk = f.read(min(CHUNK_SIZE, remaining))
+                    if not chunk:
+                        raise ValueError("Upload ended early")
+                    digest.update(chunk)
+                    out.write(chunk)
+                    remaining -= len(chunk)
+            except BaseException:
+                Path(out.name).unlink()
+                raise
+
+        path = uploads / f"{digest.hexdigest()[:32]}.stamp"
+        if path.exists():
+            # Keep the earlier copy, whose extracted project is already cached
+            Path(out.name).unlink()
+            return path
+        Path(out.name).replace(path)
+        if not zipfile.is_zipfile(path):
+            path.unlink()
+            raise ValueError("Upload is not a packed project (.stamp or .zip)")
+        return path
+
+    def _unpacked(self, path: Path) -> Project:
+        # Packed projects are extracted once into the cache directory, keyed by
+        # path and modification, rather than into a new temporary directory
+        if path.is_file() and path.suffix != ".toml":
+            key = hashlib.sha256(f"{path}:{_file_stamp(path)}".encode()).hexdigest()
+            target = self.directory / "projects" / key[:32]
+            if not target.is_dir():
+                target.parent.mkdir(parents=True, exist_ok=True)
+                staging = Path(tempfile.mkdtemp(dir=target.parent))
+                with zipfile.ZipFile(path) as zf:
+                    zf.extractall(staging)
+                staging.rename(target)
+            path = target
+        return Project(path).__enter__()
+
+    def load(self, path: Path) -> LoadedProject:
+        """The project at `path`, from the cache unless its files changed."""
+        with self._lock:
+            project = self._unpacked(path.resolve())
+            spec_path = project.spec_path
+            if not spec_path.is_file():
+                raise FileNotFoundError(f"Spec file not found at {spec_path}")
+
+            cached = self._projects.get(str(spec_path))
+            if cached is not None:
+                stamps, loaded = cached
+                image_path = loaded.work_dir / loaded.spec.source_image
+                if stamps == (_file_stamp(spec_path), _file_stamp(image_path)):
+                    self._projects.move_to_end(str(spec_path))
+                    self.hits += 1
+                    return loaded
+
+            self.misses += 1
+            spec = load_spec(spec_path, use_cache=self.use_cache)
+            image_path = project.work_dir / spec.source_image
+            with Image.open(image_path) as image:
+                source_image = image.copy()
+            engine = Engine(spec, Path("unused.pdf"), source_image, project.work_dir)
+            loaded = LoadedProject(
+                spec, project.work_dir, source_image, engine.compile_plan()
+            )
+
+            stamps = (_file_stamp(spec_path), _file_stamp(image_path))
+            self._projects[str(spec_path)] = (stamps, loaded)
+            self._projects.move_to_end(str(spec_path))
+            while len(self._projects) > self.max_projects:
+                self._projects.popitem(last=False)
+            return loaded
+
+
+def output_settings(settings: dict[str, Any]) -> dict[str, Any]:
+    """
+    Validates [output] overrides given to a job (by their spec file names,
+    e.g. ``compress-level``, or field names) and returns them by spec name.
+    """
+    names: dict[str, str] = {}
+    for name, info in Output.model_fields.items():
+        names[name] = names[info.alias or name] = info.alias or name
+    unknown = sorted(set(settings) - set(names))
+    if unknown:
+        raise ValueError(f"Unknown output settings: {', '.join(unknown)}")
+    settings = {names[name]: value for name, value in settings.items()}
+    try:
+        Output.model_validate(settings)
+    except ValidationError as e:
+        raise ValueError(f"Invalid output settings: {e}") from e
+    return settings
+
+
+@dataclass(eq=False)
+class Job:
+    """A queued `generate` run and what is known of it so far."""
+
+    id: str
+    project: Path
+    format: str
+    settings: dict[str, Any]
+    output: Path
+    created: float = field(default_factory=time.time)
+    state: JobState = "queued"
+    event: Optional[ProgressEvent] = None
+    summary: Optional[GenerationSummary] = None
+    error: Optional[str] = None
+    # Bumped on every change, for event streams waiting on the next one
+    version: int = 0
+    _changed: threading.Condition = field(
+        default_factory=threading.Condition, repr=False
+    )
+
+    @property
+    def finished(self) -> bool:
+        return self.state in ("done", "failed", "cancelled")
+
+    def update(self, **changes: Any) -> None:
+        with self._changed:
+            for name, value in changes.items():
+                setattr(self, name, value)
+            self.version += 1
+            self._changed.notify_all()
+
+    def wait(self, version: int, timeout: float) -> int:
+        """Waits until the job changes after `version`; returns the new version."""
+        with self._changed:
+            self._changed.wait_for(lambda: self.version != version, timeout)
+            return self.version
+
+    def as_dict(self) -> dict[str, Any]:
+        summary = None
+        if self.summary is not None:
+            summary = {
+                "tickets": self.summary.tickets,
+                "pages": self.summary.pages,
+                "bytes_written": self.summary.bytes_written,
+                "elapsed_seconds": self.summary.elapsed_seconds,
+                "peak_rss_bytes": self.summary.peak_rss_bytes,
+                "description": self.summary.describe(),
+            }
+        links = {"self": f"/jobs/{self.id}", "events": f"/jobs/{self.id}/events"}
+        if self.state == "done":
+            links["output"] = f"/jobs/{self.id}/output"
+        return {
+            "id": self.id,
+            "state": self.state,
+            "project": str(self.project),
+            "format": self.format,
+            "created": self.created,
+            "progress": self.event.as_dict() if self.event is not None else None,
+            "summary": summary,
+            "error": self.error,
+            "links": links,
+        }
+
+
+class RenderService:
+    """
+    Runs `generate` jobs on a pool of worker threads, keeping the projects of
+    recent jobs warm in a `ProjectCache`. Outputs, uploads and extracted
+    projects are kept in `data_dir`.
+    """
+
+    def __init__(self, data_dir: Path, workers: int = 2, use_cache: bool = True):
+        self.data_dir = data_dir
+        self.projects = ProjectCache(data_dir, use_cache=use_cache)
+        (data_dir / "jobs").mkdir(parents=True, exist_ok=True)
+        self._pool = ThreadPoolExecutor(workers, thread_name_prefix="job")
+        self._lock = threading.Lock()
+        self._jobs: dict[str, Job] = {}
+        self._futures: dict[str, Future] = {}
+
+    def submit(
+        self,
+        project: Path,
+        format: str = "pdf",
+        settings: Optional[dict[str, Any]] = None,
+    ) -> Job:
+        if format not in JOB_FORMATS:
+            raise ValueError(
+                f"Unknown format '{format}' (use {' or '.join(JOB_FORMATS)})"
+            )
+        if not project.exists():
+            raise ValueError(f"Project path not found: {project}")
+        settings = output_settings(settings or {})
+
+        job_id = uuid.uuid4().hex[:16]
+        suffix = JOB_FORMATS[format][0]
+        output = self.data_dir / "jobs" / f"{job_id}{suffix}"
+        job = Job(job_id, project.resolve(), format, settings, output)
+        with self._lock:
+            self._jobs[job_id] = job
+            self._futures[job_id] = self._pool.submit(self._run, job)
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def jobs(self) -> list[Job]:
+        with self._lock:
+            return list(self._jobs.values())
+
+    def delete(self, job_id: str) -> bool:
+        """
+        Cancels a queued job, or forgets a finished one and deletes its output.
+        Running jobs cannot be stopped: returns False for them.
+        """
+        with self._lock:
+            job, future = self._jobs[job_id], self._futures[job_id]
+            if not future.cancel() and not future.done():
+                return False
+            if future.cancelled():
+                job.update(state="cancelled")
+            del self._jobs[job_id], self._futures[job_id]
+        job.output.unlink(missing_ok=True)
+        return True
+
+    def _run(self, job: Job) -> None:
+        job.update(state="running")
+        try:
+            loaded = self.projects.load(job.project)
+            spec = loaded.spec
+            if job.settings:
+                output = Output.model_validate(
+                    {**spec.output.model_dump(by_alias=True), **job.settings}
+                )
+                spec = spec.model_copy(update={"output": output})
+            # The plan only depends on the output settings through this flag
+            plan = replace(loaded.plan, overlay_only=spec.output.overlay_only)
+
+            engine = Engine(spec, job.output, loaded.source_image, loaded.work_dir)
+            summary = engine.generate(
+                plan=plan, on_progress=lambda event: job.update(event=event)
+            )
+        except Exception as e:
+            job.output.unlink(missing_ok=True)
+            job.update(state="failed", error=str(e))
+            return
+        job.update(state="done", summary=summary)
+
+    def close(self) -> None:
+        """Cancels queued jobs and waits for the running ones."""
+        self._pool.shutdown(wait=True, cancel_futures=True)
+        for job in self.jobs():
+            if job.state == "queued":
+                job.update(state="cancelled")
+
+
+class RenderServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address: tuple[str, int], service: RenderService):
+        super().__init__(address, RequestHandler)
+        self.service = service
+
+
+class RequestHandler(BaseHTTPRequestHandler):
+    """
+    The HTTP API of a `RenderService`:
+
+    - ``POST /jobs``: queues a job, for a JSON body ``{"project": PATH,
+      "format": "pdf", "output": {...}}`` or an uploaded packed project
+      (``application/zip``, options in the query string).
+    - ``GET /jobs``, ``GET /jobs/ID``: job states and progress.
+    - ``GET /jobs/ID/events``: server-sent events, one per change of the job
+      (named after its state, with the job as data), until it finishes.
+    - ``GET /jobs/ID/output``: the finished PDF or TIFF.
+    - ``DELETE /jobs/ID``: cancels a queued job or deletes a finished one.
+    """
+
+    server: RenderServer
+    server_version = "serial-stamp"
+
+    def _send_json(self, status: HTTPStatus, data: Any) -> None:
+        body = json.dumps(data).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_error(self, status: HTTPStatus, message: str) -> None:
+        self._send_json(status, {"error": message})
+
+    def _route(self) -> tuple[Optional[Job], str]:
+        """The job of the request path (None for /jobs) and what follows it."""
+        parts = urlsplit(self.path).path.strip("/").split("/")
+        if parts[0] != "jobs" or len(parts) > 3:
+            raise LookupError(self.path)
+        if len(parts) == 1:
+            return None, ""
+        job = self.server.service.get(parts[1])
+        if job is None:
+            raise LookupError(f"No job '{parts[1]}'")
+        return job, parts[2] if len(parts) == 3 else ""
+
+    def do_GET(self) -> None:
+        try:
+            job, rest = self._route()
+        except LookupError as e:
+            return self._send_error(HTTPStatus.NOT_FOUND, f"Not found: {e}")
+
+        if job is None:
+            jobs = [job.as_dict() for job in self.server.service.jobs()]
+            return self._send_json(HTTPStatus.OK, jobs)
+        if rest == "":
+            return self._send_json(HTTPStatus.OK, job.as_dict())
+        if rest == "events":
+            return self._send_events(job)
+        if rest == "output":
+            return self._send_output(job)
+        self._send_error(HTTPStatus.NOT_FOUND, f"Not found: {self.path}")
+
+    def _send_events(self, job: Job) -> None:
+        self.send_response(HTTPStatus.OK)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.end_headers()
+
+        version = -1
+        while True:
+            changed = job.wait(version, KEEPALIVE_SECONDS)
+            if changed == version:
+                message = ": keep-alive\n\n"
+            else:
+                version = changed
+                data = json.dumps(job.as_dict())
+                message = f"id: {version}\nevent: {job.state}\ndata: {data}\n\n"
+            try:
+                self.wfile.write(message.encode("utf-8"))
+                self.wfile.flush()
+            except (BrokenPipeError, ConnectionResetError):
+                return
+            if job.finished and changed == job.version:
+                return
+
+    def _send_output(self, job: Job) -> None:
+        if job.state != "done":
+            return self._send_error(
+                HTTPStatus.CONFLICT, f"Job {job.id} is {job.state}, not done"
+            )
+        media_type = JOB_FORMATS[job.format][1]
+        with open(job.output, "rb") as f:
+            self.send_response(HTTPStatus.OK)
+            self.send_header("Content-Type", media_type)
+            self.send_header("Content-Length", str(job.output.stat().st_size))
+            self.send_header(
+                "Content-Disposition", f'attachment; filename="{job.output.name}"'
+            )
+            self.end_headers()
+            shutil.copyfileobj(f, self.wfile, CHUNK_SIZE)
+
+    def do_POST(self) -> None:
+        try:
+            job, _ = self._route()
+        except LookupError as e:
+            return self._send_error(HTTPStatus.NOT_FOUND, f"Not found: {e}")
+        if job is not None:
+            return self._send_error(HTTPStatus.METHOD_NOT_ALLOWED, "Use POST /jobs")
+
+        service = self.server.service
+        length = int(self.headers.get("Content-Length") or 0)
+        content_type = self.headers.get_content_type()
+        try:
+            if content_type == "application/json":
+                request = json.loads(self.rfile.read(length) or b"{}")
+                if not isinstance(request, dict) or "project" not in request:
+                    raise ValueError('Expected a JSON object with a "project" path')
+                project = Path(request["project"])
+                format = request.get("format", "pdf")
+                settings = request.get("output") or {}
+                if not isinstance(settings, dict):
+                    raise ValueError('"output" must be an object of [output] settings')
+            elif content_type in ("application/zip", "application/octet-stream"):
+                project = service.projects.store_upload(self.rfile, length)
+                settings = dict(parse_qsl(urlsplit(self.path).query))
+                format = settings.pop("format", "pdf")
+            else:
+                return self._send_error(
+                    HTTPStatus.UNSUPPORTED_MEDIA_TYPE,
+                    "Send a JSON job or a packed project (application/zip)",
+                )
+            job = service.submit(project, format, settings)
+        except ValueError as e:
+            return self._send_error(HTTPStatus.BAD_REQUEST, str(e))
+
+        self._send_json(HTTPStatus.ACCEPTED, job.as_dict())
+
+    def do_DELETE(self) -> None:
+        try:
+            job, rest = self._route()
+        except LookupError as e:
+            return self._send_error(HTTPStatus.NOT_FOUND, f"Not found: {e}")
+        if job is None or rest:
+            return self._send_error(
+                HTTPStatus.METHOD_NOT_ALLOWED, "Use DELETE /jobs/ID"
+            )
+        if not self.server.service.delete(job.id):
+            return self._send_error(
+                HTTPStatus.CONFLICT, f"Job {job.id} is running and cannot be stopped"
+            )
+        self.send_response(HTTPStatus.NO_CONTENT)
+        self.end_headers()
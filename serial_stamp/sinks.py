@@ -0,0 +1,260 @@
+import csv
+import json
+import os
+import sqlite3
+from dataclasses import dataclass
+from pathlib import Path
+from typing import IO, TYPE_CHECKING, Any, Iterable, Optional, Sequence
+
+from PIL import Image
+
+from serial_stamp.tables import _quote_identifier
+
+if TYPE_CHECKING:
+    from serial_stamp.engine import Engine, PageLayout
+    from serial_stamp.export import NameTemplate
+
+
+@dataclass(frozen=True, slots=True)
+class RenderedTicket:
+    """A ticket as handed to output sinks, with where it lands in the run."""
+
+    # 0-based position in the run, page and grid slot on the page
+    index: int
+    page: int
+    slot: int
+    names: tuple[str, ...]
+    values: Sequence[Any]
+    # The ticket image (in the output color), only rendered if a sink asks
+    image: Optional[Image.Image] = None
+
+
+class Sink:
+    """
+    An extra output of a generation run, fed as tickets and pages are rendered.
+
+    A run renders each ticket once and hands it to every sink, so a print PDF,
+    per-ticket images and a manifest cost one rendering pass. Sinks are called
+    from the rendering thread, in page order; slow work (encoding) should be
+    handed to threads. Subclasses override what they need.
+    """
+
+    # Whether `page` must be called; runs without a page output only compose
+    # pages if some sink wants them
+    wants_pages = False
+    # Whether tickets must carry their image
+    wants_ticket_images = False
+
+    bytes_written = 0
+
+    def open(self, engine: "Engine", layout: "PageLayout") -> None:
+        """Called before rendering starts; validates settings and opens files."""
+
+    def ticket(self, ticket: RenderedTicket) -> None:
+        pass
+
+    def page(self, index: int, page: Image.Image) -> None:
+        pass
+
+    def close(self) -> None:
+        """Flushes and closes the output; also called if the run fails."""
+
+
+class RasterSink(Sink):
+    """
+    Writes every page as an uncompressed TIFF (raw samples behind a short
+    header) into a directory, for RIPs and imposition tools.
+    """
+
+    wants_pages = True
+
+    def __init__(self, directory: str | os.PathLike):
+        self.directory = Path(directory)
+        self._width = 1
+        self._dpi = 100.0
+
+    def open(self, engine: "Engine", layout: "PageLayout") -> None:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._width = len(str(layout.pages))
+        self._dpi = engine.spec.output.dpi
+
+    def page(self, index: int, page: Image.Image) -> None:
+        path = self.directory / f"page-{index + 1:0{self._width}d}.tif"
+        page.save(path, format="TIFF", dpi=(self._dpi, self._dpi))
+        self.bytes_written += path.stat().st_size
+
+
+# Manifest formats by file suffix
+MANIFEST_FORMATS = {
+    ".csv": "csv",
+    ".json": "json",
+    ".jsonl": "jsonl",
+    ".db": "sqlite",
+    ".sqlite": "sqlite",
+    ".sqlite3": "sqlite",
+}
+
+# Columns of every manifest row before the ticket's variables
+POSITION_COLUMNS = ("ticket", "page", "slot", "stack")
+
+
+class ManifestSink(Sink):
+    """
+    Lists every ticket with its page, slot, stack and variables, one row per
+    ticket, as CSV (``.csv``), a JSON array (``.json``), JSON lines
+    (``.jsonl``) or an indexed SQLite database (``.db``, ``.sqlite``) that
+    `serial-stamp reprint` can look tickets up in. Rows are written as tickets
+    are rendered, so a manifest of any size is streamed. With a
+    `name_template`, rows also name the ticket's image file.
+    """
+
+    # Rows inserted into SQLite manifests per statement
+    SQLITE_BATCH_SIZE = 1000
+
+    def __init__(self, path: str | os.PathLike, name_template: Optional[str] = None):
+        self.path = Path(path)
+        format = MANIFEST_FORMATS.get(self.path.suffix.lower())
+        if format is None:
+            raise ValueError(
+                f"Unsupported manifest format '{self.path.suffix}' "
+                "(use .csv, .json, .jsonl or .sqlite)"
+            )
+        self.format = format
+        self.name_template = name_template
+        self._names: Optional["NameTemplate"] = None
+        self._stack_size = 1
+        self._file: Optional[IO[str]] = None
+        self._csv: Any = None
+        self._db: Optional[sqlite3.Connection] = None
+        self._insert = ""
+        self._batch: list[tuple[Any, ...]] = []
+        self._columns: list[str] = []
+        self._rows = 0
+
+    def open(self, engine: "Engine", layout: "PageLayout") -> None:
+        # Table columns are only known from the first ticket, checked there
+        self._check_names(param.name for param in engine.spec.params or ())
+        if self.name_template is not None:
+            from serial_stamp.export import NameTemplate
+
+            self._names = NameTemplate.parse(self.name_template, layout.tickets)
+        self._stack_size = layout.stack_size
+        if self.format == "sqlite":
+            self._open_sqlite(layout)
+            return
+        self._file = open(self.path, "w", encoding="utf-8", newline="")
+        if self.format == "json":
+            self._file.write("[")
+
+    def _open_sqlite(self, layout: "PageLayout") -> None:
+        self.path.unlink(missing_ok=True)
+        self._db = sqlite3.connect(self.path)
+        # The manifest can always be written again: skip the rollback journal
+        self._db.execute("PRAGMA journal_mode = OFF")
+        self._db.execute("PRAGMA synchronous = OFF")
+        self._db.execute("CREATE TABLE meta (key TEXT PRIMARY KEY, value)")
+        self._db.executemany(
+            "INSERT INTO meta VALUES (?, ?)",
+            [
+                ("tickets", layout.tickets),
+                ("pages", layout.pages),
+                ("stack_size", layout.stack_size),
+                ("tickets_per_page", layout.tickets_per_page),
+            ],
+        )
+
+    def _check_names(self, names: Iterable[str]) -> None:
+        reserved = set(POSITION_COLUMNS)
+        if self.name_template is not None:
+            reserved.add("file")
+        clashes = sorted(reserved.intersection(names))
+        if clashes:
+            raise ValueError(
+                f"Variables named {', '.join(clashes)} clash with the manifest's "
+                "columns; rename them to write a manifest"
+            )
+
+    def _row(self, ticket: RenderedTicket) -> dict[str, Any]:
+        if not self._rows:
+            self._check_names(ticket.names)
+        # Positions are 1-based, as printed
+        row: dict[str, Any] = {
+            "ticket": ticket.index + 1,
+            "page": ticket.page + 1,
+            "slot": ticket.slot + 1,
+            "stack": ticket.page // self._stack_size + 1,
+        }
+        if self._names is not None:
+            row["file"] = self._names.name(ticket.index, ticket.names, ticket.values)
+        row.update(zip(ticket.names, ticket.values))
+        return row
+
+    def _sqlite_row(self, row: dict[str, Any]) -> None:
+        assert self._db is not None
+        if not self._columns:
+            self._columns = list(row)
+            columns = ", ".join(
+                _quote_identifier(name)
+                + (" INTEGER PRIMARY KEY" if name == "ticket" else "")
+                for name in self._columns
+            )
+            self._db.execute(f"CREATE TABLE tickets ({columns})")
+            placeholders = ", ".join("?" * len(self._columns))
+            self._insert = f"INSERT INTO tickets VALUES ({placeholders})"
+        self._batch.append(tuple(row.get(name) for name in self._columns))
+        if len(self._batch) >= self.SQLITE_BATCH_SIZE:
+            self._db.executemany(self._insert, self._batch)
+            self._batch.clear()
+
+    def _close_sqlite(self) -> None:
+        assert self._db is not None
+        if self._batch:
+            self._db.executemany(self._insert, self._batch)
+            self._batch.clear()
+        # Indexes are built once at the end, which is faster than maintaining
+        # them on every insert; variables are looked up as text and as numbers
+        for name in self._columns:
+            if name in ("ticket", "slot", "stack"):
+                continue
+            column = _quote_identifier(name)
+            index = _quote_identifier(f"tickets_{name}")
+            self._db.execute(f"CREATE INDEX {index} ON tickets ({column})")
+            if name not in POSITION_COLUMNS and name != "file":
+                index = _quote_identifier(f"tickets_{name}_number")
+                self._db.execute(
+                    f"CREATE INDEX {index} ON tickets (CAST({column} AS INTEGER))"
+                )
+        self._db.commit()
+        self._db.close()
+
+    def ticket(self, ticket: RenderedTicket) -> None:
+        row = self._row(ticket)
+        if self.format == "sqlite":
+            self._sqlite_row(row)
+            self._rows += 1
+            return
+        assert self._file is not None
+        if self.format == "csv":
+            if self._csv is None:
+                self._csv = csv.DictWriter(self._file, fieldnames=list(row))
+                self._csv.writeheader()
+            self._csv.writerow(row)
+        elif self.format == "json":
+            separator = ",\n" if self._rows else "\n"
+            self._file.write(separator + json.dumps(row, ensure_ascii=False))
+        else:
+            self._file.write(json.dumps(row, ensure_ascii=False) + "\n")
+        self._rows += 1
+
+    def close(self) -> None:
+        if self._db is not None:
+            self._close_sqlite()
+            self._db = None
+            self.bytes_written = self.path.stat().st_size
+            return
+        if self._file is None or self._file.closed:
+            return
+        if self.format == "json":
+            self._file.write("\n]\n")
+        self._file.close()
+        self.bytes_written = self.path.stat().st_size
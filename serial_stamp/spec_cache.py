@@ -0,0 +1,114 @@
+import hashlib
+import os
+import pickle
+import sys
+import tempfile
+import tomllib
+from importlib import metadata
+from pathlib import Path
+
+import pydantic
+
+from serial_stamp import models
+from serial_stamp.models import Spec
+
+# Number of cached specs kept; the least recently used ones are removed
+MAX_ENTRIES = 64
+
+
+def cache_dir() -> Path:
+    """
+    Per-user directory for cached specs. Never inside the project itself, since
+    packed projects are extracted to temporary directories and could otherwise
+    ship their own (untrusted) cache entries.
+    """
+    override = os.environ.get("SERIAL_STAMP_CACHE_DIR")
+    if override:
+        return Path(override)
+
+    if sys.platform == "win32":
+        base = Path(os.environ.get("LOCALAPPDATA") or Path.home() / "AppData/Local")
+    elif sys.platform == "darwin":
+        base = Path.home() / "Library" / "Caches"
+    else:
+        base = Path(os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache")
+    return base / "serial-stamp" / "specs"
+
+
+def _package_version() -> str:
+    try:
+        return metadata.version("serial-stamp")
+    except metadata.PackageNotFoundError:
+        return "unknown"
+
+
+def cache_key(data: bytes) -> str:
+    """
+    Key of a spec file's contents. Versions are part of the key because a cached
+    Spec is only valid for the models (and pydantic) that produced it. So is the
+    models source, whose fields change between releases in development installs.
+    """
+    digest = hashlib.sha256()
+    for part in (_package_version(), pydantic.VERSION, sys.version):
+        digest.update(part.encode())
+        digest.update(b"\0")
+    try:
+        digest.update(Path(models.__file__).read_bytes())
+    except OSError:
+        # No readable source (e.g. a zipped install): versions have to do
+        pass
+    digest.update(b"\0")
+    digest.update(data)
+    return digest.hexdigest()
+
+
+def _store(entry: Path, spec: Spec):
+    entry.parent.mkdir(parents=True, exist_ok=True)
+
+    # Write then rename, so concurrent CLI runs never read a partial entry
+    fd, tmp_name = tempfile.mkstemp(dir=entry.parent, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            pickle.dump(spec, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_name, entry)
+    except BaseException:
+        Path(tmp_name).unlink(missing_ok=True)
+        raise
+
+    entries = sorted(entry.parent.glob("*.pickle"), key=lambda p: p.stat().st_mtime)
+    for old in entries[:-MAX_ENTRIES]:
+        old.unlink(missing_ok=True)
+
+
+def load_spec(spec_path: Path, use_cache: bool = True) -> Spec:
+    """
+    Loads and validates a spec file, reusing the validated Spec of a previous
+    run when the file contents are unchanged. Cache failures are never fatal:
+    the spec is then parsed as usual.
+    """
+    data = spec_path.read_bytes()
+    if not use_cache:
+        return Spec(**tomllib.loads(data.decode("utf-8")))
+
+    entry = cache_dir() / f"{cache_key(data)}.pickle"
+
+    try:
+        with open(entry, "rb") as f:
+            cached = pickle.load(f)
+        if isinstance(cached, Spec):
+            # Mark as recently used for pruning
+            os.utime(entry)
+            return cached
+    except FileNotFoundError:
+        pass
+    except Exception as e:
+        print(f"[warn] Ignoring unreadable spec cache entry {entry.name}: {e}")
+
+    spec = Spec(**tomllib.loads(data.decode("utf-8")))
+
+    try:
+        _store(entry, spec)
+    except OSError as e:
+        print(f"[warn] Could not write spec cache: {e}")
+
+    return spec
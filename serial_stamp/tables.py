@@ -0,0 +1,315 @@
+import codecs
+import csv
+import io
+import json
+import os
+import sqlite3
+from array import array
+from collections.abc import Callable, Iterator
+from pathlib import Path
+from typing import Any
+
+_SCAN_CHUNK_SIZE = 1 << 20
+
+
+def iter_csv_rows(path: Path, delimiter: str = ",") -> Iterator[dict[str, str]]:
+    """Lazily yields the rows of a CSV file as dicts keyed by the header row."""
+    with open(path, newline="", encoding="utf-8-sig") as f:
+        yield from csv.DictReader(f, delimiter=delimiter)
+
+
+def iter_jsonl_rows(path: Path) -> Iterator[dict[str, Any]]:
+    """Lazily yields the objects of a JSON Lines file, skipping empty lines."""
+    with open(path, "rb") as f:
+        for line_no, line in enumerate(f, 1):
+            if line in (b"\n", b"\r\n"):
+                continue
+            row = json.loads(line)
+            if not isinstance(row, dict):
+                raise ValueError(f"{path}:{line_no}: expected a JSON object")
+            yield row
+
+
+def _scan_line_count(path: Path, special: bytes = b"") -> int | None:
+    """
+    Counts lines with a chunked newline scan, without decoding the file.
+
+    Returns None when the scan cannot be trusted, i.e. when the file contains
+    empty lines (skipped by the readers) or the `special` byte sequence.
+    """
+    count = 0
+    # Start as if after a newline so that a leading empty line is detected
+    last = b"\n"
+
+    with open(path, "rb") as f:
+        while chunk := f.read(_SCAN_CHUNK_SIZE):
+            if special and special in chunk:
+                return None
+            if b"\n\n" in chunk or b"\n\r\n" in chunk:
+                return None
+            if last == b"\n" and chunk[:1] in (b"\n", b"\r"):
+                return None
+
+            count += chunk.count(b"\n")
+            last = chunk[-1:]
+
+    if last != b"\n":
+        # Last line without a trailing newline
+        count += 1
+    return count
+
+
+def count_csv_rows(path: Path, delimiter: str = ",") -> int:
+    """
+    Counts the data rows of a CSV file.
+
+    Uses a fast newline scan unless the file contains quotes (which may wrap
+    embedded newlines) or empty lines, in which case the rows are parsed.
+    """
+    lines = _scan_line_count(path, special=b'"')
+    if lines is None:
+        return sum(1 for _ in iter_csv_rows(path, delimiter))
+    # Minus the header row
+    return max(lines - 1, 0)
+
+
+def count_jsonl_rows(path: Path) -> int:
+    """Counts the objects of a JSON Lines file with a fast newline scan."""
+    lines = _scan_line_count(path)
+    if lines is None:
+        return sum(1 for _ in iter_jsonl_rows(path))
+    return lines
+
+
+class RowIndex:
+    """
+    Random access to the rows of a CSV or JSON Lines file by 0-based position.
+
+    The file is scanned once for the byte offset of every record (8 bytes a
+    row), then rows are read back and parsed one at a time, so pages can be
+    rendered in any order without holding whole stacks of rows in memory.
+    """
+
+    def __init__(self, path: Path, parse: Callable[[str], Any], quoted: bool):
+        self._offsets = _record_offsets(path, quoted)
+        self._parse = parse
+        self._file = open(path, "rb")
+        self._end = self._file.seek(0, os.SEEK_END)
+
+    @classmethod
+    def csv(cls, path: Path, delimiter: str = ",") -> "RowIndex":
+        index = cls(path, lambda record: None, quoted=True)
+        if not index._offsets:
+            return index
+        # Records are parsed against the header row, as by iter_csv_rows
+        header = next(csv.reader(io.StringIO(index._read(0), newline="")), [])
+        del index._offsets[0]
+        index._parse = lambda record: next(
+            csv.DictReader(io.StringIO(record, newline=""), header, delimiter=delimiter)
+        )
+        return index
+
+    @classmethod
+    def jsonl(cls, path: Path) -> "RowIndex":
+        def parse(record: str) -> Any:
+            row = json.loads(record)
+            if not isinstance(row, dict):
+                raise ValueError(f"{path}: expected a JSON object, got {record!r}")
+            return row
+
+        return cls(path, parse, quoted=False)
+
+    def __len__(self) -> int:
+        return len(self._offsets)
+
+    def _read(self, index: int) -> str:
+        start = self._offsets[index]
+        end = self._offsets[index + 1] if index + 1 < len(self._offsets) else self._end
+        self._file.seek(start)
+        return self._file.read(end - start).decode("utf-8")
+
+    def __getitem__(self, index: int) -> dict[str, Any]:
+        if not 0 <= index < len(self._offsets):
+            raise IndexError(f"Row {index} out of range for {len(self)} rows")
+        return self._parse(self._read(index))
+
+    def close(self) -> None:
+        self._file.close()
+
+    def __enter__(self) -> "RowIndex":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+
+def _record_offsets(path: Path, quoted: bool) -> array:
+    """
+    Byte offsets of the records of a file: its lines, skipping empty ones as
+    the readers do, or with `quoted`, its CSV records, which continue over
+    newlines inside quotes (quotes inside fields are doubled, so a line with
+    an odd number of them opens or closes a quoted field).
+    """
+    offsets = array("Q")
+    with open(path, "rb") as f:
+        position = 0
+        if quoted and f.read(3) == codecs.BOM_UTF8:
+            position = 3
+        f.seek(position)
+        in_quotes = False
+        for line in f:
+            if not in_quotes and line not in (b"\n", b"\r\n"):
+                offsets.append(position)
+            if quoted and line.count(b'"') % 2:
+                in_quotes = not in_quotes
+            position += len(line)
+    return offsets
+
+
+def _sqlite_connect(path: Path, check_same_thread: bool = True) -> sqlite3.Connection:
+    # Read-only: a table source must never modify the order database
+    connection = sqlite3.connect(
+        f"{path.resolve().as_uri()}?mode=ro",
+        uri=True,
+        check_same_thread=check_same_thread,
+    )
+    connection.row_factory = sqlite3.Row
+    return connection
+
+
+def _sqlite_subquery(query: str) -> str:
+    return f"({query.strip().rstrip(';')})"
+
+
+def _quote_identifier(name: str) -> str:
+    return '"' + name.replace('"', '""') + '"'
+
+
+def iter_sqlite_rows(
+    path: Path,
+    query: str,
+    key: str | None = None,
+    batch_size: int = 1000,
+    start: int = 0,
+    stop: int | None = None,
+) -> Iterator[dict[str, Any]]:
+    """
+    Lazily yields rows `start` to `stop` of a SQLite query, `batch_size` at a time.
+
+    With a `key` column (which should be indexed and unique), batches are
+    fetched by keyset pagination in key order, so skipping ahead costs a single
+    offset lookup. Without one, batches use LIMIT/OFFSET over the query's own
+    order, which should then be made deterministic with an ORDER BY.
+    """
+    subquery = _sqlite_subquery(query)
+    connection = _sqlite_connect(path)
+
+    try:
+        remaining = None if stop is None else max(stop - start, 0)
+
+        if key is None:
+            offset = start
+            while remaining is None or remaining > 0:
+                limit = batch_size if remaining is None else min(batch_size, remaining)
+                rows = connection.execute(
+                    f"SELECT * FROM {subquery} LIMIT ? OFFSET ?", (limit, offset)
+                ).fetchall()
+                if not rows:
+                    return
+                for row in rows:
+                    yield dict(row)
+                offset += len(rows)
+                if remaining is not None:
+                    remaining -= len(rows)
+            return
+
+        column = _quote_identifier(key)
+        last_key = None
+        if start > 0:
+            # Key of the row right before the range; keyset pagination takes over
+            cursor = connection.execute(
+                f"SELECT {column} FROM {subquery} ORDER BY {column} LIMIT 1 OFFSET ?",
+                (start - 1,),
+            )
+            found = cursor.fetchone()
+            if found is None:
+                return
+            last_key = found[0]
+
+        while remaining is None or remaining > 0:
+            limit = batch_size if remaining is None else min(batch_size, remaining)
+            if last_key is None:
+                rows = connection.execute(
+                    f"SELECT * FROM {subquery} ORDER BY {column} LIMIT ?", (limit,)
+                ).fetchall()
+            else:
+                rows = connection.execute(
+                    f"SELECT * FROM {subquery} WHERE {column} > ? "
+                    f"ORDER BY {column} LIMIT ?",
+                    (last_key, limit),
+                ).fetchall()
+            if not rows:
+                return
+            for row in rows:
+                yield dict(row)
+            last_key = rows[-1][key]
+            if remaining is not None:
+                remaining -= len(rows)
+    finally:
+        connection.close()
+
+
+class SqliteRowIndex:
+    """
+    Random access to the rows of a SQLite query by 0-based position.
+
+    The query's rows are copied once into a temporary table (a temporary file,
+    not memory), in `key` order if given, and read back by rowid. The source
+    database itself is only read. The index may be used from any thread, but
+    not from several at once: callers serialize lookups themselves.
+    """
+
+    def __init__(self, path: Path, query: str, key: str | None = None):
+        self._connection = _sqlite_connect(path, check_same_thread=False)
+        order = "" if key is None else f" ORDER BY {_quote_identifier(key)}"
+        self._connection.execute(
+            f"CREATE TEMP TABLE ticket_rows AS SELECT * FROM "
+            f"{_sqlite_subquery(query)}{order}"
+        )
+        (self._count,) = self._connection.execute(
+            "SELECT COUNT(*) FROM temp.ticket_rows"
+        ).fetchone()
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __getitem__(self, index: int) -> dict[str, Any]:
+        row = None
+        if 0 <= index < self._count:
+            row = self._connection.execute(
+                "SELECT * FROM temp.ticket_rows WHERE rowid = ?", (index + 1,)
+            ).fetchone()
+        if row is None:
+            raise IndexError(f"Row {index} out of range for {self._count} rows")
+        return dict(row)
+
+    def close(self) -> None:
+        self._connection.close()
+
+    def __enter__(self) -> "SqliteRowIndex":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+
+def count_sqlite_rows(path: Path, query: str) -> int:
+    """Counts the rows of a SQLite query with COUNT(*)."""
+    connection = _sqlite_connect(path)
+    try:
+        (count,) = connection.execute(
+            f"SELECT COUNT(*) FROM {_sqlite_subquery(query)}"
+        ).fetchone()
+        return count
+    finally:
+        connection.close()
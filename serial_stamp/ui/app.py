@@ -12,6 +12,7 @@ from PIL import Image, ImageTk
 
 from serial_stamp.engine import Engine
 from serial_stamp.models import Spec
+from serial_stamp.progress import ProgressEvent, format_progress
 from serial_stamp.project import Project, init_project, pack_project
 from serial_stamp.ui.forms import FormBuilder
 from serial_stamp.ui.panels import BottomBar, ConfigPanel, PreviewPanel
@@ -297,10 +298,6 @@ class TicketGeneratorApp(tk.Tk):
                         )
                         text_item.size = int(self.vars[f"text_{i}_size"].get())
 
-                        # Invalidate cached font property so it reloads with new size
-                        if "font" in text_item.__dict__:
-                            del text_item.__dict__["font"]
-
                         # Handle color (literal eval if looks like tuple)
                         c_str = self.vars[f"text_{i}_color"].get()
                         if c_str.startswith("(") and c_str.endswith(")"):
@@ -369,7 +366,12 @@ class TicketGeneratorApp(tk.Tk):
 
             with Image.open(img_path) as source_image:
                 # We need a dummy output path
-                engine = Engine(self.current_spec, Path("preview.pdf"), source_image)
+                engine = Engine(
+                    self.current_spec,
+                    Path("preview.pdf"),
+                    source_image,
+                    self.project.work_dir,
+                )
                 preview_img = engine.generate_preview()
 
                 # Resize to fit canvas
@@ -431,21 +433,19 @@ class TicketGeneratorApp(tk.Tk):
             img_path = work_dir / img_path_str
 
             with Image.open(img_path) as source_image:
-                engine = Engine(spec, output_path, source_image)
-                engine.generate(progress_callback=self._update_progress_threadsafe)
+                engine = Engine(spec, output_path, source_image, work_dir)
+                engine.generate(on_progress=self._update_progress_threadsafe)
 
             self.msg_queue.put((self._generation_complete, (True, None)))
         except Exception as e:
             self.msg_queue.put((self._generation_complete, (False, str(e))))
 
-    def _update_progress_threadsafe(self, current, total):
-        self.msg_queue.put((self._update_progress, (current, total)))
+    def _update_progress_threadsafe(self, event: ProgressEvent):
+        self.msg_queue.put((self._update_progress, (event,)))
 
-    def _update_progress(self, current, total):
-        if total > 0:
-            percent = (current / total) * 100
-            self.bottom_bar.progress_var.set(percent)
-            self.bottom_bar.status_var.set(f"Generating: Page {current}/{total}")
+    def _update_progress(self, event: ProgressEvent):
+        self.bottom_bar.progress_var.set(event.fraction * 100)
+        self.bottom_bar.status_var.set(f"Generating: {format_progress(event)}")
 
     def _generation_complete(self, success, error_msg):
         self.bottom_bar.generate_btn.config(state=tk.NORMAL)
@@ -1,45 +1,216 @@
-from typing import Any
+from array import array
+from collections.abc import Iterable, Iterator, Sequence
+from functools import lru_cache
+from itertools import accumulate, pairwise
+from math import prod
+from typing import Any, overload
 
-from typing_extensions import Generator, Iterable, Tuple
+
+def _as_sequence(iterable: Iterable[Any]) -> Sequence[Any]:
+    # Indexable containers (list, tuple, range, str, array) are reused as-is so
+    # ranges stay O(1) in memory; anything else (map, generator) is read once.
+    if isinstance(iterable, Sequence):
+        return iterable
+    return tuple(iterable)
+
+
+class CartesianProduct:
+    """
+    Odometer-style iterator over the cartesian product of several iterables.
+
+    Every input is materialized once, so generators and ``map`` objects can be
+    combined safely. Items are produced in the same order as
+    ``itertools.product`` without recursion; advancing costs O(1) amortized.
+    """
+
+    __slots__ = ("_pools", "_sizes", "_length", "_position", "_indices", "_current")
+
+    def __init__(self, *iterables: Iterable[Any]):
+        self._pools = tuple(_as_sequence(iterable) for iterable in iterables)
+        self._sizes = tuple(len(pool) for pool in self._pools)
+        self._length = prod(self._sizes) if self._pools else 0
+        self._position = 0
+        self._indices: list[int] = []
+        self._current: list[Any] = []
+        self.seek(0)
+
+    def __len__(self) -> int:
+        """Number of items left to yield."""
+        return self._length - self._position
+
+    def __iter__(self) -> "CartesianProduct":
+        return self
+
+    def __next__(self) -> tuple[Any, ...]:
+        if self._position >= self._length:
+            raise StopIteration
+
+        item = tuple(self._current)
+        self._position += 1
+
+        if self._position < self._length:
+            # Increment the rightmost wheel and carry to the left on overflow
+            pools, sizes, indices, current = (
+                self._pools,
+                self._sizes,
+                self._indices,
+                self._current,
+            )
+            i = len(sizes) - 1
+            while True:
+                index = indices[i] + 1
+                if index < sizes[i]:
+                    indices[i] = index
+                    current[i] = pools[i][index]
+                    break
+                indices[i] = 0
+                current[i] = pools[i][0]
+                i -= 1
+
+        return item
+
+    @property
+    def total(self) -> int:
+        """Total number of combinations, regardless of the current position."""
+        return self._length
+
+    @property
+    def position(self) -> int:
+        """Index of the next item to be yielded."""
+        return self._position
+
+    def at(self, index: int) -> tuple[Any, ...]:
+        """The item at `index`, regardless of the current position."""
+        if not 0 <= index < self._length:
+            raise IndexError(f"Index {index} out of range for {self._length} items")
+        item = []
+        for pool, size in zip(reversed(self._pools), reversed(self._sizes)):
+            index, i = divmod(index, size)
+            item.append(pool[i])
+        return tuple(reversed(item))
+
+    def seek(self, index: int) -> "CartesianProduct":
+        """
+        Moves the iterator so that the next item is the one at `index`.
+        Seeking to ``len(self)`` exhausts the iterator.
+        """
+        if index < 0 or index > self._length:
+            raise IndexError(f"Index {index} out of range for {self._length} items")
+
+        self._position = index
+        if index == self._length:
+            return self
+
+        indices = [0] * len(self._sizes)
+        for i in range(len(self._sizes) - 1, -1, -1):
+            index, indices[i] = divmod(index, self._sizes[i])
+
+        self._indices = indices
+        self._current = [pool[i] for pool, i in zip(self._pools, indices)]
+        return self
 
 
 def cartesian_product(
     *iterables: Iterable[Any],
     materialize: bool = False,
-) -> Generator[Tuple[Any, ...], None, None]:
-    if not iterables:
-        return
-
-    if len(iterables) == 1:
-        for item in iterables[0]:
-            if isinstance(item, tuple):
-                yield item
-            else:
-                yield (item,)
-        return
-
-    if materialize:
-        # Convert all iterables to lists to allow reuse (needed for generators)
-        materialized = [list(iterable) for iterable in iterables]
-        first = materialized[0]
-        rest = materialized[1:]
-
-        for x in first:
-            for y in cartesian_product(*rest, materialize=True):
-                if isinstance(x, tuple):
-                    yield x + y
-                else:
-                    yield (x,) + y
-    else:
-        first_iter = iter(iterables[0])
-        rest_iter = iterables[1:]
-
-        for x in first_iter:
-            for y in cartesian_product(*rest_iter):
-                if isinstance(x, tuple):
-                    yield x + y
-                else:
-                    yield (x,) + y
+) -> CartesianProduct:
+    """
+    Returns a `CartesianProduct` over `iterables`.
+
+    Inputs are always materialized once, so `materialize` is only kept for
+    backwards compatibility.
+    """
+    return CartesianProduct(*iterables)
+
+
+# Bytes per cached FormattedInts chunk beyond its characters and offsets: the
+# string and array headers and the cache's dict entry
+CHUNK_OVERHEAD = 512
+
+
+class FormattedInts(Sequence[str]):
+    """
+    Read-only sequence of integers rendered as (optionally zero-padded) strings.
+
+    Values are formatted lazily, a chunk at a time with a single batched ``%``
+    operation. Each formatted chunk is cached as one string plus an offset
+    array, so a fully iterated 10M-value range costs a few bytes per value.
+    """
+
+    CHUNK_SIZE = 4096
+
+    __slots__ = ("_values", "_format", "_chunks", "_last_index", "_last_chunk")
+
+    def __init__(self, values: Sequence[int], leading_zeros: int | None = None):
+        self._values = values
+        self._format = f"%0{leading_zeros}d\n" if leading_zeros else "%d\n"
+        self._chunks: dict[int, tuple[str, array]] = {}
+        self._last_index = -1
+        self._last_chunk: tuple[str, array] = ("", array("I"))
+
+    def __len__(self) -> int:
+        return len(self._values)
+
+    def cache_bytes(self) -> int:
+        """Memory the chunk cache holds once every value has been formatted."""
+        if not self._values:
+            return 0
+        values = self._values
+        if isinstance(values, range):
+            extremes = (values[0], values[-1])
+        else:
+            extremes = (min(values), max(values))
+        # The padded width, or that of the extreme with the most digits
+        width = max(len(self._format % value) - 1 for value in extremes)
+        chunks = -(-len(values) // self.CHUNK_SIZE)
+        # Up to `width` characters and a 4-byte offset per value
+        return len(values) * (width + 4) + chunks * CHUNK_OVERHEAD
+
+    def _chunk(self, chunk_index: int) -> tuple[str, array]:
+        if chunk_index == self._last_index:
+            return self._last_chunk
+
+        chunk = self._chunks.get(chunk_index)
+        if chunk is None:
+            start = chunk_index * self.CHUNK_SIZE
+            ints = tuple(self._values[start : start + self.CHUNK_SIZE])
+            parts = ((self._format * len(ints)) % ints).split("\n")
+            parts.pop()  # trailing separator
+            offsets = array("I", accumulate(map(len, parts), initial=0))
+            chunk = ("".join(parts), offsets)
+            self._chunks[chunk_index] = chunk
+
+        self._last_index = chunk_index
+        self._last_chunk = chunk
+        return chunk
+
+    @overload
+    def __getitem__(self, index: int) -> str: ...
+
+    @overload
+    def __getitem__(self, index: slice) -> list[str]: ...
+
+    def __getitem__(self, index: int | slice) -> str | list[str]:
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+
+        if index < 0:
+            index += len(self._values)
+        chunk_index, offset = divmod(index, self.CHUNK_SIZE)
+        if chunk_index == self._last_index:
+            blob, offsets = self._last_chunk
+        elif 0 <= index < len(self._values):
+            blob, offsets = self._chunk(chunk_index)
+        else:
+            raise IndexError("FormattedInts index out of range")
+        return blob[offsets[offset] : offsets[offset + 1]]
+
+    def __iter__(self) -> Iterator[str]:
+        chunk_count = -(-len(self._values) // self.CHUNK_SIZE)
+        for chunk_index in range(chunk_count):
+            blob, offsets = self._chunk(chunk_index)
+            for start, end in pairwise(offsets):
+                yield blob[start:end]
 
 
 def replace_vars(template: str, vars: dict[str, str]) -> str:
@@ -77,3 +248,50 @@ def replace_vars(template: str, vars: dict[str, str]) -> str:
             # by moving past just one character to avoid infinite loops
 
     return "".join(segments)
+
+
+def compile_template(template: str, names: Sequence[str]) -> str:
+    """
+    Compiles a `replace_vars` template into a ``str.format`` string whose
+    positional fields follow `names`, so that
+    ``compile_template(t, names).format(*values)`` equals
+    ``replace_vars(t, dict(zip(names, values)))``.
+
+    Unknown variables are reported once here instead of on every render.
+    """
+    lookup = {name: f"{{{i}}}" for i, name in enumerate(names)}
+    lookup["$"] = "$"
+    segments = []
+    rest = template
+
+    while rest:
+        index = rest.find("$")
+        if index < 0:
+            segments.append(rest.replace("{", "{{").replace("}", "}}"))
+            break
+
+        segments.append(rest[:index].replace("{", "{{").replace("}", "}}"))
+        rest = rest[index + 1 :]
+
+        # Longest matching variable name, as in replace_vars
+        best_match = max(
+            (k for k in lookup if k and rest.startswith(k)), key=len, default=None
+        )
+
+        if best_match is not None:
+            segments.append(lookup[best_match])
+            rest = rest[len(best_match) :]
+        else:
+            print(f"[warn] Unknown variable at ${rest}")
+            segments.append("$")
+
+    return "".join(segments)
+
+
+@lru_cache(maxsize=1024)
+def compiled_template(template: str, names: tuple[str, ...]) -> str:
+    """
+    `compile_template`, memoized for templates formatted on every ticket. The
+    cache is shared and thread-safe, so plans using it stay immutable.
+    """
+    return compile_template(template, names)
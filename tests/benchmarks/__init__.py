@@ -0,0 +1 @@
+"""Microbenchmarks for the rendering hot paths (run with --perf)."""
@@ -0,0 +1,97 @@
+import json
+import platform
+import statistics
+import time
+from collections.abc import Callable
+from pathlib import Path
+
+import pytest
+
+
+class PerfRecorder:
+    """Times callables and checks them against a stored baseline."""
+
+    def __init__(self, baseline: dict[str, dict], threshold: float):
+        self.baseline = baseline
+        self.threshold = threshold
+        self.results: dict[str, dict] = {}
+
+    def __call__(
+        self,
+        name: str,
+        fn: Callable[[], object],
+        repeat: int = 5,
+        min_time: float = 0.05,
+    ) -> dict:
+        """
+        Runs `fn` in `repeat` rounds of at least `min_time` seconds each and
+        records the fastest time per call (the least noisy estimate).
+        """
+        number = 1
+        while True:
+            start = time.perf_counter()
+            for _ in range(number):
+                fn()
+            elapsed = time.perf_counter() - start
+            if elapsed >= min_time:
+                break
+            number *= 2
+
+        timings = [elapsed / number]
+        for _ in range(repeat - 1):
+            start = time.perf_counter()
+            for _ in range(number):
+                fn()
+            timings.append((time.perf_counter() - start) / number)
+
+        result = {
+            "seconds": min(timings),
+            "median": statistics.median(timings),
+            "number": number,
+            "repeat": repeat,
+        }
+        self.results[name] = result
+
+        reference = self.baseline.get(name)
+        if reference is not None:
+            ratio = result["seconds"] / reference["seconds"]
+            result["ratio"] = ratio
+            if ratio > 1 + self.threshold:
+                pytest.fail(
+                    f"{name} regressed: {result['seconds'] * 1e3:.3f}ms vs "
+                    f"{reference['seconds'] * 1e3:.3f}ms baseline ({ratio:.2f}x)"
+                )
+        return result
+
+
+@pytest.fixture(scope="session")
+def perf_recorder(request):
+    config = request.config
+    baseline_path = config.getoption("--perf-baseline")
+    baseline = {}
+    if baseline_path and Path(baseline_path).exists():
+        baseline = json.loads(Path(baseline_path).read_text())["benchmarks"]
+
+    recorder = PerfRecorder(baseline, config.getoption("--perf-threshold"))
+    yield recorder
+
+    json_path = config.getoption("--perf-json")
+    if json_path:
+        Path(json_path).write_text(
+            json.dumps(
+                {
+                    "machine": {
+                        "python": platform.python_version(),
+                        "platform": platform.platform(),
+                        "processor": platform.processor(),
+                    },
+                    "benchmarks": recorder.results,
+                },
+                indent=2,
+            )
+        )
+
+
+@pytest.fixture
+def perf(perf_recorder):
+    return perf_recorder
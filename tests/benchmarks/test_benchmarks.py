@@ -0,0 +1,110 @@
+from io import BytesIO
+from itertools import islice
+
+import pytest
+
+from serial_stamp.models import Output
+from serial_stamp.pdf import encode_page, write_pdf
+from serial_stamp.utils import cartesian_product, compile_template, replace_vars
+
+from . import workloads
+
+RENDER_WORKLOADS = {
+    "small_grid": workloads.small_grid,
+    "large_grid": workloads.large_grid,
+    "many_texts": workloads.many_texts,
+    "wide_table": workloads.wide_table,
+}
+
+
+def first_stack(engine):
+    plan = engine.compile_plan()
+    count = plan.stack_size * plan.tickets_per_page
+    return plan, list(islice(engine._get_items_iterator(), count))
+
+
+class TestTemplateBenchmarks:
+    """Variable substitution in text templates."""
+
+    TEMPLATE = "Dear $col3, seat $col10-$col11 ($$$col40) #$col49"
+    VARS = {f"col{c}": f"value-{c}" for c in range(50)}
+
+    def test_replace_vars(self, perf):
+        perf("replace_vars[50 vars]", lambda: replace_vars(self.TEMPLATE, self.VARS))
+
+    def test_compiled_template(self, perf):
+        names = tuple(self.VARS)
+        values = tuple(self.VARS.values())
+        fmt = compile_template(self.TEMPLATE, names)
+        perf("compiled_template[50 vars]", lambda: fmt.format(*values))
+
+
+class TestIterationBenchmarks:
+    """Enumerating ticket values."""
+
+    def test_cartesian_product(self, perf):
+        params = workloads.huge_range().params
+        assert params is not None
+
+        def run():
+            product = cartesian_product(*(p.get_values() for p in params))
+            for _ in islice(product, 100_000):
+                pass
+
+        perf("cartesian_product[huge_range,100k]", run, repeat=3)
+
+    def test_cartesian_product_seek(self, perf):
+        spec = workloads.huge_range()
+        assert spec.params is not None
+        product = cartesian_product(*(p.get_values() for p in spec.params))
+        perf(
+            "cartesian_product.seek[huge_range]",
+            lambda: next(product.seek(29_999_999)),
+        )
+
+
+class TestRenderBenchmarks:
+    """Rasterizing tickets and pages."""
+
+    @pytest.mark.parametrize("workload", ["small_grid", "many_texts", "wide_table"])
+    def test_generate_ticket(self, perf, workload):
+        engine = workloads.engine(RENDER_WORKLOADS[workload]())
+        plan, items = first_stack(engine)
+        perf(
+            f"generate_ticket[{workload}]",
+            lambda: engine.generate_ticket(plan, items[0]),
+        )
+
+    @pytest.mark.parametrize("workload", ["small_grid", "large_grid"])
+    def test_print_page(self, perf, workload):
+        ticket_size = (200, 80) if workload == "large_grid" else (400, 200)
+        engine = workloads.engine(RENDER_WORKLOADS[workload](), ticket_size)
+        plan, items = first_stack(engine)
+        perf(
+            f"print_page[{workload}]",
+            lambda: engine.print_page(plan, 0, items),
+            repeat=3,
+        )
+
+    @pytest.mark.parametrize("workload", ["small_grid", "huge_range"])
+    def test_generate_preview(self, perf, workload):
+        builder = getattr(workloads, workload)
+        engine = workloads.engine(builder())
+        perf(f"generate_preview[{workload}]", engine.generate_preview, repeat=3)
+
+
+class TestEncodeBenchmarks:
+    """Encoding rendered pages."""
+
+    @pytest.mark.parametrize("codec", ["jpeg", "flate", "auto"])
+    def test_pdf_encoding(self, perf, codec):
+        engine = workloads.engine(workloads.large_grid(), (200, 80))
+        plan, items = first_stack(engine)
+        pages = [engine.print_page(plan, 0, items) for _ in range(4)]
+        output = Output(codec=codec)
+
+        def encode():
+            encoded = [encode_page(page, output) for page in pages]
+            write_pdf(BytesIO(), "bench.pdf", encoded, len(encoded), output.dpi)
+
+        perf(f"pdf_encoding[large_grid,4 pages,{codec}]", encode, repeat=3)
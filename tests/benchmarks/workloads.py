@@ -0,0 +1,75 @@
+from pathlib import Path
+
+from PIL import Image
+
+from serial_stamp.engine import Engine
+from serial_stamp.models import Spec
+
+# Fixed synthetic workloads. Changing them invalidates stored baselines.
+
+REPO_ROOT = Path(__file__).parent.parent.parent
+FONT = "fonts/Roboto-Medium.ttf"
+
+
+def ticket_image(width: int, height: int) -> Image.Image:
+    """Deterministic gradient standing in for the ticket artwork."""
+    gradient = Image.linear_gradient("L").resize((width, height))
+    return Image.merge("RGB", (gradient, gradient.rotate(90), gradient))
+
+
+def text(template: str, x: float, y: float, size: int = 24) -> dict:
+    return {"template": template, "position": [x, y], "size": size, "ttf": FONT}
+
+
+def spec(grid: tuple[int, int], texts: list[dict], **extra) -> Spec:
+    return Spec(
+        **{
+            "stack-size": 1,
+            "source-image": "unused.png",
+            "layout": {"grid-size": list(grid), "gap": 10, "margin": 20},
+            "texts": texts,
+            **extra,
+        }
+    )
+
+
+def serial_params(max_no: int = 999) -> list[dict]:
+    return [
+        {"name": "no", "type": "int", "min": 1, "max": max_no, "leading-zeros": 7},
+        {"name": "sec", "type": "string", "values": ["A", "B", "C", "D"]},
+    ]
+
+
+def small_grid() -> Spec:
+    """2x2 grid, one serial text."""
+    return spec((2, 2), [text("N° $no-$sec", 20, 20)], params=serial_params())
+
+
+def large_grid() -> Spec:
+    """6x10 grid of small tickets."""
+    return spec((6, 10), [text("$no", 10, 10, 16)], params=serial_params())
+
+
+def many_texts() -> Spec:
+    """20 text elements per ticket."""
+    texts = [text(f"Line {i}: $no / $sec", 10, 10 + 18 * i, 14) for i in range(20)]
+    return spec((2, 2), texts, params=serial_params())
+
+
+def huge_range() -> Spec:
+    """10M serial numbers times 4 sections."""
+    return spec((2, 2), [text("N° $no-$sec", 20, 20)], params=serial_params(10_000_000))
+
+
+def wide_table(rows: int = 200, columns: int = 50) -> Spec:
+    """Table of 50 columns, five of which are printed."""
+    table = [{f"col{c}": f"r{r}c{c}" for c in range(columns)} for r in range(rows)]
+    texts = [
+        text(f"$col{c} $col{c + 1}", 10, 10 + 30 * i)
+        for i, c in enumerate((0, 10, 20, 30, 40))
+    ]
+    return spec((2, 2), texts, table=table)
+
+
+def engine(spec: Spec, ticket_size: tuple[int, int] = (400, 200)) -> Engine:
+    return Engine(spec, Path("bench.pdf"), ticket_image(*ticket_size), REPO_ROOT)
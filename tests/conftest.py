@@ -0,0 +1,84 @@
+from pathlib import Path
+from typing import Any
+
+import pytest
+from PIL import Image
+
+from serial_stamp.engine import Engine
+from serial_stamp.metrics import Metrics
+from serial_stamp.models import Spec
+
+
+def make_spec(tickets: int = 10, **overrides: Any) -> Spec:
+    """
+    A spec numbering `tickets` tickets ("No $no") on pages of 2x2. Keyword
+    arguments replace spec keys, with underscores for hyphens (``stack_size``).
+    """
+    data: dict[str, Any] = {
+        "source-image": "ticket.png",
+        "layout": {"grid-size": [2, 2], "gap": 0, "margin": 0},
+        "texts": [{"template": "No $no", "position": [5, 5]}],
+        "params": [{"name": "no", "type": "int", "min": 1, "max": tickets}],
+    }
+    data.update((key.replace("_", "-"), value) for key, value in overrides.items())
+    return Spec.model_validate(data)
+
+
+def ticket_image(size: tuple[int, int] = (120, 60)) -> Image.Image:
+    return Image.linear_gradient("L").resize(size).convert("RGB")
+
+
+def make_engine(
+    path: Path = Path("out.pdf"),
+    source: Image.Image | None = None,
+    work_dir: Path = Path("."),
+    metrics: Metrics | None = None,
+    max_memory: int | None = None,
+    encoder_threads: int | None = None,
+    **spec: Any,
+) -> Engine:
+    """An engine writing `make_spec(**spec)` to `path`, over a gradient ticket."""
+    if source is None:
+        source = ticket_image()
+    return Engine(
+        make_spec(**spec),
+        path,
+        source,
+        work_dir,
+        metrics,
+        max_memory,
+        encoder_threads,
+    )
+
+
+# Registered here rather than in tests/benchmarks so that the options are known
+# whichever test paths pytest is invoked with. Named --perf* so as not to clash
+# with pytest-benchmark's options and fixture if it is installed.
+def pytest_addoption(parser):
+    group = parser.getgroup("perf", "rendering microbenchmarks")
+    group.addoption(
+        "--perf",
+        action="store_true",
+        help="Run the benchmarks in tests/benchmarks (skipped otherwise)",
+    )
+    group.addoption("--perf-json", metavar="PATH", help="Write results as JSON to PATH")
+    group.addoption(
+        "--perf-baseline",
+        metavar="PATH",
+        help="Fail benchmarks that regress against the results stored in PATH",
+    )
+    group.addoption(
+        "--perf-threshold",
+        type=float,
+        default=0.25,
+        help="Allowed slowdown relative to the baseline (default: 0.25 = 25%%)",
+    )
+
+
+def pytest_collection_modifyitems(config, items):
+    if config.getoption("--perf", default=False):
+        return
+    skip = pytest.mark.skip(reason="benchmarks only run with --perf")
+    for item in items:
+        if "perf" in item.fixturenames:
+            item.add_marker(skip)
@@ -0,0 +1,136 @@
+import asyncio
+import threading
+import time
+from contextlib import aclosing
+
+import pytest
+from PIL import Image
+
+from serial_stamp.engine import GenerationCancelled
+from serial_stamp.sinks import Sink
+from tests.conftest import make_engine
+
+
+class SlowSink(Sink):
+    """Takes a while over each page, so runs can be cancelled midway."""
+
+    wants_pages = True
+
+    def __init__(self):
+        self.pages = []
+        self.closed = False
+
+    def page(self, index, page):
+        self.pages.append(index)
+        time.sleep(0.01)
+
+    def close(self):
+        self.closed = True
+
+
+class TestAsyncEngine:
+    """Test suite for the asyncio engine API."""
+
+    def test_agenerate(self, tmp_path):
+        """Test that agenerate writes the same pages and reports progress."""
+        engine = make_engine(tmp_path / "out.tiff", encoder_threads=0, tickets=20)
+        events = []
+        loop_threads = set()
+
+        def on_progress(event):
+            events.append(event)
+            loop_threads.add(threading.get_ident())
+
+        async def main():
+            summary = await engine.agenerate(on_progress)
+            return summary, threading.get_ident()
+
+        summary, loop_thread = asyncio.run(main())
+        assert summary is not None
+        assert (summary.pages, summary.tickets) == (5, 20)
+        assert events[-1].phase == "done"
+        assert loop_threads == {loop_thread}
+
+        expected = make_engine(tmp_path / "sync.tiff", encoder_threads=0, tickets=20)
+        expected.generate()
+        with (
+            Image.open(tmp_path / "out.tiff") as a,
+            Image.open(tmp_path / "sync.tiff") as b,
+        ):
+            assert a.n_frames == b.n_frames == 5
+            assert a.tobytes() == b.tobytes()
+
+    def test_cancel(self, tmp_path):
+        """Test that cancelling the task stops rendering and removes the output."""
+        engine = make_engine(tmp_path / "out.pdf", encoder_threads=0, tickets=400)
+        sink = SlowSink()
+
+        async def main():
+            task = asyncio.create_task(engine.agenerate(sinks=[sink]))
+            while len(sink.pages) < 2:
+                await asyncio.sleep(0.001)
+            task.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await task
+
+        asyncio.run(main())
+        assert len(sink.pages) < 10
+        assert sink.closed
+        assert not (tmp_path / "out.pdf").exists()
+
+    def test_cancel_event(self, tmp_path):
+        """Test that generate stops when its cancel event is set."""
+        cancel = threading.Event()
+        cancel.set()
+        with pytest.raises(GenerationCancelled):
+            make_engine(tmp_path / "out.pdf", encoder_threads=0, tickets=20).generate(
+                cancel=cancel
+            )
+
+    def test_iter_pages_async(self, tmp_path):
+        """Test that pages arrive in order and match the engine's pages."""
+        engine = make_engine(tmp_path / "out.pdf", encoder_threads=0, tickets=20)
+
+        async def main():
+            return [page async for page in engine.iter_pages_async(pages=[4, 1])]
+
+        pages = asyncio.run(main())
+        assert [(p.index, p.tickets) for p in pages] == [(4, 4), (1, 4)]
+        plan, layout = engine.compile_plan(), engine.page_layout()
+        expected, _ = next(engine._iter_pages(plan, layout, pages=[1]))
+        assert pages[1].image.tobytes() == expected.tobytes()
+        assert not (tmp_path / "out.pdf").exists()
+
+    def test_backpressure(self, tmp_path, monkeypatch):
+        """Test that rendering waits for the consumer and stops on break."""
+        engine = make_engine(tmp_path / "out.pdf", encoder_threads=0, tickets=400)
+        rendered = []
+        compose = engine._iter_pages
+
+        def counting(*args, **kwargs):
+            for page in compose(*args, **kwargs):
+                rendered.append(page)
+                yield page
+
+        monkeypatch.setattr(engine, "_iter_pages", counting)
+
+        async def main():
+            async with aclosing(engine.iter_pages_async(ahead=2)) as pages:
+                async for page in pages:
+                    await asyncio.sleep(0.05)
+                    if page.index == 2:
+                        break
+
+        asyncio.run(main())
+        assert len(rendered) <= 5
+
+    def test_invalid_pages(self, tmp_path):
+        """Test that errors in the rendering thread reach the consumer."""
+        engine = make_engine(tmp_path / "out.pdf", encoder_threads=0, tickets=20)
+
+        async def main():
+            async for _ in engine.iter_pages_async(pages=[5]):
+                pass
+
+        with pytest.raises(ValueError, match="within the 5 pages"):
+            asyncio.run(main())
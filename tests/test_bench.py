@@ -0,0 +1,104 @@
+import json
+import subprocess
+import sys
+
+import pytest
+
+from serial_stamp.bench import (
+    parse_compare,
+    run_benchmark,
+    run_variant,
+    write_synthetic_project,
+)
+from serial_stamp.spec_cache import load_spec
+
+
+@pytest.fixture(autouse=True)
+def spec_cache_dir(tmp_path, monkeypatch):
+    monkeypatch.setenv("SERIAL_STAMP_CACHE_DIR", str(tmp_path / "cache"))
+
+
+class TestParseCompare:
+    """Test suite for expanding --compare arguments."""
+
+    def test_defaults(self):
+        """Test that no comparison gives a single default variant."""
+        assert parse_compare([]) == [
+            {"format": "pdf", "cache": "warm", "encoder-threads": "auto"}
+        ]
+
+    def test_combinations(self):
+        """Test that every combination of compared values is run."""
+        variants = parse_compare(["format=pdf,tiff", "cache=warm, cold"])
+        assert [(v["format"], v["cache"]) for v in variants] == [
+            ("pdf", "warm"),
+            ("pdf", "cold"),
+            ("tiff", "warm"),
+            ("tiff", "cold"),
+        ]
+
+    def test_encoder_threads(self):
+        """Test that thread counts are compared alongside the default pool."""
+        variants = parse_compare(["encoder-threads=auto,0,4"])
+        assert [v["encoder-threads"] for v in variants] == ["auto", "0", "4"]
+
+    @pytest.mark.parametrize(
+        "value",
+        ["format", "jobs=1,2", "format=png", "cache=", "encoder-threads=-1,two"],
+    )
+    def test_invalid(self, value):
+        """Test that unknown options and values are rejected."""
+        with pytest.raises(ValueError):
+            parse_compare([value])
+
+
+class TestBenchmark:
+    """Test suite for the end-to-end benchmark."""
+
+    def test_synthetic_project(self, tmp_path):
+        """Test that the generated project is a valid spec."""
+        spec = load_spec(write_synthetic_project(tmp_path, tickets=50, texts=2))
+        assert spec.layout.grid_size == (3, 4)
+        assert len(spec.texts) == 2
+        assert spec.params is not None
+        assert spec.params[0].value_count == 50
+
+    @pytest.mark.parametrize(
+        "options", parse_compare(["format=pdf,tiff", "encoder-threads=2"])
+    )
+    def test_run_variant(self, tmp_path, options):
+        """Test that a run reports throughput and output size."""
+        spec_path = write_synthetic_project(tmp_path, tickets=10, grid=(2, 2))
+        result = run_variant(spec_path, tmp_path, options, repeat=2)
+
+        assert result["tickets"] == 10
+        assert result["pages"] == 3
+        assert result["output_bytes"] > 0
+        assert result["bytes_per_page"] == result["output_bytes"] / 3
+        assert result["tickets_per_second"] > 0
+        # Only PDF pages are encoded on separate threads
+        threads = 2 if options["format"] == "pdf" else 0
+        assert result["encoder_threads"] == threads
+        assert set(result["seconds"]) == {"load_spec", "prepare", "generate", "total"}
+
+    def test_isolated_variants(self, tmp_path):
+        """Test that each variant runs in its own process."""
+        spec_path = write_synthetic_project(tmp_path, tickets=4, grid=(2, 2))
+        variants = parse_compare(["cache=warm,cold"])
+        report = run_benchmark(spec_path, tmp_path, variants)
+
+        assert [v["options"] for v in report["variants"]] == variants
+        assert all(v["pages"] == 1 for v in report["variants"])
+
+    def test_cli_json(self, tmp_path):
+        """Test that the command prints the report as JSON."""
+        result = subprocess.run(
+            [sys.executable, "-m", "serial_stamp.cli", "bench", "--synthetic"]
+            + ["--tickets", "4", "--grid", "2x2", "--no-isolate"],
+            capture_output=True,
+            text=True,
+            cwd=tmp_path,
+        )
+        assert result.returncode == 0, result.stdout
+        report = json.loads(result.stdout)
+        assert report["variants"][0]["tickets"] == 4
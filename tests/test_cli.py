@@ -0,0 +1,67 @@
+import subprocess
+import sys
+
+import pytest
+
+# Modules that only `generate`/`preview` need; other commands must not load them
+HEAVY_MODULES = ("PIL", "pydantic", "serial_stamp.engine", "serial_stamp.models")
+
+# Cumulative import time allowed for serial_stamp.cli itself. Generous enough for
+# slow CI machines, far below the ~250ms it cost with eager imports.
+IMPORT_BUDGET_US = 60_000
+
+
+def import_times(code: str, cwd=None) -> dict[str, int]:
+    """Runs `code` under `python -X importtime` and returns cumulative times."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        capture_output=True,
+        text=True,
+        cwd=cwd,
+    )
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line.split("|")
+        times[name.strip()] = int(cumulative)
+    return times
+
+
+def run_cli(*args: str) -> str:
+    return f"import sys; sys.argv = {['serial-stamp', *args]!r}; " + (
+        "from serial_stamp.cli import main\n"
+        "try:\n"
+        "    main()\n"
+        "except SystemExit:\n"
+        "    pass"
+    )
+
+
+class TestImportTime:
+    """Import-time budget for the CLI entry point."""
+
+    def test_module_import_budget(self):
+        """Test that importing the CLI stays within budget."""
+        times = import_times("import serial_stamp.cli")
+        assert times["serial_stamp.cli"] < IMPORT_BUDGET_US
+
+    @pytest.mark.parametrize(
+        "args",
+        [("--help",), ("init", "new-project"), ("pack", "missing", "-o", "x.stamp")],
+    )
+    def test_light_commands_skip_heavy_modules(self, args, tmp_path):
+        """Test that init, pack and --help never import Pillow or pydantic."""
+        times = import_times(run_cli(*args), cwd=tmp_path)
+        assert "serial_stamp.cli" in times
+        loaded = [
+            name
+            for name in times
+            if any(name == m or name.startswith(m + ".") for m in HEAVY_MODULES)
+        ]
+        assert loaded == []
+
+    def test_generate_imports_engine(self, tmp_path):
+        """Sanity check: generate still loads the engine when it runs."""
+        times = import_times(run_cli("generate", "missing", "-o", "x.pdf"), tmp_path)
+        assert "serial_stamp.engine" in times
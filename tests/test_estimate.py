@@ -0,0 +1,90 @@
+import subprocess
+import sys
+from dataclasses import replace
+
+import pytest
+
+from serial_stamp.bench import write_synthetic_project
+from serial_stamp.estimate import estimate_run
+from tests.conftest import make_engine
+
+
+class TestPageLayout:
+    """Test suite for the page plan of a run."""
+
+    def test_layout(self, tmp_path):
+        """Test ticket, page and stack counts."""
+        layout = make_engine(
+            tmp_path / "out.pdf", tickets=50, stack_size=3
+        ).page_layout()
+
+        assert layout.tickets == 50
+        assert layout.tickets_per_page == 4
+        # 13 pages are needed, rounded up to whole stacks of 3
+        assert (layout.stacks, layout.pages) == (5, 15)
+
+    def test_no_tickets(self, tmp_path):
+        """Test that an empty run has no pages."""
+        engine = make_engine(tmp_path / "out.pdf", tickets=50)
+        engine.spec.params = None
+        assert engine.page_layout().pages == 0
+
+
+class TestEstimateRun:
+    """Test suite for dry-run cost estimates."""
+
+    @pytest.mark.parametrize("suffix", ["pdf", "tiff"])
+    def test_matches_generation(self, tmp_path, suffix):
+        """Test that the projected size is close to the real output."""
+        output = tmp_path / f"out.{suffix}"
+        engine = make_engine(output, tickets=50)
+        estimate = estimate_run(engine, sample_pages=3)
+
+        assert not output.exists()
+        assert estimate.format == suffix.upper()
+        assert estimate.sample_pages == 3
+        assert estimate.layout.pages == 13
+        assert estimate.seconds > 0
+
+        engine.generate()
+        actual = output.stat().st_size
+        assert abs(estimate.output_bytes - actual) / actual < 0.2
+
+    def test_small_run(self, tmp_path):
+        """Test that the sample is capped at the number of pages."""
+        estimate = estimate_run(make_engine(tmp_path / "out.pdf", tickets=3))
+        assert estimate.sample_pages == 1
+        assert estimate.overhead_bytes == 0.0
+        assert estimate.output_bytes == round(estimate.bytes_per_page)
+
+    def test_encoder_threads(self, tmp_path):
+        """Test that encoding overlaps rendering only with spare CPUs."""
+        estimate = estimate_run(make_engine(tmp_path / "out.pdf", tickets=50))
+        serial = replace(estimate, encoder_threads=0)
+        single_cpu = replace(estimate, encoder_threads=4, cpu_count=1)
+        parallel = replace(estimate, encoder_threads=4, cpu_count=8)
+
+        assert single_cpu.seconds == serial.seconds
+        assert parallel.seconds < serial.seconds
+
+    def test_unknown_format(self, tmp_path):
+        """Test that outputs Pillow cannot write are rejected."""
+        with pytest.raises(ValueError, match="Unsupported output format"):
+            estimate_run(make_engine(tmp_path / "out.xyz", tickets=50))
+
+    def test_cli(self, tmp_path, monkeypatch):
+        """Test that --dry-run reports the estimate without writing output."""
+        monkeypatch.setenv("SERIAL_STAMP_CACHE_DIR", str(tmp_path / "cache"))
+        spec_path = write_synthetic_project(tmp_path / "proj", tickets=60, texts=1)
+        output = tmp_path / "out.pdf"
+
+        result = subprocess.run(
+            [sys.executable, "-m", "serial_stamp.cli", "generate"]
+            + [str(spec_path), "-o", str(output), "--dry-run"],
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+        assert "Pages: 5 in 5 stacks of 1" in result.stdout
+        assert "Estimated PDF size" in result.stdout
+        assert not output.exists()
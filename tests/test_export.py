@@ -0,0 +1,138 @@
+import io
+import subprocess
+import sys
+import zipfile
+
+import pytest
+from PIL import Image
+
+from serial_stamp import archive
+from serial_stamp.archive import DirectoryWriter, ZipStreamWriter, check_entry_name
+from serial_stamp.bench import write_synthetic_project
+from serial_stamp.export import NameTemplate, export_tickets
+from serial_stamp.progress import ProgressEvent
+from tests.conftest import make_engine
+
+
+class TestZipStreamWriter:
+    """Test suite for the streaming zip writer."""
+
+    def test_readable(self, tmp_path):
+        """Test that zipfile reads back every entry."""
+        path = tmp_path / "out.zip"
+        with ZipStreamWriter(path) as writer:
+            for n in range(50):
+                writer.write(f"dir/{n}.txt", b"x" * n)
+            writer.write("ünïcode.txt", b"")
+
+        with zipfile.ZipFile(path) as zf:
+            assert zf.testzip() is None
+            assert len(zf.namelist()) == 51
+            assert zf.read("dir/7.txt") == b"x" * 7
+            assert "ünïcode.txt" in zf.namelist()
+        assert writer.bytes_written == path.stat().st_size
+
+    def test_zip64(self, tmp_path, monkeypatch):
+        """Test Zip64 sizes, offsets and entry counts (with lowered limits)."""
+        monkeypatch.setattr(archive, "ZIP64_LIMIT", 100)
+        monkeypatch.setattr(archive, "ZIP_MAX_ENTRIES", 3)
+        path = tmp_path / "out.zip"
+        with ZipStreamWriter(path) as writer:
+            writer.write("big.bin", bytes(range(200)))
+            for n in range(5):
+                writer.write(f"{n}.txt", str(n).encode())
+
+        with zipfile.ZipFile(path) as zf:
+            assert zf.testzip() is None
+            assert zf.read("big.bin") == bytes(range(200))
+            assert zf.read("4.txt") == b"4"
+            assert len(zf.infolist()) == 6
+
+    @pytest.mark.parametrize("name", ["", "/etc/passwd", "../up.png", "a\\b.png"])
+    def test_unsafe_names(self, name):
+        """Test that names escaping the destination are rejected."""
+        with pytest.raises(ValueError):
+            check_entry_name(name)
+
+    def test_directory(self, tmp_path):
+        """Test that the directory writer creates nested files."""
+        with DirectoryWriter(tmp_path / "out") as writer:
+            writer.write("a/b.txt", b"data")
+        assert (tmp_path / "out" / "a" / "b.txt").read_bytes() == b"data"
+
+
+class TestNameTemplate:
+    """Test suite for per-ticket file names."""
+
+    def test_variables(self):
+        """Test ticket variables and the zero-padded index."""
+        names = NameTemplate.parse("$index-ticket-$no.jpg", 120)
+        assert names.format == "JPEG"
+        assert names.name(4, ("no",), ["A7"]) == "005-ticket-A7.jpg"
+
+    def test_no_variable(self):
+        """Test that a fixed name is rejected for several tickets."""
+        with pytest.raises(ValueError, match="no variable"):
+            NameTemplate.parse("ticket.png", 2)
+        NameTemplate.parse("ticket.png", 1)
+
+    def test_unknown_format(self):
+        """Test that suffixes Pillow cannot write are rejected."""
+        with pytest.raises(ValueError, match="Unsupported ticket image format"):
+            NameTemplate.parse("ticket-$no.xyz", 2)
+
+
+class TestExportTickets:
+    """Test suite for per-ticket image export."""
+
+    @pytest.mark.parametrize("threads", [0, 2])
+    def test_zip(self, tmp_path, threads):
+        """Test that every ticket is written, in order, as the same image."""
+        engine = make_engine(tickets=12, encoder_threads=threads)
+        path = tmp_path / "tickets.zip"
+        summary = export_tickets(engine, path, "ticket-$no.png")
+
+        assert summary is not None
+        assert summary.tickets == 12
+        assert summary.bytes_written == path.stat().st_size
+        with zipfile.ZipFile(path) as zf:
+            assert zf.namelist() == [f"ticket-{n}.png" for n in range(1, 13)]
+            with Image.open(io.BytesIO(zf.read("ticket-3.png"))) as image:
+                expected = engine.generate_ticket(engine.compile_plan(), ("3",))
+                assert image.tobytes() == expected.tobytes()
+
+    def test_color(self, tmp_path):
+        """Test that [output] color and DPI apply to ticket images."""
+        export_tickets(
+            make_engine(tickets=12, output={"color": "gray", "dpi": 300}),
+            tmp_path,
+            "$no.png",
+        )
+        with Image.open(tmp_path / "1.png") as image:
+            assert image.mode == "L"
+            assert image.info["dpi"] == pytest.approx((300, 300), rel=1e-4)
+
+    def test_progress(self, tmp_path):
+        """Test that progress counts tickets when there are no pages."""
+        events: list[ProgressEvent] = []
+        engine = make_engine(tickets=12)
+        export_tickets(engine, tmp_path / "t.zip", on_progress=events.append)
+        assert events[-1].phase == "done"
+        assert (events[-1].tickets_done, events[-1].page_count) == (12, 0)
+
+    def test_cli(self, tmp_path, monkeypatch):
+        """Test that --per-ticket exports without a sheet output."""
+        monkeypatch.setenv("SERIAL_STAMP_CACHE_DIR", str(tmp_path / "cache"))
+        spec_path = write_synthetic_project(tmp_path / "proj", tickets=5, texts=1)
+        path = tmp_path / "tickets.zip"
+
+        result = subprocess.run(
+            [sys.executable, "-m", "serial_stamp.cli", "generate", str(spec_path)]
+            + ["--per-ticket", str(path)],
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+        assert "Wrote per-ticket images to" in result.stdout
+        with zipfile.ZipFile(path) as zf:
+            assert zf.namelist() == [f"ticket-{n}.png" for n in range(1, 6)]
@@ -0,0 +1,109 @@
+import os
+import shutil
+from pathlib import Path
+
+import pytest
+from PIL import ImageFont
+
+from serial_stamp.fonts import FontRegistry
+from serial_stamp.models import Text
+
+FONT = Path(__file__).parent.parent / "fonts" / "Roboto-Medium.ttf"
+
+
+@pytest.fixture
+def project(tmp_path):
+    (tmp_path / "assets").mkdir()
+    shutil.copy(FONT, tmp_path / "assets" / "font.ttf")
+    return tmp_path
+
+
+class TestFontRegistry:
+    """Test suite for the process-wide font registry."""
+
+    def test_cached_per_size(self, project):
+        """Test that fonts are loaded once per size and reused."""
+        registry = FontRegistry()
+        first = registry.get("assets/font.ttf", 12, project)
+        again = registry.get("assets/font.ttf", 12, project)
+        other = registry.get("assets/font.ttf", 30, project)
+
+        assert first is again
+        assert other is not first
+        assert isinstance(other, ImageFont.FreeTypeFont)
+        assert other.size == 30
+        assert (registry.hits, registry.misses) == (1, 2)
+
+    def test_bytes_shared_across_sizes(self, project):
+        """Test that every size uses the same font file buffer."""
+        registry = FontRegistry()
+        small = registry.get("assets/font.ttf", 12, project)
+        large = registry.get("assets/font.ttf", 40, project)
+        assert isinstance(small, ImageFont.FreeTypeFont)
+        assert isinstance(large, ImageFont.FreeTypeFont)
+        assert small.font_bytes is large.font_bytes
+
+    def test_resolves_from_work_dir(self, project, tmp_path_factory):
+        """Test that relative paths resolve from the work dir, not the cwd."""
+        registry = FontRegistry()
+        cwd = os.getcwd()
+        os.chdir(tmp_path_factory.mktemp("elsewhere"))
+        try:
+            font = registry.get("assets/font.ttf", 12, project)
+        finally:
+            os.chdir(cwd)
+        assert isinstance(font, ImageFont.FreeTypeFont)
+        assert font.getname()[0] == "Roboto"
+
+    def test_reloads_changed_file(self, project):
+        """Test that a modified font file is picked up."""
+        registry = FontRegistry()
+        first = registry.get("assets/font.ttf", 12, project)
+
+        path = project / "assets" / "font.ttf"
+        shutil.copy(FONT.parent / "times.ttf", path)
+        os.utime(path, ns=(0, 1))
+
+        assert registry.get("assets/font.ttf", 12, project) is not first
+
+    def test_lru_eviction(self, project):
+        """Test that the least recently used font is evicted."""
+        registry = FontRegistry(max_fonts=2)
+        first = registry.get("assets/font.ttf", 10, project)
+        registry.get("assets/font.ttf", 11, project)
+        registry.get("assets/font.ttf", 10, project)
+        registry.get("assets/font.ttf", 12, project)
+
+        assert registry.get("assets/font.ttf", 10, project) is first
+        assert registry.misses == 3
+        registry.get("assets/font.ttf", 11, project)
+        assert registry.misses == 4
+
+    def test_evicted_file_bytes(self, project):
+        """Test that a file's bytes are dropped with its last cached font."""
+        registry = FontRegistry(max_fonts=2)
+        registry.get("assets/font.ttf", 10, project)
+        registry.get("assets/font.ttf", 11, project)
+        assert len(registry._files) == 1
+
+        registry.get(str(FONT), 10)
+        assert len(registry._files) == 2
+        registry.get(str(FONT), 11)
+        assert list(registry._files) == [str(FONT.resolve())]
+
+    def test_text_font(self, project, tmp_path_factory):
+        """Test that spec texts load their fonts from the project directory."""
+        text = Text(template="$no", position=(0, 0), ttf="assets/font.ttf", size=9)
+        cwd = os.getcwd()
+        os.chdir(tmp_path_factory.mktemp("elsewhere"))
+        try:
+            font = text.get_font(project)
+        finally:
+            os.chdir(cwd)
+        assert isinstance(font, ImageFont.FreeTypeFont)
+        assert font.size == 9
+
+    def test_missing_font(self, project):
+        """Test that a missing font file still raises OSError."""
+        with pytest.raises(OSError):
+            FontRegistry().get("assets/missing.ttf", 12, project)
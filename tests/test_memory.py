@@ -0,0 +1,177 @@
+import re
+from pathlib import Path
+
+import pytest
+from PIL import Image
+
+from serial_stamp.engine import Engine, PageSequence
+from serial_stamp.fonts import FontRegistry
+from serial_stamp.fonts import registry as font_registry
+from serial_stamp.memory import MemoryBudget, estimate_page_bytes, parse_size
+from tests.conftest import make_engine
+
+REPO_ROOT = Path(__file__).parent.parent
+
+
+def budget_engine(output: Path, max_memory: int | None = None) -> Engine:
+    source = Image.new("RGB", (100, 50), "white")
+    return make_engine(output, source, REPO_ROOT, max_memory=max_memory, tickets=30)
+
+
+def pdf_page_count(path: Path) -> int:
+    return len(re.findall(rb"/Type /Page\b", path.read_bytes()))
+
+
+class TestParseSize:
+    """Test suite for memory size parsing."""
+
+    @pytest.mark.parametrize(
+        "value,expected",
+        [
+            ("1024", 1024),
+            ("512K", 512 << 10),
+            ("2G", 2 << 30),
+            ("2gb", 2 << 30),
+            ("1.5GiB", 3 << 29),
+            (" 64 M ", 64 << 20),
+        ],
+    )
+    def test_valid(self, value, expected):
+        """Test binary units with optional B/iB suffixes."""
+        assert parse_size(value) == expected
+
+    @pytest.mark.parametrize("value", ["", "G", "2X", "-1M"])
+    def test_invalid(self, value):
+        """Test that malformed sizes are rejected."""
+        with pytest.raises(ValueError):
+            parse_size(value)
+
+
+class TestMemoryBudget:
+    """Test suite for splitting a memory limit."""
+
+    @pytest.fixture
+    def plan(self, tmp_path):
+        return budget_engine(tmp_path / "out.pdf").compile_plan()
+
+    def test_page_estimate(self, plan):
+        """Test the estimate covers the page, encoder buffers and a ticket."""
+        assert estimate_page_bytes(plan) == 2 * 200 * 100 * 3 + 100 * 50 * 3
+
+    def test_too_small(self, plan):
+        """Test that a limit without room for one page fails early."""
+        with pytest.raises(ValueError, match="too small"):
+            MemoryBudget.plan(100 << 20, plan, baseline=100 << 20)
+
+    def test_pages_in_flight(self, plan):
+        """Test that pages in flight grow with the budget, up to a cap."""
+        page = estimate_page_bytes(plan)
+        tight = MemoryBudget.plan(page * 2, plan, baseline=0)
+        roomy = MemoryBudget.plan(1 << 30, plan, baseline=0)
+
+        assert tight.pages_in_flight == 1
+        assert tight.max_fonts == len(plan.texts)
+        assert roomy.pages_in_flight == 8
+        assert roomy.max_fonts > tight.max_fonts
+
+    def test_value_bytes(self, plan):
+        """Test that cached ticket values take their share of the limit."""
+        page = estimate_page_bytes(plan)
+        assert MemoryBudget.plan(page * 2, plan, baseline=0).pages_in_flight == 1
+        with pytest.raises(ValueError, match="ticket values"):
+            MemoryBudget.plan(page * 2, plan, baseline=0, value_bytes=page * 2)
+
+    def test_engine_counts_values(self, tmp_path):
+        """Test that the engine budgets for its formatted parameters."""
+        engine = budget_engine(tmp_path / "out.pdf", max_memory=1 << 30)
+        engine.spec.params[0].max = 10_000_000  # type: ignore[index,union-attr]
+        budget = engine.memory_budget(engine.compile_plan())
+        assert budget is not None
+        assert budget.pages_in_flight == 8
+        with pytest.raises(ValueError, match="ticket values"):
+            engine.max_memory = budget.baseline + (64 << 20)
+            engine.memory_budget(engine.compile_plan())
+
+
+class TestStreamedGeneration:
+    """Test suite for generating pages on demand."""
+
+    def test_page_sequence_order(self):
+        """Test that pages are rendered once, in order, keeping the first."""
+        rendered = []
+
+        def render(index):
+            rendered.append(index)
+            return Image.new("RGB", (10, 10), (index, 0, 0))
+
+        pages = PageSequence(render, 3)
+        pages.seek(1)
+        pages.seek(2)
+        pages.seek(0)
+        assert pages.getpixel((0, 0)) == (0, 0, 0)
+        assert rendered == [0, 1, 2]
+
+        with pytest.raises(EOFError):
+            pages.seek(3)
+
+    @pytest.mark.parametrize("suffix", ["pdf", "tiff"])
+    def test_all_pages_written(self, tmp_path, suffix):
+        """Test that multi-page writers receive every page."""
+        output = tmp_path / f"out.{suffix}"
+        summary = budget_engine(output).generate()
+        assert summary is not None
+
+        assert summary.pages == 8
+        assert summary.tickets == 30
+        assert summary.bytes_written == output.stat().st_size
+        if suffix == "pdf":
+            assert pdf_page_count(output) == 8
+        else:
+            with Image.open(output) as image:
+                assert image.n_frames == 8
+
+    def test_max_memory(self, tmp_path):
+        """Test that a memory limit is planned and reported."""
+        summary = budget_engine(tmp_path / "out.pdf", max_memory=4 << 30).generate()
+        assert summary is not None and summary.memory_budget is not None
+        assert summary.memory_budget.limit == 4 << 30
+        assert "peak memory" in summary.describe()
+
+        with pytest.raises(ValueError, match="too small"):
+            budget_engine(tmp_path / "out.pdf", max_memory=1 << 20).generate()
+
+
+class TestFontRegistryResize:
+    """Test suite for shrinking the font cache."""
+
+    def test_resize(self):
+        """Test that shrinking evicts the least recently used fonts."""
+        registry = FontRegistry(max_fonts=8)
+        for size in range(10, 14):
+            registry.get("fonts/Roboto-Medium.ttf", size, REPO_ROOT)
+        registry.resize(2)
+
+        misses = registry.misses
+        registry.get("fonts/Roboto-Medium.ttf", 13, REPO_ROOT)
+        assert registry.misses == misses
+        registry.get("fonts/Roboto-Medium.ttf", 10, REPO_ROOT)
+        assert registry.misses == misses + 1
+
+    def test_capped(self):
+        """Test that a capped run shrinks the cache only while it lasts."""
+        registry = FontRegistry(max_fonts=8)
+        with registry.capped(2):
+            for size in range(10, 14):
+                registry.get("fonts/Roboto-Medium.ttf", size, REPO_ROOT)
+            assert len(registry._fonts) == 2
+        for size in range(10, 16):
+            registry.get("fonts/Roboto-Medium.ttf", size, REPO_ROOT)
+        assert len(registry._fonts) == 6
+        assert registry.max_fonts == 8
+
+    def test_run_restores_registry(self, tmp_path):
+        """Test that a memory limited run leaves the shared registry's size alone."""
+        size = font_registry.max_fonts
+        budget_engine(tmp_path / "out.pdf", max_memory=4 << 30).generate()
+        assert font_registry.max_fonts == size
+        assert not font_registry._caps
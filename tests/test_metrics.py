@@ -0,0 +1,116 @@
+import json
+from pathlib import Path
+from typing import Any
+
+import pytest
+from PIL import Image, ImageChops
+
+from serial_stamp.engine import Engine
+from serial_stamp.metrics import STAGES, Histogram, Metrics
+from tests.conftest import make_engine
+
+REPO_ROOT = Path(__file__).parent.parent
+
+
+SPEC: dict[str, Any] = {
+    "layout": {"grid-size": [2, 2], "gap": 4, "margin": 8},
+    "texts": [
+        {
+            "template": "No $no",
+            "position": [5, 5],
+            "ttf": "fonts/Roboto-Medium.ttf",
+        },
+        {"template": "Seat $seat", "position": [5, 30]},
+    ],
+    "params": [
+        {"name": "no", "type": "int", "min": 1, "max": 5},
+        {"name": "seat", "type": "string", "values": ["A", "B"]},
+    ],
+}
+
+
+def timed_engine(output: Path, metrics: Metrics | None = None) -> Engine:
+    source = Image.new("RGB", (120, 60), "lightblue")
+    return make_engine(output, source, REPO_ROOT, metrics, **SPEC)
+
+
+class TestHistogram:
+    """Test suite for the latency histogram."""
+
+    def test_buckets(self):
+        """Test that observations land in the first bucket bounding them."""
+        histogram = Histogram(bounds=(0.1, 1.0))
+        for value in (0.05, 0.1, 0.5, 2.0):
+            histogram.observe(value)
+
+        assert histogram.counts == [2, 1, 1]
+        assert histogram.cumulative() == [("0.1", 2), ("1.0", 3), ("+Inf", 4)]
+        assert histogram.as_dict()["min"] == 0.05
+        assert histogram.as_dict()["max"] == 2.0
+        assert histogram.sum == pytest.approx(2.65)
+
+    def test_empty(self):
+        """Test the summary of a histogram without observations."""
+        summary = Histogram().as_dict()
+        assert summary["count"] == 0
+        assert summary["min"] is None and summary["mean"] is None
+
+
+class TestMetrics:
+    """Test suite for metrics collection and export."""
+
+    def test_openmetrics(self):
+        """Test the OpenMetrics text exposition."""
+        metrics = Metrics()
+        metrics.observe("rasterize", 0.002)
+        metrics.inc("tickets_rendered", 3)
+        text = metrics.to_openmetrics()
+
+        assert "# TYPE serial_stamp_stage_seconds histogram" in text
+        assert (
+            'serial_stamp_stage_seconds_bucket{stage="rasterize",le="+Inf"} 1' in text
+        )
+        assert 'serial_stamp_stage_seconds_count{stage="rasterize"} 1' in text
+        assert "# TYPE serial_stamp_tickets_rendered counter" in text
+        assert "serial_stamp_tickets_rendered_total 3" in text
+        assert text.endswith("# EOF\n")
+
+    def test_write_by_suffix(self, tmp_path):
+        """Test that .json paths get JSON and others OpenMetrics text."""
+        metrics = Metrics()
+        metrics.inc("pages_rendered")
+        metrics.write(tmp_path / "m.json")
+        metrics.write(tmp_path / "m.prom")
+
+        data = json.loads((tmp_path / "m.json").read_text())
+        assert data["counters"] == {"pages_rendered": 1}
+        assert (tmp_path / "m.prom").read_text().endswith("# EOF\n")
+
+
+class TestEngineMetrics:
+    """Test suite for instrumented generation."""
+
+    def test_generate(self, tmp_path, capsys):
+        """Test that every stage is timed and rendered work is counted."""
+        metrics = Metrics()
+        timed_engine(tmp_path / "out.pdf", metrics).generate()
+        data = metrics.as_dict()
+
+        assert set(STAGES) <= set(data["stages"])
+        assert data["counters"]["tickets_rendered"] == 10
+        assert data["counters"]["pages_rendered"] == 3
+        assert data["stages"]["rasterize"]["count"] == 20
+        assert data["stages"]["items"]["count"] == 3
+        assert (
+            data["counters"]["bytes_written"] == (tmp_path / "out.pdf").stat().st_size
+        )
+
+    def test_output_unchanged(self, tmp_path):
+        """Test that instrumentation does not change the rendered pages."""
+        plain = timed_engine(tmp_path / "a.pdf")
+        timed = timed_engine(tmp_path / "b.pdf", Metrics())
+        items = list(plain._get_items_iterator())[:4]
+
+        page = plain.print_page(plain.compile_plan(), 0, items)
+        timed_page = timed.print_page(timed.compile_plan(), 0, items)
+        assert ImageChops.difference(page, timed_page).getbbox() is None
@@ -0,0 +1,237 @@
+import io
+import re
+import subprocess
+import sys
+import zlib
+from pathlib import Path
+from typing import Any
+
+import pytest
+from PIL import Image
+from pydantic import ValidationError
+
+from serial_stamp.bench import write_synthetic_project
+from serial_stamp.engine import Engine
+from serial_stamp.models import Output
+from serial_stamp.pdf import choose_codec, encode_page, write_pdf
+from tests.conftest import make_engine
+
+
+def output_engine(output: Path, **settings: Any) -> Engine:
+    layout = {"grid-size": [2, 1], "gap": 0, "margin": 0}
+    return make_engine(
+        output, encoder_threads=0, tickets=6, layout=layout, output=settings
+    )
+
+
+def search(pattern: bytes, data: bytes) -> bytes:
+    match = re.search(pattern, data)
+    assert match is not None, pattern
+    return match.group(1)
+
+
+def image_objects(data: bytes) -> list[tuple[bytes, bytes]]:
+    """The dictionary and stream of each image XObject in a PDF."""
+    pattern = (
+        rb"obj<<((?:(?!obj<<).)*?/Subtype /Image.*?)>>\s*"
+        rb"stream\n(.*?)\nendstream"
+    )
+    return re.findall(pattern, data, re.S)
+
+
+def color_noise(size: tuple[int, int]) -> Image.Image:
+    bands = [Image.effect_noise(size, 64) for _ in range(3)]
+    return Image.merge("RGB", bands)
+
+
+class TestOutputSettings:
+    """Test suite for [output] encoding settings."""
+
+    def test_defaults(self):
+        """Test that defaults keep the previous output (100 DPI, JPEG)."""
+        output = Output()
+        assert (output.dpi, output.codec, output.quality) == (100.0, None, 75)
+        assert output.color == "rgb"
+
+    def test_aliases(self):
+        """Test that spec keys are kebab-case."""
+        output = Output.model_validate({"compress-level": 9, "codec": "flate"})
+        assert output.compress_level == 9
+
+    @pytest.mark.parametrize(
+        "settings",
+        [{"quality": 0}, {"dpi": 0}, {"codec": "png"}, {"compress-level": 10}],
+    )
+    def test_invalid(self, settings):
+        """Test that out of range settings are rejected."""
+        with pytest.raises(ValidationError):
+            Output.model_validate(settings)
+
+
+class TestEncodePage:
+    """Test suite for per-page PDF encoding."""
+
+    def test_flate_is_lossless(self):
+        """Test that flate pages decompress to the exact pixels."""
+        page = Image.linear_gradient("L").convert("RGB")
+        encoded = encode_page(
+            page, Output.model_validate({"codec": "flate", "compress-level": 1})
+        )
+        assert encoded.codec == "flate"
+        assert zlib.decompress(encoded.data) == page.tobytes()
+
+    def test_jpeg_quality(self):
+        """Test that JPEG quality trades size for fidelity."""
+        page = color_noise((200, 200))
+        low = encode_page(page, Output(quality=20))
+        high = encode_page(page, Output(quality=95, subsampling="4:4:4"))
+        assert low.codec == high.codec == "jpeg"
+        assert len(low.data) < len(high.data)
+
+    def test_auto(self):
+        """Test that auto picks flate for flat pages and JPEG for photos."""
+        auto = Output(codec="auto")
+        flat = Image.new("RGB", (100, 100), "white")
+        photo = color_noise((100, 100))
+
+        assert choose_codec(flat, auto) == "flate"
+        assert choose_codec(photo, auto) == "jpeg"
+        assert choose_codec(photo, Output()) == "jpeg"
+
+    def test_bilevel(self):
+        """Test that 1-bit pages are always written losslessly."""
+        page = Image.new("1", (20, 3), 1)
+        encoded = encode_page(page, Output(codec="jpeg"))
+        assert encoded.codec == "flate"
+        # Rows are padded to whole bytes
+        assert zlib.decompress(encoded.data) == b"\xff\xff\xf0" * 3
+
+
+class TestEngineOutput:
+    """Test suite for encoding settings during generation."""
+
+    @pytest.mark.parametrize(
+        "settings,filter,bits,color_space",
+        [
+            ({}, b"DCTDecode", 8, b"DeviceRGB"),
+            ({"color": "gray"}, b"DCTDecode", 8, b"DeviceGray"),
+            ({"codec": "flate"}, b"FlateDecode", 8, b"DeviceRGB"),
+            ({"color": "bw"}, b"FlateDecode", 1, b"DeviceGray"),
+        ],
+    )
+    def test_pdf_pages(self, tmp_path, settings, filter, bits, color_space):
+        """Test the color space and filter of every written page."""
+        output = tmp_path / "out.pdf"
+        output_engine(output, **settings).generate()
+
+        images = image_objects(output.read_bytes())
+        assert len(images) == 3
+        for header, _ in images:
+            assert b"/Filter /" + filter in header
+            assert b"/BitsPerComponent %d" % bits in header
+            assert b"/ColorSpace /" + color_space in header
+
+    def test_bilevel_pixels(self, tmp_path):
+        """Test that black and white pages are thresholded, not dithered."""
+        output = tmp_path / "out.pdf"
+        output_engine(output, color="bw").generate()
+
+        header, stream = image_objects(output.read_bytes())[0]
+        width = int(search(rb"/Width (\d+)", header))
+        height = int(search(rb"/Height (\d+)", header))
+        page = Image.frombytes("1", (width, height), zlib.decompress(stream))
+        # The gradient's dark top turns black, its light bottom white
+        assert page.getpixel((100, 2)) == 0
+        assert page.getpixel((100, 57)) == 255
+
+    def test_transparent_overlay(self, tmp_path):
+        """Test that transparent overlay pages keep their alpha in a soft mask."""
+        output = tmp_path / "out.pdf"
+        engine = output_engine(output, **{"overlay-only": True, "codec": "auto"})
+        engine.spec.background = (255, 255, 255, 0)
+        engine.generate()
+
+        images = image_objects(output.read_bytes())
+        # A soft mask and a color image per page
+        assert len(images) == 6
+        masks = [stream for header, stream in images if b"/SMask" not in header]
+        alpha = zlib.decompress(masks[0])
+        assert len(alpha) == 240 * 60
+        assert min(alpha) == 0 and max(alpha) == 255
+
+    @pytest.mark.parametrize("color", ["gray", "bw"])
+    def test_transparent_gray_overlay(self, tmp_path, color):
+        """Test that gray and bw overlay pages stay transparent, not black."""
+        settings = {"overlay-only": True, "color": color, "codec": "auto"}
+        for suffix in ("tiff", "pdf"):
+            engine = output_engine(tmp_path / f"out.{suffix}", **settings)
+            engine.spec.background = (255, 255, 255, 0)
+            engine.generate()
+
+        with Image.open(tmp_path / "out.tiff") as page:
+            assert page.mode == "LA"
+            # An empty corner, and the dark text near the first slot's corner
+            assert page.getpixel((239, 59))[1] == 0
+            gray, alpha = page.crop((5, 5, 40, 20)).split()
+            assert gray.getextrema()[0] == 0 and alpha.getextrema()[1] == 255
+
+        images = image_objects((tmp_path / "out.pdf").read_bytes())
+        grays = [header for header, _ in images if b"/SMask" in header]
+        assert len(grays) == 3
+        assert all(b"/DeviceGray" in header for header in grays)
+
+    def test_dpi(self, tmp_path):
+        """Test that the DPI sets the printed page size."""
+        for dpi in (100, 300):
+            output = tmp_path / f"{dpi}.pdf"
+            output_engine(output, dpi=dpi).generate()
+            media_box = search(rb"/MediaBox \[ 0 0 ([\d.]+)", output.read_bytes())
+            # 240 pixels wide
+            assert float(media_box) == pytest.approx(240 * 72 / dpi)
+
+    @pytest.mark.parametrize(
+        "settings,compression",
+        [
+            ({}, "raw"),
+            ({"codec": "flate"}, "tiff_adobe_deflate"),
+            ({"codec": "jpeg"}, "jpeg"),
+            ({"color": "bw"}, "group4"),
+        ],
+    )
+    def test_tiff(self, tmp_path, settings, compression):
+        """Test that TIFF output uses the matching compression."""
+        output = tmp_path / "out.tiff"
+        output_engine(output, **settings).generate()
+
+        with Image.open(output) as image:
+            assert image.n_frames == 3
+            assert image.info["compression"] == compression
+
+    def test_same_bytes_as_pillow(self, tmp_path):
+        """Test that default settings still match Pillow's PDF writer."""
+        page = Image.linear_gradient("L").convert("RGB")
+        expected = tmp_path / "out.pdf"
+        page.save(expected, resolution=100.0, save_all=True)
+
+        actual = io.BytesIO()
+        write_pdf(actual, "out.pdf", [encode_page(page, Output())], 1, 100.0)
+        strip = re.compile(rb"\(D:\d+Z\)")
+        assert strip.sub(b"", actual.getvalue()) == strip.sub(
+            b"", expected.read_bytes()
+        )
+
+    def test_cli_overrides(self, tmp_path, monkeypatch):
+        """Test that command line options override [output]."""
+        monkeypatch.setenv("SERIAL_STAMP_CACHE_DIR", str(tmp_path / "cache"))
+        spec_path = write_synthetic_project(tmp_path / "proj", tickets=12, texts=1)
+        output = tmp_path / "out.pdf"
+
+        subprocess.run(
+            [sys.executable, "-m", "serial_stamp.cli", "generate", str(spec_path)]
+            + ["-o", str(output), "--codec", "flate", "--color", "gray"],
+            capture_output=True,
+            check=True,
+        )
+        header, _ = image_objects(output.read_bytes())[0]
+        assert b"/FlateDecode" in header
+        assert b"/DeviceGray" in header
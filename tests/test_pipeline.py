@@ -0,0 +1,134 @@
+import io
+import re
+import threading
+import time
+
+import pytest
+from PIL import Image
+
+from serial_stamp.memory import MemoryBudget, estimate_page_bytes
+from serial_stamp.metrics import Metrics
+from serial_stamp.pdf import encode_page, write_pdf
+from serial_stamp.pipeline import encode_ordered
+from tests.conftest import make_engine
+
+
+def without_dates(data: bytes) -> bytes:
+    return re.sub(rb"\(D:\d+Z\)", b"", data)
+
+
+class TestEncodeOrdered:
+    """Test suite for the bounded render/encode pipeline."""
+
+    def test_order(self):
+        """Test that results come back in order despite uneven encode times."""
+
+        def encode(n):
+            time.sleep(0.001 * (n % 3))
+            return n * 10
+
+        assert list(encode_ordered(range(20), encode, 4, 6)) == list(range(0, 200, 10))
+
+    def test_backpressure(self):
+        """Test that no more than `depth` pages are in flight."""
+        lock = threading.Lock()
+        in_flight = peak = 0
+
+        def produce():
+            nonlocal in_flight, peak
+            for n in range(30):
+                with lock:
+                    in_flight += 1
+                    peak = max(peak, in_flight)
+                yield n
+
+        for _ in encode_ordered(produce(), lambda n: n, 4, 3):
+            with lock:
+                in_flight -= 1
+
+        assert peak == 3
+
+    def test_error(self):
+        """Test that encoding errors are raised to the consumer."""
+
+        def encode(n):
+            if n == 5:
+                raise ValueError("bad page")
+            return n
+
+        with pytest.raises(ValueError, match="bad page"):
+            list(encode_ordered(range(10), encode, 2, 2))
+
+
+class TestWritePdf:
+    """Test suite for writing pre-encoded pages."""
+
+    def test_same_as_pillow(self, tmp_path):
+        """Test that the file matches Pillow's own multi-page PDF."""
+        pages = [Image.new("RGB", (40, 30), (n * 50, 0, 0)) for n in range(3)]
+        pages.append(Image.new("L", (30, 40), 128))
+
+        expected = tmp_path / "out.pdf"
+        pages[0].save(expected, save_all=True, append_images=pages[1:])
+        actual = io.BytesIO()
+        write_pdf(actual, "out.pdf", map(encode_page, pages), len(pages))
+
+        assert without_dates(actual.getvalue()) == without_dates(expected.read_bytes())
+
+    def test_page_count_mismatch(self):
+        """Test that a wrong page count is an error."""
+        page = encode_page(Image.new("RGB", (10, 10)))
+        with pytest.raises(ValueError):
+            write_pdf(io.BytesIO(), "out.pdf", [page], 2)
+
+    def test_unsupported_mode(self):
+        """Test that modes without a PDF color space are rejected."""
+        with pytest.raises(ValueError, match="CMYK"):
+            encode_page(Image.new("CMYK", (10, 10)))
+
+
+class TestEnginePipeline:
+    """Test suite for pipelined generation."""
+
+    def test_same_output(self, tmp_path):
+        """Test that threaded encoding writes the same PDF as Pillow's writer."""
+        outputs = []
+        for threads in (0, 1, 3):
+            output = tmp_path / str(threads) / "out.pdf"
+            output.parent.mkdir()
+            summary = make_engine(
+                output, encoder_threads=threads, tickets=30
+            ).generate()
+            assert summary is not None
+            assert summary.pages == 8
+            outputs.append(without_dates(output.read_bytes()))
+
+        assert outputs[0] == outputs[1] == outputs[2]
+
+    def test_shape(self, tmp_path):
+        """Test encoder threads and queue depth per format and budget."""
+        pdf = make_engine(tmp_path / "out.pdf", encoder_threads=2, tickets=30)
+        assert pdf.pipeline_shape() == (2, 4)
+        assert make_engine(
+            tmp_path / "out.tiff", encoder_threads=2, tickets=30
+        ).pipeline_shape() == (0, 1)
+        assert make_engine(
+            tmp_path / "out.pdf", encoder_threads=0, tickets=30
+        ).pipeline_shape() == (0, 1)
+
+        budget = MemoryBudget.plan(1 << 30, pdf.compile_plan(), baseline=0)
+        assert pdf.pipeline_shape(budget) == (2, budget.pages_in_flight)
+        # No more encoder threads than pages in flight
+        page = estimate_page_bytes(pdf.compile_plan())
+        tight = MemoryBudget.plan(page * 3, pdf.compile_plan(), baseline=0)
+        assert pdf.pipeline_shape(tight) == (1, 1)
+
+    def test_metrics(self, tmp_path):
+        """Test that encoding is timed once per page on the encoder threads."""
+        engine = make_engine(tmp_path / "out.pdf", encoder_threads=2, tickets=30)
+        engine.metrics = Metrics()
+        engine.generate()
+
+        stages = engine.metrics.as_dict()["stages"]
+        assert stages["encode"]["count"] == 8
+        assert engine.metrics.as_dict()["counters"]["bytes_written"] > 0
@@ -0,0 +1,111 @@
+from typing import Any
+
+from PIL import Image
+
+from serial_stamp.models import Spec
+from serial_stamp.plan import RenderPlan, resolve_color
+from tests.conftest import make_engine, make_spec
+
+
+def plan_spec(**overrides: Any) -> Spec:
+    defaults: dict[str, Any] = {
+        "stack_size": 2,
+        "layout": {"grid-size": [2, 3], "gap": [4, 6], "margin": [1, 2, 3, 5]},
+        "texts": [{"template": "N° $no", "position": [1, 1], "color": "red"}],
+        "background": "#102030",
+    }
+    return make_spec(20, **(defaults | overrides))
+
+
+class TestRenderPlan:
+    """Test suite for RenderPlan compilation and rendering."""
+
+    def test_geometry(self):
+        """Test that page size and slot boxes follow the layout."""
+        plan = RenderPlan.compile(plan_spec(), Image.new("RGB", (10, 20)))
+
+        # width: 2 * 10 + 4 + 2 + 5, height: 3 * 20 + 2 * 6 + 1 + 3
+        assert plan.page_size == (31, 76)
+        assert plan.tickets_per_page == 6
+        assert plan.slots[0] == (5, 1, 15, 21)
+        assert plan.slots[1] == (19, 1, 29, 21)
+        assert plan.slots[5] == (19, 53, 29, 73)
+
+    def test_resolved_values(self):
+        """Test that colors and names are resolved ahead of rendering."""
+        plan = RenderPlan.compile(plan_spec(), Image.new("RGB", (10, 20)))
+
+        assert plan.background == (16, 32, 48)
+        assert plan.texts[0].fill == (255, 0, 0)
+        assert plan.param_names == ("no",)
+        assert resolve_color((1, 2, 3, 4)) == (1, 2, 3, 4)
+
+    def test_render_page(self):
+        """Test that tickets are pasted in every slot with the stack stride."""
+        spec = plan_spec(texts=[])
+        template = Image.new("RGB", (10, 20), "white")
+        plan = RenderPlan.compile(spec, template)
+
+        page = plan.render_page(1, [("1",), ("2",), ("3",)])
+
+        assert page.size == plan.page_size
+        # Only item 1 fits the stride from offset 1: first slot filled only
+        assert page.getpixel((5, 1)) == (255, 255, 255)
+        assert page.getpixel((19, 1)) == (16, 32, 48)
+
+    def test_overlay_only(self):
+        """Test that overlay pages have the text but not the template."""
+        texts = [{"template": "$no", "position": [2, 2], "size": 30}]
+        template = Image.new("RGB", (40, 40), "blue")
+        spec = plan_spec(background="white", texts=texts)
+        overlay_spec = plan_spec(
+            background="white", texts=texts, output={"overlay-only": True}
+        )
+        plan = RenderPlan.compile(spec, template)
+        overlay = RenderPlan.compile(overlay_spec, template)
+
+        page = overlay.render_page(0, [("8",), ("8",)])
+        reference = plan.render_page(0, [("8",), ("8",)])
+
+        assert page.size == reference.size
+        colors = page.getcolors()
+        assert colors is not None
+        assert (0, 0, 255) not in {color for _, color in colors}
+        # The text is where it is on the full tickets
+        text = page.convert("L").point(lambda v: 255 if v < 64 else 0)
+        reference_text = reference.convert("L").point(lambda v: 255 if v < 8 else 0)
+        assert text.getbbox() == reference_text.getbbox()
+
+    def test_transparent_overlay(self):
+        """Test that an alpha background gives transparent overlay pages."""
+        spec = plan_spec(background=[255, 255, 255, 0], output={"overlay-only": True})
+        plan = RenderPlan.compile(spec, Image.new("RGB", (30, 30)))
+
+        page = plan.render_page(0, [("1",)])
+        assert page.mode == "RGBA"
+        assert page.getpixel((0, 0)) == (255, 255, 255, 0)
+        assert page.getchannel("A").getextrema() == (0, 255)
+
+    def test_formats_shared(self, capsys):
+        """Test that text plans hold no state and compile each template once."""
+        texts = [{"template": "$no $zz", "position": [1, 1]}]
+        plan = RenderPlan.compile(plan_spec(texts=texts), Image.new("RGB", (10, 20)))
+        text = plan.texts[0]
+
+        assert not hasattr(text, "__dict__")
+        assert text.format(("no",), ("1",)) == "1 $zz"
+        assert text.format(("no",), ("2",)) == "2 $zz"
+        assert text.format(("no", "zz"), ("3", "x")) == "3 x"
+        # The unknown variable is reported once, not per ticket
+        assert capsys.readouterr().out.count("[warn]") == 1
+
+    def test_template_image(self, tmp_path):
+        """Test that engines still accept the template image instead of a plan."""
+        engine = make_engine(tmp_path / "out.pdf", tickets=4)
+        plan, template = engine.compile_plan(), engine._create_template()
+
+        ticket = engine.generate_ticket(template, ("3",))
+        assert ticket.tobytes() == engine.generate_ticket(plan, ("3",)).tobytes()
+        items: list[tuple[str, ...]] = [("1",), ("2",), ("3",)]
+        page = engine.print_page(template, 0, items)
+        assert page.tobytes() == engine.print_page(plan, 0, items).tobytes()
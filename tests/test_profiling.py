@@ -0,0 +1,70 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from serial_stamp.profiling import SamplingProfiler
+
+
+def busy_loop(seconds: float):
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        pass
+
+
+class TestSamplingProfiler:
+    """Test suite for the sampling profiler."""
+
+    def test_samples_all_threads(self):
+        """Test that stacks of worker threads are sampled too."""
+        worker = threading.Thread(target=busy_loop, args=(0.1,), name="worker")
+
+        with SamplingProfiler(interval=0.001) as profiler:
+            worker.start()
+            busy_loop(0.1)
+            worker.join()
+
+        assert profiler.samples > 0
+        threads = {stack.split(";")[0] for stack in profiler.stacks}
+        assert {"MainThread", "worker"} <= threads
+        assert any(
+            stack.startswith("worker;") and stack.endswith(f"{__name__}:busy_loop")
+            for stack in profiler.stacks
+        )
+        assert not any("serial-stamp-profiler" in stack for stack in profiler.stacks)
+
+    def test_skips_waiting_threads(self):
+        """Test that idle pool threads and waits are not sampled."""
+        released = threading.Event()
+        waiter = threading.Thread(target=released.wait, name="waiter")
+
+        with ThreadPoolExecutor(2, thread_name_prefix="pool") as pool:
+            # Start the pool's threads, which then wait for more work
+            list(pool.map(abs, range(4)))
+            waiter.start()
+            with SamplingProfiler(interval=0.001) as profiler:
+                busy_loop(0.1)
+            released.set()
+            waiter.join()
+
+        threads = {stack.split(";")[0] for stack in profiler.stacks}
+        assert threads == {"MainThread"}
+        assert profiler.idle > 0
+        assert "100.0%" in profiler.summary(1)
+
+    def test_top_functions(self):
+        """Test self and total sample counts."""
+        profiler = SamplingProfiler()
+        profiler.stacks.update({"MainThread;a;b;c": 3, "MainThread;a;b": 1})
+        profiler.stacks.update({"Worker;a;d": 2})
+
+        assert profiler.top_functions(3) == [("c", 3, 3), ("d", 2, 2), ("b", 1, 4)]
+        assert "50.0%" in profiler.summary(1)
+
+    def test_write_folded(self, tmp_path):
+        """Test the collapsed stack output read by flamegraph tools."""
+        profiler = SamplingProfiler()
+        profiler.stacks.update({"MainThread;a;b": 2, "MainThread;a": 5})
+        profiler.write_folded(tmp_path / "out.folded")
+
+        lines = (tmp_path / "out.folded").read_text().splitlines()
+        assert lines == ["MainThread;a 5", "MainThread;a;b 2"]
@@ -0,0 +1,90 @@
+import io
+import json
+
+from serial_stamp.progress import (
+    ProgressEvent,
+    ProgressReporter,
+    format_progress,
+    jsonl_progress,
+)
+from tests.conftest import make_engine
+
+
+class TestProgressReporter:
+    """Test suite for rate-limited progress events."""
+
+    def test_rate_limit(self):
+        """Test that page updates within the interval are coalesced."""
+        events: list[ProgressEvent] = []
+        reporter = ProgressReporter(events.append, 100, 10, min_interval=60)
+        for _ in range(10):
+            reporter.page_rendered(10)
+        reporter.finish()
+
+        # The first update, then the final event
+        assert [event.phase for event in events] == ["render", "done"]
+        assert events[0].pages_done == 1
+        assert events[-1].tickets_done == 100
+        assert events[-1].eta_seconds == 0.0
+        assert events[-1].fraction == 1.0
+
+    def test_every_update(self):
+        """Test throughput and ETA when every update is reported."""
+        events: list[ProgressEvent] = []
+        reporter = ProgressReporter(events.append, 40, 4, min_interval=0)
+        for pages in range(4):
+            reporter.page_rendered(10)
+            # Writes while pages are being rendered come with render events
+            reporter.update_bytes(100 * pages)
+        reporter.update_bytes(1234)
+
+        assert [event.pages_done for event in events] == [1, 2, 3, 4, 4, 4]
+        rate = events[1].tickets_per_second
+        assert rate is not None and rate > 0
+        assert events[1].eta_seconds is not None
+        assert events[1].fraction == 0.5
+        assert events[-1].phase == "write"
+        assert events[-1].bytes_written == 1234
+
+    def test_jsonl(self):
+        """Test that events are written as one JSON object per line."""
+        stream = io.StringIO()
+        reporter = ProgressReporter(jsonl_progress(stream), 4, 1, min_interval=0)
+        reporter.page_rendered(4)
+        reporter.finish()
+
+        lines = [json.loads(line) for line in stream.getvalue().splitlines()]
+        assert [line["phase"] for line in lines] == ["render", "done"]
+        assert lines[-1]["tickets_done"] == 4
+        assert "rss_bytes" in lines[-1]
+
+    def test_format(self):
+        """Test the human-readable description."""
+        event = ProgressEvent("render", 20, 40, 2, 4, 0, 1.0, 20.0, 2.0, 1.0, None)
+        assert format_progress(event) == "page 2/4, 20 tickets/s, ETA 1s"
+
+
+class TestEngineProgress:
+    """Test suite for progress events during generation."""
+
+    def test_events(self, tmp_path, capsys):
+        """Test that generation reports tickets, pages and bytes written."""
+        events: list[ProgressEvent] = []
+        make_engine(tmp_path / "out.pdf").generate(on_progress=events.append)
+
+        done = events[-1]
+        assert done.phase == "done"
+        assert (done.tickets_done, done.ticket_count) == (10, 10)
+        assert (done.pages_done, done.page_count) == (3, 3)
+        assert done.bytes_written == (tmp_path / "out.pdf").stat().st_size
+        # Nothing is printed by the engine itself
+        assert capsys.readouterr().out == ""
+
+    def test_stacked_tickets(self, tmp_path):
+        """Test that tickets are counted per page with stacking."""
+        events: list[ProgressEvent] = []
+        engine = make_engine(tmp_path / "out.pdf", stack_size=2)
+        engine.generate(on_progress=events.append)
+
+        assert events[-1].tickets_done == 10
+        assert events[-1].page_count == 4
@@ -0,0 +1,95 @@
+import io
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import pytest
+from PIL import Image
+
+from serial_stamp.bench import write_synthetic_project
+from serial_stamp.engine import Engine
+from serial_stamp.project import pack_project
+from serial_stamp.renderer import TicketRenderer
+from tests.conftest import make_spec, ticket_image
+
+
+def pixels(data: bytes) -> bytes:
+    with Image.open(io.BytesIO(data)) as image:
+        return image.tobytes()
+
+
+class TestTicketRenderer:
+    """Test suite for on-demand single-ticket rendering."""
+
+    def test_same_as_engine(self):
+        """Test that tickets match the engine's, by values and by index."""
+        spec = make_spec(40)
+        renderer = TicketRenderer(spec, ticket_image())
+        engine = Engine(spec, Path("out.pdf"), ticket_image())
+        expected = engine.generate_ticket(engine.compile_plan(), ("7",)).tobytes()
+
+        assert pixels(renderer.render(["7"])) == expected
+        assert pixels(renderer.render({"no": "7"})) == expected
+        assert pixels(renderer.render_index(6)) == expected
+        assert renderer.media_type == "image/png"
+
+    def test_invalid(self):
+        """Test out-of-range indices and missing values."""
+        renderer = TicketRenderer(make_spec(40), ticket_image())
+        with pytest.raises(IndexError):
+            renderer.render_index(40)
+        with pytest.raises(ValueError, match="Expected 1 values"):
+            renderer.render(["1", "2"])
+
+    def test_threads(self):
+        """Test that concurrent renders give the same tickets as serial ones."""
+        renderer = TicketRenderer(make_spec(40), ticket_image())
+        serial = [renderer.render_index(n) for n in range(40)]
+        with ThreadPoolExecutor(4) as pool:
+            assert list(pool.map(renderer.render_index, range(40))) == serial
+
+    def test_format_and_color(self):
+        """Test the image format and [output] color and quality."""
+        spec = make_spec(40, output={"color": "gray", "quality": 50})
+        renderer = TicketRenderer(spec, ticket_image(), format="jpg")
+        with Image.open(io.BytesIO(renderer.render_index(0))) as image:
+            assert (image.format, image.mode) == ("JPEG", "L")
+        assert renderer.media_type == "image/jpeg"
+
+    def test_table(self, tmp_path):
+        """Test that table files are indexed for lookups by position."""
+        (tmp_path / "t.csv").write_text("no\nA\nB\nC\n")
+        spec = make_spec(params=None, table={"source": "t.csv"})
+        with TicketRenderer(spec, ticket_image(), tmp_path) as renderer:
+            assert renderer.ticket_count == 3
+            assert renderer.render_index(2) == renderer.render({"no": "C"})
+
+    def test_sqlite_table_threads(self, tmp_path):
+        """Test SQLite lookups from threads other than the one that indexed."""
+        with sqlite3.connect(tmp_path / "orders.db") as connection:
+            connection.execute("CREATE TABLE orders (no TEXT)")
+            connection.executemany(
+                "INSERT INTO orders VALUES (?)", [(str(n),) for n in range(10)]
+            )
+        connection.close()
+        table = {"source": "orders.db", "query": "SELECT no FROM orders"}
+        spec = make_spec(params=None, table=table)
+
+        with TicketRenderer(spec, ticket_image(), tmp_path) as renderer:
+            first = renderer.render_index(3)
+            with ThreadPoolExecutor(1) as pool:
+                assert pool.submit(renderer.render_index, 3).result() == first
+                assert pool.submit(renderer.render, {"no": "3"}).result() == first
+
+    def test_packed_project(self, tmp_path, monkeypatch):
+        """Test opening a packed project, which stays extracted until closed."""
+        monkeypatch.setenv("SERIAL_STAMP_CACHE_DIR", str(tmp_path / "cache"))
+        write_synthetic_project(tmp_path / "proj", tickets=12, texts=1)
+        pack_project(tmp_path / "proj", tmp_path / "proj.stamp")
+
+        with TicketRenderer.open(tmp_path / "proj.stamp") as renderer:
+            work_dir = renderer._engine.work_dir
+            assert work_dir.is_dir()
+            with Image.open(io.BytesIO(renderer.render_index(11))) as image:
+                assert image.size == (600, 250)
+        assert not work_dir.exists()
@@ -0,0 +1,209 @@
+import re
+import sqlite3
+import subprocess
+import sys
+from pathlib import Path
+from typing import Any
+
+import pytest
+
+from serial_stamp.bench import write_synthetic_project
+from serial_stamp.engine import Engine
+from serial_stamp.models import TableSource
+from serial_stamp.reprint import (
+    find_tickets,
+    parse_tickets,
+    reprint_pages,
+    reprint_tickets,
+)
+from serial_stamp.sinks import ManifestSink
+from tests.conftest import make_engine
+
+
+def reprint_engine(output: Path, stack_size: int = 3, **values: Any) -> Engine:
+    """An engine numbering 30 tickets from 001, or with the given `values`."""
+    if not values:
+        values = {
+            "params": [
+                {"name": "no", "type": "int", "min": 1, "max": 30, "leading-zeros": 3}
+            ]
+        }
+    return make_engine(
+        output,
+        work_dir=output.parent,
+        encoder_threads=0,
+        stack_size=stack_size,
+        **({"params": None} | values),
+    )
+
+
+def page_streams(path: Path) -> list[bytes]:
+    """The image stream of every page of a PDF, in page order."""
+    return re.findall(
+        rb"/Subtype /Image.*?stream\n(.*?)\nendstream", path.read_bytes(), re.S
+    )
+
+
+class TestImposition:
+    """Test suite for mapping tickets to pages and slots."""
+
+    @pytest.mark.parametrize("stack_size", [1, 3, 7])
+    def test_inverse(self, tmp_path, stack_size):
+        """Test that page and slot map back to the ticket placed there."""
+        layout = reprint_engine(tmp_path / "out.pdf", stack_size).page_layout()
+        for index in range(layout.tickets):
+            assert layout.ticket_at(*layout.position(index)) == index
+
+        placed = [i for page in range(layout.pages) for i in layout.page_tickets(page)]
+        assert sorted(placed) == list(range(30))
+        assert layout.ticket_at(layout.pages - 1, 3) is None
+
+    @pytest.mark.parametrize("name", ["t.csv", "t.jsonl", "t.sqlite"])
+    def test_table_files(self, tmp_path, monkeypatch, name):
+        """Test that table files render the same pages as parameters."""
+        full = tmp_path / "full.pdf"
+        reprint_engine(full).generate()
+
+        path = tmp_path / name
+        values = [f"{n:03d}" for n in range(1, 31)]
+        if name.endswith(".csv"):
+            path.write_text("no\n" + "".join(f"{v}\n" for v in values))
+        elif name.endswith(".jsonl"):
+            path.write_text("".join(f'{{"no": "{v}"}}\n' for v in values))
+        else:
+            with sqlite3.connect(path) as db:
+                db.execute("CREATE TABLE t (no TEXT)")
+                db.executemany("INSERT INTO t VALUES (?)", [(v,) for v in values])
+            db.close()
+        table = {"source": name, "query": "SELECT no FROM t", "key": "no"}
+        engine = reprint_engine(tmp_path / "table.pdf", table=table)
+        with monkeypatch.context() as patch:
+            # Whole runs stream the table instead of indexing it
+            patch.setattr(TableSource, "index_rows", None)
+            engine.generate()
+        assert page_streams(tmp_path / "table.pdf") == page_streams(full)
+
+        reprint_pages(engine, [13, 26])
+        pages = page_streams(full)
+        assert page_streams(tmp_path / "table.pdf") == [pages[4], pages[8]]
+
+    def test_preview(self, tmp_path):
+        """Test that the preview is the first page of the run."""
+        engine = reprint_engine(tmp_path / "out.pdf")
+        plan = engine.compile_plan()
+        first_stack = list(engine._get_items_iterator())[:12]
+        preview = engine.generate_preview()
+        assert preview.tobytes() == engine.print_page(plan, 0, first_stack).tobytes()
+
+
+class TestTicketSelection:
+    """Test suite for selecting tickets to reprint."""
+
+    def test_parse(self):
+        """Test numbers, ranges and literal values."""
+        selectors = parse_tickets("7, 10-12,A-1")
+        assert [(s.low, s.high, s.value) for s in selectors] == [
+            (7, 7, None),
+            (10, 12, None),
+            (None, None, "A-1"),
+        ]
+        assert selectors[1].matches("011")
+        assert not selectors[1].matches("abc")
+
+    def test_by_number(self, tmp_path):
+        """Test that numbers select positions in the run."""
+        engine = reprint_engine(tmp_path / "out.pdf")
+        assert find_tickets(engine, parse_tickets("3,1-2,2")) == [0, 1, 2]
+        with pytest.raises(ValueError, match="within the 30 tickets"):
+            find_tickets(engine, parse_tickets("31"))
+
+    def test_by_variable(self, tmp_path):
+        """Test lookups by variable, with and without a SQLite manifest."""
+        engine = reprint_engine(tmp_path / "out.pdf")
+        manifest = tmp_path / "manifest.sqlite"
+        engine.generate_sinks([ManifestSink(manifest)])
+
+        selectors = parse_tickets("5,20-21,007")
+        scanned = find_tickets(engine, selectors, by="no")
+        indexed = find_tickets(engine, selectors, by="no", manifest=manifest)
+        assert scanned == indexed == [4, 6, 19, 20]
+
+        with pytest.raises(ValueError, match="Unknown variable"):
+            find_tickets(engine, selectors, by="missing")
+
+    @pytest.mark.parametrize(
+        "param",
+        [
+            {"name": "ticket", "type": "string", "values": ["A", "B"]},
+            {"name": "stack", "type": "int", "min": 1, "max": 8},
+        ],
+    )
+    def test_reserved_manifest_names(self, tmp_path, param):
+        """Test that variables cannot take over the manifest's columns."""
+        manifest = tmp_path / "manifest.sqlite"
+        engine = reprint_engine(tmp_path / "out.pdf", params=[param])
+        with pytest.raises(ValueError, match=f"Variables named {param['name']}"):
+            engine.generate_sinks([ManifestSink(manifest)])
+        assert not manifest.exists()
+
+    def test_stale_manifest(self, tmp_path):
+        """Test that a manifest of another layout is refused."""
+        manifest = tmp_path / "manifest.sqlite"
+        reprint_engine(tmp_path / "out.pdf", stack_size=1).generate_sinks(
+            [ManifestSink(manifest)]
+        )
+        engine = reprint_engine(tmp_path / "out.pdf")
+        with pytest.raises(ValueError, match="different run"):
+            find_tickets(engine, parse_tickets("5"), by="no", manifest=manifest)
+
+
+class TestReprint:
+    """Test suite for rendering only some pages or tickets."""
+
+    def test_pages_match(self, tmp_path):
+        """Test that reprinted pages are the pages of the full run."""
+        full = tmp_path / "full.pdf"
+        reprint_engine(full).generate()
+
+        engine = reprint_engine(tmp_path / "reprint.pdf")
+        # Ticket 14 is on page 5 (stacks of 3 pages, 4 slots)
+        summary = reprint_pages(engine, [13, 26])
+        assert summary is not None
+        assert summary.pages == 2
+
+        pages = page_streams(full)
+        assert page_streams(tmp_path / "reprint.pdf") == [pages[4], pages[8]]
+
+    def test_singles(self, tmp_path):
+        """Test that single tickets are packed onto fresh pages."""
+        engine = reprint_engine(tmp_path / "reprint.pdf")
+        summary = reprint_tickets(engine, [0, 13, 26])
+        assert summary is not None
+        assert (summary.tickets, summary.pages) == (3, 1)
+
+    def test_manifest_positions(self, tmp_path):
+        """Test that the SQLite manifest records page, slot and stack."""
+        manifest = tmp_path / "manifest.sqlite"
+        reprint_engine(tmp_path / "out.pdf").generate_sinks([ManifestSink(manifest)])
+
+        with sqlite3.connect(manifest) as db:
+            row = db.execute(
+                "SELECT page, slot, stack FROM tickets WHERE no = '014'"
+            ).fetchone()
+        assert row == (5, 1, 2)
+
+    def test_cli(self, tmp_path, monkeypatch):
+        """Test the reprint command."""
+        monkeypatch.setenv("SERIAL_STAMP_CACHE_DIR", str(tmp_path / "cache"))
+        spec_path = write_synthetic_project(tmp_path / "proj", tickets=30, texts=1)
+        output = tmp_path / "reprint.pdf"
+
+        result = subprocess.run(
+            [sys.executable, "-m", "serial_stamp.cli", "reprint", str(spec_path)]
+            + ["--tickets", "14-15", "-o", str(output)],
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+        assert "ticket 14: page 2, slot 2, stack 2" in result.stdout
+        assert len(page_streams(output)) == 1
@@ -0,0 +1,142 @@
+import io
+import json
+import threading
+import urllib.error
+import urllib.request
+from pathlib import Path
+
+import pytest
+
+from serial_stamp.bench import write_synthetic_project
+from serial_stamp.project import pack_project
+from serial_stamp.serve import RenderServer, RenderService, output_settings
+
+
+@pytest.fixture
+def server(tmp_path, monkeypatch):
+    monkeypatch.setenv("SERIAL_STAMP_CACHE_DIR", str(tmp_path / "cache"))
+    service = RenderService(tmp_path / "data", workers=1)
+    server = RenderServer(("127.0.0.1", 0), service)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+    service.close()
+
+
+def request(server, method, path, body=None, content_type="application/json"):
+    url = f"http://127.0.0.1:{server.server_port}{path}"
+    if isinstance(body, dict):
+        body = json.dumps(body).encode()
+    req = urllib.request.Request(url, body, {"Content-Type": content_type}, None)
+    req.method = method
+    try:
+        with urllib.request.urlopen(req, timeout=30) as response:
+            return response.status, response.headers, response.read()
+    except urllib.error.HTTPError as e:
+        return e.code, e.headers, e.read()
+
+
+def events(server, job_id):
+    """The (name, data) of every server-sent event of a job, until it ends."""
+    status, _, body = request(server, "GET", f"/jobs/{job_id}/events")
+    assert status == 200
+    found = []
+    for message in body.decode().split("\n\n"):
+        fields = dict(
+            line.split(": ", 1) for line in message.splitlines() if ": " in line
+        )
+        if "event" in fields:
+            found.append((fields["event"], json.loads(fields["data"])))
+    return found
+
+
+class TestRenderService:
+    """Test suite for the local HTTP render service."""
+
+    def test_job(self, server, tmp_path):
+        """Test queueing a job by path, following it and downloading the PDF."""
+        spec_path = write_synthetic_project(tmp_path / "proj", tickets=30, texts=1)
+        status, _, body = request(
+            server, "POST", "/jobs", {"project": str(spec_path.parent)}
+        )
+        assert status == 202
+        job = json.loads(body)
+
+        streamed = events(server, job["id"])
+        assert streamed[-1][0] == "done"
+        assert streamed[-1][1]["summary"]["tickets"] == 30
+        assert streamed[-1][1]["progress"]["phase"] == "done"
+
+        status, headers, body = request(server, "GET", f"/jobs/{job['id']}/output")
+        assert (status, headers["Content-Type"]) == (200, "application/pdf")
+        assert body.startswith(b"%PDF")
+
+        status, _, _ = request(server, "DELETE", f"/jobs/{job['id']}")
+        assert status == 204
+        assert request(server, "GET", f"/jobs/{job['id']}")[0] == 404
+
+    def test_upload(self, server, tmp_path):
+        """Test that uploads of the same project share a warm cache entry."""
+        write_synthetic_project(tmp_path / "proj", tickets=8, texts=1)
+        pack_project(tmp_path / "proj", tmp_path / "proj.stamp")
+        data = (tmp_path / "proj.stamp").read_bytes()
+
+        for _ in range(2):
+            status, _, body = request(
+                server, "POST", "/jobs?format=tiff&dpi=150", data, "application/zip"
+            )
+            assert status == 202
+            job = json.loads(body)
+            assert events(server, job["id"])[-1][0] == "done"
+
+        projects = server.service.projects
+        assert (projects.misses, projects.hits) == (1, 1)
+        status, headers, _ = request(server, "GET", f"/jobs/{job['id']}/output")
+        assert headers["Content-Type"] == "image/tiff"
+
+    def test_failed_job(self, server, tmp_path):
+        """Test that errors while generating are reported on the job."""
+        project = tmp_path / "broken"
+        project.mkdir()
+        (project / "spec.toml").write_text("stack-size = 'many'\n")
+        _, _, body = request(server, "POST", "/jobs", {"project": str(project)})
+
+        name, job = events(server, json.loads(body)["id"])[-1]
+        assert name == "failed"
+        assert "stack" in job["error"]
+        assert request(server, "GET", f"/jobs/{job['id']}/output")[0] == 409
+
+    @pytest.mark.parametrize(
+        "body,content_type",
+        [
+            ({"project": "/no/such/project"}, "application/json"),
+            ({"project": ".", "format": "gif"}, "application/json"),
+            ({"project": ".", "output": {"bogus": 1}}, "application/json"),
+            (b"not a zip", "application/zip"),
+        ],
+    )
+    def test_bad_requests(self, server, body, content_type):
+        """Test that invalid jobs are refused before they are queued."""
+        status, _, body = request(server, "POST", "/jobs", body, content_type)
+        assert status == 400
+        assert json.loads(body)["error"]
+        assert server.service.jobs() == []
+
+    def test_output_settings(self):
+        """Test that settings are accepted by spec or field name."""
+        assert output_settings({"compress_level": 1, "dpi": "150"}) == {
+            "compress-level": 1,
+            "dpi": "150",
+        }
+        with pytest.raises(ValueError, match="Invalid output settings"):
+            output_settings({"codec": "gif"})
+
+    def test_store_upload(self, tmp_path):
+        """Test that truncated uploads are discarded."""
+        service = RenderService(tmp_path)
+        with pytest.raises(ValueError, match="ended early"):
+            service.projects.store_upload(io.BytesIO(b"PK"), 10)
+        assert list(Path(tmp_path / "uploads").iterdir()) == []
+        service.close()
@@ -0,0 +1,225 @@
+import csv
+import json
+import re
+import subprocess
+import sys
+import zipfile
+
+import pytest
+
+from serial_stamp.bench import write_synthetic_project
+from serial_stamp.export import TicketArchiveSink
+from serial_stamp.metrics import Metrics
+from serial_stamp.sinks import ManifestSink, RasterSink, Sink
+from tests.conftest import make_engine
+
+
+def without_dates(data: bytes) -> bytes:
+    return re.sub(rb"\(D:\d+Z\)", b"", data)
+
+
+class Recorder(Sink):
+    """Collects what a run hands to its sinks."""
+
+    def __init__(self, wants_pages=False, wants_ticket_images=False):
+        self.wants_pages = wants_pages
+        self.wants_ticket_images = wants_ticket_images
+        self.tickets = []
+        self.pages = []
+        self.closed = False
+
+    def ticket(self, ticket):
+        self.tickets.append(ticket)
+
+    def page(self, index, page):
+        self.pages.append(index)
+
+    def close(self):
+        self.closed = True
+
+
+class TestFanOut:
+    """Test suite for feeding several outputs from one rendering pass."""
+
+    def test_single_pass(self, tmp_path):
+        """Test that each ticket is rendered once for all outputs."""
+        engine = make_engine(tmp_path / "out.pdf", encoder_threads=0)
+        engine.metrics = Metrics()
+        sinks = [
+            TicketArchiveSink(tmp_path / "tickets.zip"),
+            ManifestSink(tmp_path / "manifest.csv"),
+            RasterSink(tmp_path / "rasters"),
+        ]
+        summary = engine.generate(sinks=sinks)
+        assert summary is not None
+
+        assert engine.metrics.as_dict()["counters"]["tickets_rendered"] == 10
+        assert summary.bytes_written == sum(
+            path.stat().st_size for path in tmp_path.rglob("*") if path.is_file()
+        )
+        with zipfile.ZipFile(tmp_path / "tickets.zip") as zf:
+            assert len(zf.namelist()) == 10
+        assert len(list((tmp_path / "rasters").iterdir())) == 3
+
+    def test_same_pdf(self, tmp_path):
+        """Test that extra outputs leave the PDF unchanged."""
+        (tmp_path / "a").mkdir()
+        (tmp_path / "b").mkdir()
+        make_engine(tmp_path / "a" / "out.pdf", encoder_threads=0).generate()
+        make_engine(tmp_path / "b" / "out.pdf", encoder_threads=0).generate(
+            sinks=[TicketArchiveSink(tmp_path / "tickets")]
+        )
+        assert without_dates((tmp_path / "a" / "out.pdf").read_bytes()) == (
+            without_dates((tmp_path / "b" / "out.pdf").read_bytes())
+        )
+
+    @pytest.mark.parametrize("stack_size", [1, 3])
+    def test_positions(self, tmp_path, stack_size):
+        """Test that tickets carry the page and slot they were printed at."""
+        engine = make_engine(
+            tmp_path / "out.pdf", encoder_threads=0, stack_size=stack_size
+        )
+        with_pages, without_pages = Recorder(), Recorder()
+        engine.generate(sinks=[with_pages])
+        engine.generate_sinks([without_pages])
+
+        positions = sorted((t.index, t.page, t.slot) for t in with_pages.tickets)
+        assert positions == [(t.index, t.page, t.slot) for t in without_pages.tickets]
+        assert [t.index for t in without_pages.tickets] == list(range(10))
+        assert with_pages.closed and without_pages.closed
+
+    def test_without_pages(self, tmp_path):
+        """Test that sink-only runs compose pages only when a sink wants them."""
+        engine = make_engine(tmp_path / "out.pdf", encoder_threads=0)
+        engine.metrics = Metrics()
+        tickets = Recorder(wants_ticket_images=True)
+        summary = engine.generate_sinks([tickets])
+        assert summary is not None
+
+        assert summary.pages == 0
+        assert "pages_rendered" not in engine.metrics.as_dict()["counters"]
+        assert tickets.tickets[0].image.size == (120, 60)
+        assert not (tmp_path / "out.pdf").exists()
+
+        pages = Recorder(wants_pages=True)
+        summary = engine.generate_sinks([pages])
+        assert summary is not None and summary.pages == 3
+        assert pages.pages == [0, 1, 2]
+        assert pages.tickets[0].image is None
+
+    def test_overlay_ticket_images(self, tmp_path):
+        """Test that overlay runs still hand full ticket images to sinks."""
+        engine = make_engine(
+            tmp_path / "out.pdf", encoder_threads=0, output={"overlay-only": True}
+        )
+        tickets = Recorder(wants_ticket_images=True)
+        engine.generate(sinks=[tickets])
+        assert len(tickets.tickets) == 10
+        assert tickets.tickets[0].image.getpixel((100, 55)) != (255, 255, 255)
+
+    def test_closed_on_error(self, tmp_path):
+        """Test that sinks are closed when rendering fails."""
+
+        class Failing(Recorder):
+            def ticket(self, ticket):
+                raise RuntimeError("disk full")
+
+        recorder = Recorder()
+        with pytest.raises(RuntimeError, match="disk full"):
+            make_engine(tmp_path / "out.pdf", encoder_threads=0).generate(
+                sinks=[recorder, Failing()]
+            )
+        assert recorder.closed
+
+
+class TestManifestSink:
+    """Test suite for ticket manifests."""
+
+    def test_csv(self, tmp_path):
+        """Test CSV rows with 1-based positions and image names."""
+        path = tmp_path / "manifest.csv"
+        engine = make_engine(tmp_path / "out.pdf", encoder_threads=0, stack_size=3)
+        engine.generate_sinks([ManifestSink(path, "ticket-$no.png")])
+
+        with open(path, newline="") as f:
+            rows = list(csv.DictReader(f))
+        assert len(rows) == 10
+        assert rows[1] == {
+            "ticket": "2",
+            "page": "2",
+            "slot": "1",
+            "stack": "1",
+            "file": "ticket-2.png",
+            "no": "2",
+        }
+
+    @pytest.mark.parametrize("suffix", ["json", "jsonl"])
+    def test_json(self, tmp_path, suffix):
+        """Test that JSON manifests parse to one object per ticket."""
+        path = tmp_path / f"manifest.{suffix}"
+        make_engine(tmp_path / "out.pdf", encoder_threads=0).generate_sinks(
+            [ManifestSink(path)]
+        )
+
+        text = path.read_text()
+        if suffix == "json":
+            rows = json.loads(text)
+        else:
+            rows = [json.loads(line) for line in text.splitlines()]
+        assert rows[9] == {
+            "ticket": 10,
+            "page": 3,
+            "slot": 2,
+            "stack": 3,
+            "no": "10",
+        }
+
+    def test_reserved_names(self, tmp_path):
+        """Test that variables may not overwrite the position columns."""
+        path = tmp_path / "manifest.csv"
+        params = [{"name": "page", "type": "int", "min": 1, "max": 6}]
+        texts = [{"template": "$page", "position": [5, 5]}]
+        engine = make_engine(tmp_path / "out.pdf", params=params, texts=texts)
+        with pytest.raises(ValueError, match="Variables named page clash"):
+            engine.generate_sinks([ManifestSink(path)])
+        assert not path.exists()
+
+        # Table columns, only known from the rows
+        table = [{"slot": "A", "file": "x"}, {"slot": "B", "file": "y"}]
+        texts = [{"template": "$slot", "position": [5, 5]}]
+        engine = make_engine(
+            tmp_path / "out.pdf", params=None, table=table, texts=texts
+        )
+        with pytest.raises(ValueError, match="Variables named file, slot clash"):
+            engine.generate_sinks([ManifestSink(path, "$slot.png")])
+        # Without image names, "file" is free to use
+        with pytest.raises(ValueError, match="Variables named slot clash"):
+            engine.generate_sinks([ManifestSink(path)])
+
+    def test_unknown_format(self, tmp_path):
+        """Test that unsupported manifest suffixes are rejected."""
+        with pytest.raises(ValueError, match="Unsupported manifest format"):
+            ManifestSink(tmp_path / "manifest.xml")
+
+
+class TestCli:
+    """Test suite for extra outputs on the command line."""
+
+    def test_all_outputs(self, tmp_path, monkeypatch):
+        """Test that -o, --per-ticket, --rasters and --manifest run together."""
+        monkeypatch.setenv("SERIAL_STAMP_CACHE_DIR", str(tmp_path / "cache"))
+        spec_path = write_synthetic_project(tmp_path / "proj", tickets=8, texts=1)
+
+        subprocess.run(
+            [sys.executable, "-m", "serial_stamp.cli", "generate", str(spec_path)]
+            + ["-o", str(tmp_path / "out.pdf")]
+            + ["--per-ticket", str(tmp_path / "tickets.zip")]
+            + ["--rasters", str(tmp_path / "rasters")]
+            + ["--manifest", str(tmp_path / "manifest.jsonl")],
+            capture_output=True,
+            check=True,
+        )
+        assert (tmp_path / "out.pdf").exists()
+        assert (tmp_path / "rasters").is_dir()
+        rows = (tmp_path / "manifest.jsonl").read_text().splitlines()
+        assert json.loads(rows[0])["file"] == "ticket-1.png"
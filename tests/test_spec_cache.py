@@ -0,0 +1,101 @@
+import pytest
+
+from serial_stamp import spec_cache
+from serial_stamp.spec_cache import cache_key, load_spec
+
+SPEC = """stack-size = 1
+source-image = "assets/ticket.png"
+
+[layout]
+grid-size = [2, 2]
+gap = 0
+margin = 0
+
+[[texts]]
+template = "N° $no"
+position = [10, 10]
+
+[[params]]
+name = "no"
+type = "int"
+values = [1, 2, 3]
+"""
+
+
+@pytest.fixture
+def cache(tmp_path, monkeypatch):
+    path = tmp_path / "cache"
+    monkeypatch.setenv("SERIAL_STAMP_CACHE_DIR", str(path))
+    return path
+
+
+@pytest.fixture
+def spec_path(tmp_path):
+    path = tmp_path / "spec.toml"
+    path.write_text(SPEC)
+    return path
+
+
+def fail_parse(*args, **kwargs):
+    raise AssertionError("spec was parsed")
+
+
+class TestSpecCache:
+    """Test suite for the validated spec cache."""
+
+    def test_reuses_validated_spec(self, cache, spec_path, monkeypatch):
+        """Test that an unchanged spec skips parsing and validation."""
+        first = load_spec(spec_path)
+        assert len(list(cache.glob("*.pickle"))) == 1
+
+        monkeypatch.setattr(spec_cache.tomllib, "loads", fail_parse)
+        second = load_spec(spec_path)
+
+        assert second == first
+        assert second is not first
+        assert second.params is not None
+        assert list(second.params[0].get_values()) == ["1", "2", "3"]
+
+    def test_changed_spec(self, cache, spec_path):
+        """Test that editing the spec produces a new entry."""
+        load_spec(spec_path)
+        spec_path.write_text(SPEC.replace("stack-size = 1", "stack-size = 4"))
+
+        assert load_spec(spec_path).stack_size == 4
+        assert len(list(cache.glob("*.pickle"))) == 2
+
+    def test_key_includes_version(self, monkeypatch):
+        """Test that upgrading serial-stamp invalidates the cache."""
+        key = cache_key(b"data")
+        monkeypatch.setattr(spec_cache, "_package_version", lambda: "99.0")
+        assert cache_key(b"data") != key
+
+    def test_key_includes_models(self, tmp_path, monkeypatch):
+        """Test that changing the spec models invalidates the cache."""
+        key = cache_key(b"data")
+        models = tmp_path / "models.py"
+        models.write_text("class Spec: ...\n")
+        monkeypatch.setattr(spec_cache.models, "__file__", str(models))
+        assert cache_key(b"data") != key
+
+    def test_corrupted_entry(self, cache, spec_path):
+        """Test that an unreadable entry falls back to parsing."""
+        load_spec(spec_path)
+        (entry,) = cache.glob("*.pickle")
+        entry.write_bytes(b"not a pickle")
+
+        assert load_spec(spec_path).stack_size == 1
+        assert load_spec(spec_path).stack_size == 1
+
+    def test_no_cache(self, cache, spec_path):
+        """Test that the cache can be bypassed."""
+        assert load_spec(spec_path, use_cache=False).stack_size == 1
+        assert not cache.exists()
+
+    def test_prunes_old_entries(self, cache, spec_path, monkeypatch):
+        """Test that the cache keeps a bounded number of entries."""
+        monkeypatch.setattr(spec_cache, "MAX_ENTRIES", 2)
+        for stack_size in range(1, 5):
+            spec_path.write_text(SPEC.replace("= 1\n", f"= {stack_size}\n", 1))
+            load_spec(spec_path)
+        assert len(list(cache.glob("*.pickle"))) == 2
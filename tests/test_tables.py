@@ -0,0 +1,204 @@
+import sqlite3
+from pathlib import Path
+
+import pytest
+
+from serial_stamp.models import TableSource
+from serial_stamp.tables import (
+    RowIndex,
+    SqliteRowIndex,
+    count_csv_rows,
+    count_jsonl_rows,
+    count_sqlite_rows,
+    iter_csv_rows,
+    iter_jsonl_rows,
+    iter_sqlite_rows,
+)
+
+
+def write(path: Path, content: str) -> Path:
+    path.write_bytes(content.encode("utf-8"))
+    return path
+
+
+class TestCsvSource:
+    """Test suite for streamed CSV tables."""
+
+    def test_rows(self, tmp_path):
+        """Test that rows are keyed by the header."""
+        path = write(tmp_path / "t.csv", "name,seat\nAlice,1\nBob,2\n")
+        assert list(iter_csv_rows(path)) == [
+            {"name": "Alice", "seat": "1"},
+            {"name": "Bob", "seat": "2"},
+        ]
+
+    def test_count_fast_path(self, tmp_path):
+        """Test counting with and without a trailing newline."""
+        assert count_csv_rows(write(tmp_path / "a.csv", "n\n1\n2\n3\n")) == 3
+        assert count_csv_rows(write(tmp_path / "b.csv", "n\n1\n2\n3")) == 3
+        assert count_csv_rows(write(tmp_path / "c.csv", "n\r\n1\r\n2\r\n")) == 2
+        assert count_csv_rows(write(tmp_path / "d.csv", "n\n")) == 0
+        assert count_csv_rows(write(tmp_path / "e.csv", "")) == 0
+
+    def test_count_quoted_newlines(self, tmp_path):
+        """Test that quoted fields spanning lines are counted as one row."""
+        path = write(tmp_path / "t.csv", 'name,note\nAlice,"two\nlines"\nBob,x\n')
+        assert count_csv_rows(path) == 2
+        assert count_csv_rows(path) == len(list(iter_csv_rows(path)))
+
+    def test_count_empty_lines(self, tmp_path):
+        """Test that empty lines are not counted as rows."""
+        path = write(tmp_path / "t.csv", "n\n1\n\n2\n\n")
+        assert count_csv_rows(path) == 2
+        assert count_csv_rows(path) == len(list(iter_csv_rows(path)))
+
+    def test_delimiter(self, tmp_path):
+        """Test TSV sources use a tab delimiter by default."""
+        write(tmp_path / "t.tsv", "name\tseat\nAlice\t1\n")
+        source = TableSource(source="t.tsv")
+        assert list(source.iter_rows(tmp_path)) == [{"name": "Alice", "seat": "1"}]
+        assert source.count_rows(tmp_path) == 1
+
+
+class TestJsonlSource:
+    """Test suite for streamed JSON Lines tables."""
+
+    def test_rows(self, tmp_path):
+        """Test that each line is decoded as an object."""
+        path = write(tmp_path / "t.jsonl", '{"name": "Alice", "seat": 1}\n{"n": 2}\n')
+        assert list(iter_jsonl_rows(path)) == [{"name": "Alice", "seat": 1}, {"n": 2}]
+        assert count_jsonl_rows(path) == 2
+
+    def test_empty_lines(self, tmp_path):
+        """Test that empty lines are skipped and not counted."""
+        path = write(tmp_path / "t.jsonl", '\n{"n": 1}\n\n{"n": 2}')
+        assert list(iter_jsonl_rows(path)) == [{"n": 1}, {"n": 2}]
+        assert count_jsonl_rows(path) == 2
+
+    def test_non_object_row(self, tmp_path):
+        """Test that non-object rows are rejected."""
+        path = write(tmp_path / "t.jsonl", "[1, 2]\n")
+        with pytest.raises(ValueError):
+            list(iter_jsonl_rows(path))
+
+
+class TestSqliteSource:
+    """Test suite for SQLite query tables."""
+
+    QUERY = "SELECT id, name FROM orders WHERE paid = 1"
+
+    @pytest.fixture
+    def db_path(self, tmp_path):
+        path = tmp_path / "orders.db"
+        connection = sqlite3.connect(path)
+        connection.execute("CREATE TABLE orders (id INTEGER PRIMARY KEY, name, paid)")
+        connection.executemany(
+            "INSERT INTO orders VALUES (?, ?, ?)",
+            [(i, f"order-{i}", int(i % 3 != 0)) for i in range(1, 31)],
+        )
+        connection.commit()
+        connection.close()
+        return path
+
+    def expected(self, start=0, stop=None):
+        rows = [{"id": i, "name": f"order-{i}"} for i in range(1, 31) if i % 3 != 0]
+        return rows[start:stop]
+
+    def test_count(self, db_path):
+        """Test that rows are counted with the query filter applied."""
+        assert count_sqlite_rows(db_path, self.QUERY) == 20
+        assert count_sqlite_rows(db_path, self.QUERY + ";") == 20
+
+    @pytest.mark.parametrize("key", [None, "id"])
+    def test_batches(self, db_path, key):
+        """Test that batching yields every row once, in order."""
+        rows = list(iter_sqlite_rows(db_path, self.QUERY, key, batch_size=3))
+        assert rows == self.expected()
+
+    @pytest.mark.parametrize("key", [None, "id"])
+    @pytest.mark.parametrize("start,stop", [(0, 5), (7, 13), (18, None), (25, 30)])
+    def test_row_ranges(self, db_path, key, start, stop):
+        """Test random access to row ranges for sharded generation."""
+        rows = iter_sqlite_rows(db_path, self.QUERY, key, 4, start, stop)
+        assert list(rows) == self.expected(start, stop)
+
+    def test_read_only(self, db_path):
+        """Test that the source cannot modify the database."""
+        with pytest.raises(sqlite3.OperationalError):
+            list(iter_sqlite_rows(db_path, "DELETE FROM orders RETURNING id"))
+        assert count_sqlite_rows(db_path, "SELECT * FROM orders") == 30
+
+    @pytest.mark.parametrize("key", [None, "id"])
+    def test_row_index(self, db_path, key):
+        """Test random access to rows by position, in key order."""
+        with SqliteRowIndex(db_path, self.QUERY, key) as rows:
+            assert len(rows) == 20
+            assert [rows[i] for i in (13, 0, 19)] == [
+                self.expected()[i] for i in (13, 0, 19)
+            ]
+            with pytest.raises(IndexError):
+                rows[20]
+        assert count_sqlite_rows(db_path, "SELECT * FROM orders") == 30
+
+    def test_table_source(self, db_path):
+        """Test the model dispatches to SQLite and requires a query."""
+        source = TableSource(source="orders.db", query=self.QUERY, key="id")
+        assert source.resolved_format == "sqlite"
+        assert source.count_rows(db_path.parent) == 20
+        assert list(source.iter_rows(db_path.parent, 2, 4)) == self.expected(2, 4)
+
+        with pytest.raises(ValueError):
+            TableSource(source="orders.db").count_rows(db_path.parent)
+
+
+class TestTableSource:
+    """Test suite for the TableSource model."""
+
+    def test_format_inference(self):
+        """Test that the format is inferred from the file suffix."""
+        assert TableSource(source="a/b.CSV").resolved_format == "csv"
+        assert TableSource(source="b.ndjson").resolved_format == "jsonl"
+        assert TableSource(source="b.txt", format="csv").resolved_format == "csv"
+        with pytest.raises(ValueError):
+            TableSource(source="b.txt").resolved_format
+
+    def test_row_ranges(self, tmp_path):
+        """Test that file sources support row ranges too."""
+        write(tmp_path / "t.csv", "n\n" + "".join(f"{i}\n" for i in range(10)))
+        source = TableSource(source="t.csv")
+        assert [row["n"] for row in source.iter_rows(tmp_path, 3, 6)] == ["3", "4", "5"]
+
+
+class TestRowIndex:
+    """Test suite for random access to the rows of table files."""
+
+    def test_csv(self, tmp_path):
+        """Test quoted newlines, empty lines and a byte order mark."""
+        path = write(
+            tmp_path / "t.csv",
+            '\ufeffname,note\r\nA,"two\n\nlines"\r\n\r\nB,"say ""hi"""\nC,x',
+        )
+        with RowIndex.csv(path) as rows:
+            assert [rows[i] for i in (2, 0, 1)] == [
+                {"name": "C", "note": "x"},
+                {"name": "A", "note": "two\n\nlines"},
+                {"name": "B", "note": 'say "hi"'},
+            ]
+            assert len(rows) == len(list(iter_csv_rows(path)))
+
+    def test_jsonl(self, tmp_path):
+        """Test that rows match the streamed reader."""
+        path = write(tmp_path / "t.jsonl", '{"n": 1}\n\n{"n": 2}\n[3]\n')
+        with RowIndex.jsonl(path) as rows:
+            assert (len(rows), rows[1]) == (3, {"n": 2})
+            with pytest.raises(ValueError, match="expected a JSON object"):
+                rows[2]
+            with pytest.raises(IndexError):
+                rows[3]
+
+    def test_empty(self, tmp_path):
+        """Test files without rows."""
+        with RowIndex.csv(write(tmp_path / "t.csv", "")) as rows:
+            assert len(rows) == 0
+        with TableSource(source="t.csv").index_rows(tmp_path) as rows:
+            assert len(rows) == 0
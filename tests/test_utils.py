@@ -1,8 +1,16 @@
+import itertools
 import sys
 from io import StringIO
 from typing import Any, Iterable, List, Tuple
 
-from serial_stamp.utils import cartesian_product, replace_vars
+import pytest
+
+from serial_stamp.utils import (
+    FormattedInts,
+    cartesian_product,
+    compile_template,
+    replace_vars,
+)
 
 
 class TestIterCartesianProduct:
@@ -68,15 +76,67 @@ class TestIterCartesianProduct:
         assert result == expected
 
     def test_generators_without_materialize(self):
-        """Test that generators don't work correctly without materialize=True."""
+        """Test that generators are materialized even without materialize=True."""
         gen1 = (x for x in [1, 2])
         gen2 = (y for y in ["a", "b"])
         result = list(cartesian_product(gen1, gen2))
-        # Without materialize=True, generators get exhausted after first iteration
-        # So we only get combinations for the first element of gen1
-        expected = [(1, "a"), (1, "b")]
+        expected = [(1, "a"), (1, "b"), (2, "a"), (2, "b")]
         assert result == expected
 
+    def test_generators_across_several_params(self):
+        """Test generator and map inputs for three or more params."""
+        gen1 = (x for x in [1, 2, 3])
+        gen2 = map(str, range(2))
+        gen3 = (c for c in "xy")
+        gen4 = iter([True])
+        result = list(cartesian_product(gen1, gen2, gen3, gen4))
+        expected = list(itertools.product([1, 2, 3], ["0", "1"], ["x", "y"], [True]))
+        assert result == expected
+        assert len(result) == 12
+
+    def test_len(self):
+        """Test that the product reports its total size."""
+        assert len(cartesian_product()) == 0
+        assert len(cartesian_product([1, 2], "abc", range(4))) == 24
+        assert len(cartesian_product([1, 2], [])) == 0
+        assert len(cartesian_product(range(10**6), range(10**6))) == 10**12
+
+    def test_seek(self):
+        """Test seeking to an index matches the itertools ordering."""
+        args = ([1, 2, 3], "ab", range(4))
+        expected = list(itertools.product(*args))
+
+        for index in range(len(expected) + 1):
+            product = cartesian_product(*args).seek(index)
+            assert product.position == index
+            assert len(product) == len(expected) - index
+            assert product.total == len(expected)
+            assert list(product) == expected[index:]
+
+    def test_at(self):
+        """Test random access by index, independent of the position."""
+        product = cartesian_product("ab", range(3), "xyz")
+        expected = list(itertools.product("ab", range(3), "xyz"))
+        next(product)
+        assert [product.at(i) for i in (17, 0, 5)] == [expected[i] for i in (17, 0, 5)]
+        assert product.position == 1
+        with pytest.raises(IndexError):
+            product.at(18)
+
+    def test_seek_out_of_range(self):
+        """Test that seeking outside the product raises IndexError."""
+        product = cartesian_product([1, 2], [3])
+        with pytest.raises(IndexError):
+            product.seek(3)
+        with pytest.raises(IndexError):
+            product.seek(-1)
+
+    def test_seek_huge_product(self):
+        """Test that seeking does not iterate over skipped items."""
+        product = cartesian_product(range(10**6), range(10**6))
+        product.seek(10**12 - 2)
+        assert list(product) == [(999999, 999998), (999999, 999999)]
+
     def test_large_product(self):
         """Test with larger iterables."""
         result = list(cartesian_product(range(3), range(3), range(2)))
@@ -163,8 +223,6 @@ class TestIterCartesianProduct:
 
     def test_comparison_with_itertools(self):
         """Test that results match itertools.product."""
-        import itertools
-
         test_cases: List[Tuple[Iterable[Any], ...]] = [
             ([1, 2], ["a", "b"]),
             ([1, 2, 3], ["x"], [True, False]),
@@ -228,6 +286,68 @@ class TestIterCartesianProduct:
         assert len(result1) == 3 * 2 * 2  # 12 combinations
 
 
+class TestFormattedInts:
+    """Test suite for FormattedInts sequence."""
+
+    def test_plain_values(self):
+        """Test formatting without leading zeros."""
+        values = FormattedInts([1, -2, 30, 400])
+        assert list(values) == ["1", "-2", "30", "400"]
+        assert len(values) == 4
+
+    def test_leading_zeros(self):
+        """Test zero padding, including values wider than the padding."""
+        values = FormattedInts(range(98, 1002), leading_zeros=3)
+        assert values[0] == "098"
+        assert values[2] == "100"
+        assert values[-1] == "1001"
+        assert list(values) == [f"{v:03d}" for v in range(98, 1002)]
+
+    def test_matches_fstring_across_chunks(self):
+        """Test indexing and iteration agree across chunk boundaries."""
+        count = FormattedInts.CHUNK_SIZE * 2 + 5
+        values = FormattedInts(range(count), leading_zeros=6)
+        expected = [f"{v:06d}" for v in range(count)]
+
+        assert list(values) == expected
+        for index in (0, FormattedInts.CHUNK_SIZE - 1, FormattedInts.CHUNK_SIZE):
+            assert values[index] == expected[index]
+        assert values[-1] == expected[-1]
+        assert values[3:7] == expected[3:7]
+
+    def test_index_out_of_range(self):
+        """Test that out of range indices raise IndexError."""
+        values = FormattedInts(range(3))
+        with pytest.raises(IndexError):
+            values[3]
+        with pytest.raises(IndexError):
+            values[-4]
+
+    def test_empty(self):
+        """Test an empty value source."""
+        values = FormattedInts(range(0), leading_zeros=4)
+        assert len(values) == 0
+        assert list(values) == []
+
+    def test_cache_bytes(self):
+        """Test that the cache estimate covers the fully formatted chunks."""
+        values = FormattedInts(range(-5, 100_000), leading_zeros=3)
+        list(values)
+        held = sum(
+            sys.getsizeof(blob) + sys.getsizeof(offsets)
+            for blob, offsets in values._chunks.values()
+        )
+        assert held <= values.cache_bytes() < held * 1.2
+        assert FormattedInts([]).cache_bytes() == 0
+
+    def test_in_cartesian_product(self):
+        """Test that the product indexes formatted values without copying."""
+        result = list(
+            cartesian_product(FormattedInts(range(1, 3), 2), FormattedInts([7, 8]))
+        )
+        assert result == [("01", "7"), ("01", "8"), ("02", "7"), ("02", "8")]
+
+
 class TestReplaceVars:
     """Test suite for replace_vars function."""
 
@@ -416,3 +536,36 @@ class TestReplaceVars:
         vars_dict = {"name": "test", "value": "123"}
         result = replace_vars(template, vars_dict)
         assert result == "  test  \n  123  \t"
+
+
+class TestCompileTemplate:
+    """Test suite for compile_template function."""
+
+    @pytest.mark.parametrize(
+        "template",
+        [
+            "Hello $name!",
+            "$name likes $name's job at $company.",
+            "Price: $$50 for $company",
+            "$$$name",
+            "$namespace and $name",
+            "Braces {0} and {name} stay literal }{",
+            "",
+            "No variables here",
+        ],
+    )
+    def test_matches_replace_vars(self, template):
+        """Test that formatting a compiled template equals replace_vars."""
+        names = ("name", "namespace", "company")
+        values = ("Alice", "app", "Tech{Corp}")
+        compiled = compile_template(template, names)
+        expected = replace_vars(template, dict(zip(names, values)))
+        assert compiled.format(*values) == expected
+
+    def test_unknown_variable_warns_once(self, capsys):
+        """Test that unknown variables are reported at compile time only."""
+        compiled = compile_template("Hello $unknown!", ("name",))
+        assert "[warn] Unknown variable at $unknown!" in capsys.readouterr().out
+
+        assert compiled.format("World") == "Hello $unknown!"
+        assert capsys.readouterr().out == ""